@@ -1,6 +1,5 @@
 import sys
 import cv2
-import torch
 import numpy as np
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
@@ -8,6 +7,11 @@ from PyQt5.QtGui import *
 import qtawesome as qta
 import time
 import math
+import logging
+
+from profiling import profiler
+
+log = logging.getLogger("hud")
 
 class NavBarWidget(QWidget):
     def __init__(self, parent=None):
@@ -105,74 +109,272 @@ class NavBarWidget(QWidget):
         painter.drawText(label_rect, Qt.AlignBottom | Qt.AlignHCenter, "vision")
 
 
+# Pre-rendered text labels. Laying out text is one of the most expensive
+# QPainter operations; labels the HUD shows every frame are drawn once per font
+# into one atlas pixmap and cut into sprites that are blitted afterwards.
+class GlyphAtlas:
+    def __init__(self, font, labels, color, device_pixel_ratio=1.0, columns=16):
+        self.font = font
+        self.color = color
+
+        metrics = QFontMetrics(font)
+        sizes = [metrics.size(Qt.TextSingleLine, label) for label in labels]
+        cell_w = max(size.width() for size in sizes) + 2
+        cell_h = max(size.height() for size in sizes) + 2
+        rows = (len(labels) + columns - 1) // columns
+
+        self.pixmap = QPixmap(QSize(cell_w * columns, cell_h * rows) * device_pixel_ratio)
+        self.pixmap.setDevicePixelRatio(device_pixel_ratio)
+        self.pixmap.fill(Qt.transparent)
+
+        cells = []
+        painter = QPainter(self.pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(font)
+        painter.setPen(color)
+        for i, (label, size) in enumerate(zip(labels, sizes)):
+            cell = QRect((i % columns) * cell_w, (i // columns) * cell_h, size.width(), size.height())
+            painter.drawText(cell, Qt.AlignLeft | Qt.AlignTop, label)
+            cells.append(cell)
+        painter.end()
+
+        # whole-pixmap blits are cheaper than source-rect blits from the atlas
+        self.sprites = {}
+        for label, cell in zip(labels, cells):
+            device_rect = QRect(cell.topLeft() * device_pixel_ratio, cell.size() * device_pixel_ratio)
+            sprite = self.pixmap.copy(device_rect)
+            sprite.setDevicePixelRatio(device_pixel_ratio)
+            self.sprites[label] = (sprite, cell.width(), cell.height())
+
+    # same placement as painter.drawText(rect, flags, label)
+    def draw(self, painter, rect, flags, label):
+        entry = self.sprites.get(label)
+        if entry is None:
+            painter.setFont(self.font)
+            painter.setPen(self.color)
+            painter.drawText(rect, flags, label)
+            return
+
+        sprite, w, h = entry
+        x, y = rect.x(), rect.y()
+        if flags & Qt.AlignHCenter:
+            x += (rect.width() - w) / 2
+        elif flags & Qt.AlignRight:
+            x += rect.width() - w
+        if flags & Qt.AlignVCenter:
+            y += (rect.height() - h) / 2
+        elif flags & Qt.AlignBottom:
+            y += rect.height() - h
+        painter.drawPixmap(round(x), round(y), sprite)
+
+
 class HudOverlay(QWidget):
+    # smallest change of each value that is visible on the HUD
+    REPAINT_THRESHOLDS = {"heading": 0.2, "pitch": 0.2, "zoom": 0.004, "focus": 0.004}
+
+    # HUD elements that show each value
+    VALUE_LAYERS = {
+        "heading": ("horizontal_scale", "compass"),
+        "pitch": ("vertical_scale", "pitch_gauge"),
+        "zoom": ("zoom_control",),
+        "focus": ("focus_control",),
+    }
+
+    # text drawn every frame: atlas name -> (point size at 1080p, bold, labels)
+    GLYPH_SETS = {
+        "heading_ticks": (8, False, [str(deg) for deg in range(0, 360, 10)]),
+        "heading_value": (9, True, [str(deg) for deg in range(360)]),
+        "heading_degrees": (8, False, [f"{deg}°" for deg in range(360)]),
+        "pitch_value": (8, False, [str(deg) for deg in range(-90, 91)]),
+        "pitch_degrees": (8, False, [f"{deg}°" for deg in range(-90, 91)]),
+    }
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.use_glyph_atlas = True
         self.heading_deg = 0
         self.pitch_deg = 0
         self.zoom_level = 0.5     
         self.focus_level = 0.5     
+        self._layers = {}  # cached static HUD layers, cleared on resize
+        self._regions = {}  # widget rect of each HUD element, from the last paint
+        self._atlases = {}  # GlyphAtlas per (glyph set, scale)
+        self._layout_size = None
         self.setAttribute(Qt.WA_TransparentForMouseEvents)
         self.setAttribute(Qt.WA_TranslucentBackground)
 
     def set_heading(self, heading_deg):
-        self.heading_deg = heading_deg % 360
-        self.update()
+        self.update_state(heading=heading_deg)
 
     def set_zoom_level(self, zoom):
-        self.zoom_level = max(0.0, min(1.0, zoom))        
-        self.update() 
+        self.update_state(zoom=zoom)
 
     def set_pitch(self, pitch_deg):
-        self.pitch_deg = max(-90, min(90, pitch_deg))
-        print(f"[HUD] Updated pitch: {self.pitch_deg}")
-        self.update()
-
-    def auto_adjust_zoom_focus_from_bbox(self, bbox_width, bbox_height, frame_width, frame_height):
-        print("auto_adjust_zoom_focus_from_bbox called")
+        if self.update_state(pitch=pitch_deg):
+            log.debug("Updated pitch: %.1f", self.pitch_deg)
+
+    # Apply several HUD values in one go. Values that moved less than their
+    # display threshold are ignored; only the elements showing a changed value
+    # are repainted. Returns True if anything changed.
+    def update_state(self, heading=None, pitch=None, zoom=None, focus=None):
+        thresholds = self.REPAINT_THRESHOLDS
+        changed = []
+
+        if heading is not None:
+            heading = heading % 360
+            # shortest way round, so 359.9 -> 0.1 is a small step
+            if abs((heading - self.heading_deg + 180) % 360 - 180) >= thresholds["heading"]:
+                self.heading_deg = heading
+                changed.append("heading")
+        if pitch is not None:
+            pitch = max(-90, min(90, pitch))
+            if abs(pitch - self.pitch_deg) >= thresholds["pitch"]:
+                self.pitch_deg = pitch
+                changed.append("pitch")
+        if zoom is not None:
+            zoom = max(0.0, min(1.0, zoom))
+            if abs(zoom - self.zoom_level) >= thresholds["zoom"]:
+                self.zoom_level = zoom
+                changed.append("zoom")
+        if focus is not None:
+            focus = max(0.0, min(1.0, focus))
+            if abs(focus - self.focus_level) >= thresholds["focus"]:
+                self.focus_level = focus
+                changed.append("focus")
+
+        if changed:
+            self.invalidate_values(changed)
+        return bool(changed)
+
+    # schedule a repaint of the elements showing the given values
+    def invalidate_values(self, names):
+        region = QRegion()
+        for name in names:
+            for key in self.VALUE_LAYERS[name]:
+                rect = self._regions.get(key)
+                if rect is None:
+                    # not painted at this size yet
+                    self.update()
+                    return
+                region += rect
+        self.update(region)
+
+    # zoom/focus level for an object of this size: far -> 0, near -> 1
+    @staticmethod
+    def zoom_focus_from_bbox(bbox_width, bbox_height, frame_width, frame_height):
         object_area = bbox_width * bbox_height
         frame_area = frame_width * frame_height
         object_ratio = object_area / frame_area
 
-        print(f"[DEBUG] bbox: {bbox_width}x{bbox_height}, frame: {frame_width}x{frame_height}, ratio: {object_ratio:.4f}, zoom_level before: {self.zoom_level:.4f}")
-
          # Adjust the range to balance: far → middle → near
         min_ratio = 0.0005  # left
         max_ratio = 0.0093  # right ( 0.0049 center)
 
         if object_ratio < min_ratio:
-            self.zoom_level = 0.0
-            self.focus_level = 0.0
-            print("Condition: object_ratio < min_ratio")
-        elif object_ratio > max_ratio:
-            self.zoom_level = 1.0
-            self.focus_level = 1.0
-            # print("Condition: object_ratio > max_ratio")
-        else:
-            normalized = (object_ratio - min_ratio) / (max_ratio - min_ratio)
-            self.zoom_level = normalized
-            self.focus_level = normalized
-            # print("Condition: object_ratio in between")
+            return 0.0
+        if object_ratio > max_ratio:
+            return 1.0
+        return (object_ratio - min_ratio) / (max_ratio - min_ratio)
 
-        # print(f"[DEBUG] zoom_level after: {self.zoom_level:.4f}, focus_level: {self.focus_level:.4f}")
+    def auto_adjust_zoom_focus_from_bbox(self, bbox_width, bbox_height, frame_width, frame_height):
+        level = self.zoom_focus_from_bbox(bbox_width, bbox_height, frame_width, frame_height)
+        self.update_state(zoom=level, focus=level)
+
+    def resizeEvent(self, event):
+        self._check_layout_size()
+        super().resizeEvent(event)
+
+    # static layers are laid out for one widget size. Also checked on paint:
+    # a hidden overlay composited by a video surface gets no resize events.
+    def _check_layout_size(self):
+        size = (self.width(), self.height())
+        if size != self._layout_size:
+            self._layout_size = size
+            self._layers.clear()
+            self._regions.clear()
+            self._atlases.clear()
 
     def paintEvent(self, event):
         painter = QPainter(self)
+        self.paint_hud(painter, event.region())
+        painter.end()
+
+    # Paint the HUD in widget coordinates. Used by paintEvent and by video
+    # surfaces that draw the HUD in their own pass; dirty limits the elements
+    # drawn (None = all).
+    def paint_hud(self, painter, dirty=None):
+        start = time.perf_counter_ns()
+        self._paint_hud(painter, dirty)
+        profiler.add("hud", start)
+
+    def _paint_hud(self, painter, dirty):
+        self._check_layout_size()
         painter.setRenderHint(QPainter.Antialiasing)
         w, h = self.width(), self.height()
         ref_w, ref_h = 1920, 1080
         scale = min(w / ref_w, h / ref_h)
 
-        self.draw_horizontal_scale(painter, w, h, scale)
-        self.draw_vertical_scale(painter, w, h, scale)
-        self.draw_compass(painter, int(450 * scale), h - int(150 * scale), int(200 * scale), scale)
-        self.draw_pitch_gauge(painter, int(150 * scale), h - int(150 * scale), int(200 * scale), scale)
-
-        focus_y, bg_x, bg_width = self.draw_zoom_control(painter, scale, self.zoom_level)
-        self.draw_focus_control(painter, scale, focus_y, bg_x, bg_width)
+        # skip elements outside the invalidated region
+        def needs_paint(*keys):
+            if dirty is None:
+                return True
+            return any(key not in self._regions or dirty.intersects(self._regions[key]) for key in keys)
+
+        if needs_paint("horizontal_scale"):
+            self.draw_horizontal_scale(painter, w, h, scale)
+        if needs_paint("vertical_scale"):
+            self.draw_vertical_scale(painter, w, h, scale)
+        if needs_paint("compass"):
+            self.draw_compass(painter, int(450 * scale), h - int(150 * scale), int(200 * scale), scale)
+        if needs_paint("pitch_gauge"):
+            self.draw_pitch_gauge(painter, int(150 * scale), h - int(150 * scale), int(200 * scale), scale)
+
+        if needs_paint("zoom_control", "focus_control"):
+            focus_y, bg_x, bg_width = self.draw_zoom_control(painter, scale, self.zoom_level)
+            self.draw_focus_control(painter, scale, focus_y, bg_x, bg_width)
 
         # Crosshair
-        self.draw_crosshair(painter, w, h, scale)
+        if needs_paint("crosshair"):
+            self.draw_crosshair(painter, w, h, scale)
+
+    # Blit the cached static layer `key` at rect, painting it first if needed.
+    # paint_static draws in widget coordinates. region is the element's full
+    # extent including its moving parts (defaults to rect), used for repaints.
+    def _draw_layer(self, painter, key, rect, paint_static, region=None):
+        self._regions[key] = region if region is not None else rect
+        layer = self._layers.get(key)
+        if layer is None:
+            ratio = self.devicePixelRatioF()
+            layer = QPixmap(rect.size() * ratio)
+            layer.setDevicePixelRatio(ratio)
+            layer.fill(Qt.transparent)
+            layer_painter = QPainter(layer)
+            layer_painter.setRenderHint(QPainter.Antialiasing)
+            layer_painter.translate(-rect.topLeft())
+            paint_static(layer_painter)
+            layer_painter.end()
+            self._layers[key] = layer
+        painter.drawPixmap(rect.topLeft(), layer)
+
+    def _atlas(self, name, scale):
+        key = (name, scale)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            point_size, bold, labels = self.GLYPH_SETS[name]
+            font = QFont("sans-serif", max(1, int(point_size * scale)), QFont.Bold if bold else -1)
+            atlas = GlyphAtlas(font, labels, QColor(255, 255, 255), self.devicePixelRatioF())
+            self._atlases[key] = atlas
+        return atlas
+
+    # draw a per-frame label from the glyph atlas (or as plain text when disabled)
+    def _draw_label(self, painter, name, scale, rect, flags, label):
+        atlas = self._atlas(name, scale)
+        if self.use_glyph_atlas:
+            atlas.draw(painter, rect, flags, label)
+        else:
+            painter.setFont(atlas.font)
+            painter.setPen(atlas.color)
+            painter.drawText(rect, flags, label)
 
     def draw_crosshair(self, painter, w, h, scale):
         cx, cy = w // 2, h // 2
@@ -181,28 +383,31 @@ class HudOverlay(QWidget):
         bar_thickness = int(4 * scale)
         gap = int(60 * scale)  
 
-        painter.setRenderHint(QPainter.Antialiasing)
+        def paint_static(painter):
+            pen = QPen(QColor(255, 255, 255))
+            pen.setWidthF(1.0)  
+            painter.setPen(pen)
+            painter.setBrush(Qt.NoBrush)
 
-        pen = QPen(QColor(255, 255, 255))
-        pen.setWidthF(1.0)  
-        painter.setPen(pen)
-        painter.setBrush(Qt.NoBrush)
+            # left
+            left_rect = QRect(cx - gap - bar_length, cy - bar_thickness // 2, bar_length, bar_thickness)
+            painter.drawRect(left_rect)
 
-        # left
-        left_rect = QRect(cx - gap - bar_length, cy - bar_thickness // 2, bar_length, bar_thickness)
-        painter.drawRect(left_rect)
+            # right
+            right_rect = QRect(cx + gap, cy - bar_thickness // 2, bar_length, bar_thickness)
+            painter.drawRect(right_rect)
 
-        # right
-        right_rect = QRect(cx + gap, cy - bar_thickness // 2, bar_length, bar_thickness)
-        painter.drawRect(right_rect)
+            # top
+            top_rect = QRect(cx - bar_thickness // 2, cy - gap - bar_length, bar_thickness, bar_length)
+            painter.drawRect(top_rect)
 
-        # top
-        top_rect = QRect(cx - bar_thickness // 2, cy - gap - bar_length, bar_thickness, bar_length)
-        painter.drawRect(top_rect)
+            # bottom
+            bottom_rect = QRect(cx - bar_thickness // 2, cy + gap, bar_thickness, bar_length)
+            painter.drawRect(bottom_rect)
 
-        # bottom
-        bottom_rect = QRect(cx - bar_thickness // 2, cy + gap, bar_thickness, bar_length)
-        painter.drawRect(bottom_rect)
+        extent = gap + bar_length + 2
+        self._draw_layer(painter, "crosshair", QRect(cx - extent, cy - extent, 2 * extent, 2 * extent),
+                         paint_static)
 
 
     def draw_zoom_control(self, painter, scale, zoom_level):
@@ -245,57 +450,59 @@ class HudOverlay(QWidget):
         center_x_left = small_center_x_left - (big_width * small_side_scale / 2 + small_offset * small_side_scale)
         small_center_x_right = center_x_right + (big_width / 2 + small_offset)
 
-        painter.save()
-
         # Calculate background position
         extra_width = 30 * scale
         bg_x = small_center_x_left - (big_width * small_side_scale * small_scale) / 2 - margin - extra_width / 2
         bg_width = center_x_right + big_width / 2 + margin + extra_width / 2 - bg_x
+        bg_rect = QRectF(bg_x, bg_y, bg_width, bg_height)
 
-        painter.setBrush(QColor(60, 60, 60, 200))
-        painter.setPen(Qt.NoPen)
-        painter.drawRoundedRect(QRectF(bg_x, bg_y, bg_width, bg_height), 12 * scale, 12 * scale)
-
-        # line
-        painter.setPen(QPen(QColor(200, 200, 200), 1.5))
-        painter.drawLine(QPointF(line_x1, line_y), QPointF(line_x2, line_y))
-        for x_pos in [line_x1, line_x2]:
-            painter.drawLine(QPointF(x_pos, line_y - tick_height / 2),
-                            QPointF(x_pos, line_y + tick_height / 2))
+        def paint_static(painter):
+            painter.setBrush(QColor(60, 60, 60, 200))
+            painter.setPen(Qt.NoPen)
+            painter.drawRoundedRect(bg_rect, 12 * scale, 12 * scale)
+
+            # line
+            painter.setPen(QPen(QColor(200, 200, 200), 1.5))
+            painter.drawLine(QPointF(line_x1, line_y), QPointF(line_x2, line_y))
+            for x_pos in [line_x1, line_x2]:
+                painter.drawLine(QPointF(x_pos, line_y - tick_height / 2),
+                                QPointF(x_pos, line_y + tick_height / 2))
+
+            def draw_mountain(center_x, width, height, offset=0):
+                path = QPainterPath()
+                path.moveTo(center_x - width / 2, base_y)
+                path.quadTo(center_x, base_y - height + offset, center_x + width / 2, base_y)
+                path.lineTo(center_x - width / 2, base_y)
+                
+                painter.setBrush(QColor(255, 255, 255))
+                painter.setPen(Qt.NoPen)
+                painter.drawPath(path)
+                
+                if width == big_width or width == big_width * small_side_scale:
+                    painter.setPen(QPen(QColor(0, 0, 0, 100), 2))
+                    painter.setBrush(Qt.NoBrush)
+                    painter.drawPath(path)
+
+            mountains = [
+                (small_center_x_right, big_width * small_scale, big_height * small_scale, 3 * scale),
+                (center_x_right, big_width, big_height, -10 * scale),
+                (small_center_x_left, big_width * small_side_scale * small_scale,
+                big_height * small_side_scale * small_scale, 3 * scale * small_side_scale),
+                (center_x_left, big_width * small_side_scale, big_height * small_side_scale,
+                -10 * scale * small_side_scale)
+            ]
+
+            for center_x, width, height, offset in mountains:
+                draw_mountain(center_x, width, height, offset)
+
+        self._draw_layer(painter, "zoom_control", bg_rect.toAlignedRect().adjusted(-2, -2, 2, 2), paint_static)
 
-        zoom_level = getattr(self, "zoom_level", 0.5)
+        # handle
+        painter.save()
         handle_x = line_x1 + zoom_level * (line_x2 - line_x1)
         painter.setPen(QPen(QColor(255, 204, 0), 4))
         painter.drawLine(QPointF(handle_x, line_y - tick_height),
                         QPointF(handle_x, line_y + tick_height))
-
-        def draw_mountain(center_x, width, height, offset=0):
-            path = QPainterPath()
-            path.moveTo(center_x - width / 2, base_y)
-            path.quadTo(center_x, base_y - height + offset, center_x + width / 2, base_y)
-            path.lineTo(center_x - width / 2, base_y)
-            
-            painter.setBrush(QColor(255, 255, 255))
-            painter.setPen(Qt.NoPen)
-            painter.drawPath(path)
-            
-            if width == big_width or width == big_width * small_side_scale:
-                painter.setPen(QPen(QColor(0, 0, 0, 100), 2))
-                painter.setBrush(Qt.NoBrush)
-                painter.drawPath(path)
-
-        mountains = [
-            (small_center_x_right, big_width * small_scale, big_height * small_scale, 3 * scale),
-            (center_x_right, big_width, big_height, -10 * scale),
-            (small_center_x_left, big_width * small_side_scale * small_scale,
-            big_height * small_side_scale * small_scale, 3 * scale * small_side_scale),
-            (center_x_left, big_width * small_side_scale, big_height * small_side_scale,
-            -10 * scale * small_side_scale)
-        ]
-
-        for center_x, width, height, offset in mountains:
-            draw_mountain(center_x, width, height, offset)
-
         painter.restore()
         return bg_y + bg_height + 10 * scale, bg_x, bg_width
 
@@ -304,60 +511,66 @@ class HudOverlay(QWidget):
         x = bg_x
         width = bg_width
 
-        # background
-        radius = 8 * scale
-        painter.setPen(Qt.NoPen)
-        painter.setBrush(QColor(60, 60, 60, 160))
-        painter.drawRoundedRect(QRectF(x, y, width, height), radius, radius)
-
-        # icon len
-        lens_outer_r = 12 * scale
-        lens_middle_r = 8 * scale
-        lens_inner_r = 3 * scale
-        lens_x = x + 25 * scale
-        lens_y = y + height / 2
-
-        painter.setBrush(QColor(255, 255, 255, 200))
-        painter.drawEllipse(QRectF(lens_x - lens_outer_r, lens_y - lens_outer_r, 
-                                2 * lens_outer_r, 2 * lens_outer_r))
-        painter.setBrush(QColor(80, 80, 80))
-        painter.drawEllipse(QRectF(lens_x - lens_middle_r, lens_y - lens_middle_r, 
-                                2 * lens_middle_r, 2 * lens_middle_r))
-        painter.setBrush(QColor(120, 120, 120))
-        painter.drawEllipse(QRectF(lens_x - lens_inner_r, lens_y - lens_inner_r, 
-                                2 * lens_inner_r, 2 * lens_inner_r))
-
         # distance
         distances = [20, 40, 100, 300, 800, 2000]
         slider_start = x + 50 * scale
         slider_width = width - 70 * scale
-        step = slider_width / (len(distances) - 1)
-
-        tick_height = 7 * scale
-        tick_offset_y = 15 * scale
-        text_offset_y = 5 * scale
+        slider_y = y + height - 12 * scale
 
-        painter.setPen(QColor(200, 200, 200))
-        font = QFont("sans-serif", max(1, int(8 * scale)))
-        painter.setFont(font)
+        def paint_static(painter):
+            # background
+            radius = 8 * scale
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(60, 60, 60, 160))
+            painter.drawRoundedRect(QRectF(x, y, width, height), radius, radius)
+
+            # icon len
+            lens_outer_r = 12 * scale
+            lens_middle_r = 8 * scale
+            lens_inner_r = 3 * scale
+            lens_x = x + 25 * scale
+            lens_y = y + height / 2
+
+            painter.setBrush(QColor(255, 255, 255, 200))
+            painter.drawEllipse(QRectF(lens_x - lens_outer_r, lens_y - lens_outer_r, 
+                                    2 * lens_outer_r, 2 * lens_outer_r))
+            painter.setBrush(QColor(80, 80, 80))
+            painter.drawEllipse(QRectF(lens_x - lens_middle_r, lens_y - lens_middle_r, 
+                                    2 * lens_middle_r, 2 * lens_middle_r))
+            painter.setBrush(QColor(120, 120, 120))
+            painter.drawEllipse(QRectF(lens_x - lens_inner_r, lens_y - lens_inner_r, 
+                                    2 * lens_inner_r, 2 * lens_inner_r))
+
+            step = slider_width / (len(distances) - 1)
+
+            tick_height = 7 * scale
+            tick_offset_y = 15 * scale
+            text_offset_y = 5 * scale
+
+            painter.setPen(QColor(200, 200, 200))
+            font = QFont("sans-serif", max(1, int(8 * scale)))
+            painter.setFont(font)
+
+            for i, dist in enumerate(distances):
+                line_x = slider_start + i * step
+                painter.drawLine(QPointF(line_x, y + height - tick_offset_y),
+                                QPointF(line_x, y + height - (tick_offset_y - tick_height)))
+
+                label = str(dist)
+                text_rect = painter.boundingRect(
+                    QRectF(line_x - 20 * scale, y + text_offset_y, 40 * scale, 15 * scale),
+                    Qt.AlignCenter, label
+                )
+                painter.drawText(text_rect, Qt.AlignCenter, label)
 
-        for i, dist in enumerate(distances):
-            line_x = slider_start + i * step
-            painter.drawLine(QPointF(line_x, y + height - tick_offset_y),
-                            QPointF(line_x, y + height - (tick_offset_y - tick_height)))
+            # line slider main
+            painter.setPen(QPen(QColor(180, 180, 180), 2))
+            painter.drawLine(QPointF(slider_start, slider_y),
+                            QPointF(slider_start + slider_width, slider_y))
 
-            label = str(dist)
-            text_rect = painter.boundingRect(
-                QRectF(line_x - 20 * scale, y + text_offset_y, 40 * scale, 15 * scale),
-                Qt.AlignCenter, label
-            )
-            painter.drawText(text_rect, Qt.AlignCenter, label)
-
-        # line slider main
-        painter.setPen(QPen(QColor(180, 180, 180), 2))
-        slider_y = y + height - 12 * scale
-        painter.drawLine(QPointF(slider_start, slider_y),
-                        QPointF(slider_start + slider_width, slider_y))
+        layer_rect = QRectF(x, y, width, height).toAlignedRect().adjusted(-int(20 * scale) - 2, -2,
+                                                                          int(20 * scale) + 2, 2)
+        self._draw_layer(painter, "focus_control", layer_rect, paint_static)
 
         # handle
         handle_x = slider_start + self.focus_level * slider_width
@@ -378,17 +591,43 @@ class HudOverlay(QWidget):
         center_x = w // 2
         bar_y = int(h - 60 * scale)
 
-        bg_color = QColor(60, 60, 60, 200)
-        painter.setBrush(bg_color)
-        painter.setPen(Qt.NoPen)
         scale_length_px = int(800 * scale)
         rect_x = center_x - scale_length_px // 2 - int(10 * scale)
         rect_y = bar_y - int(40 * scale)
         rect_w = scale_length_px + int(20 * scale)
         rect_h = int(80 * scale)
         corner_radius = int(15 * scale)
-        painter.drawRoundedRect(rect_x, rect_y, rect_w, rect_h, corner_radius, corner_radius)
 
+        triangle_height = int(20 * 1.5 * scale)
+        triangle_width = int(24 * 1.5 * scale)
+        offset_y = int(10 * scale)
+        tip = QPoint(center_x, bar_y - int(40 * scale) + offset_y)
+
+        def paint_static(painter):
+            bg_color = QColor(60, 60, 60, 200)
+            painter.setBrush(bg_color)
+            painter.setPen(Qt.NoPen)
+            painter.drawRoundedRect(rect_x, rect_y, rect_w, rect_h, corner_radius, corner_radius)
+
+            left = QPoint(center_x - triangle_width // 2, bar_y - int(40 * scale) - triangle_height + offset_y)
+            right = QPoint(center_x + triangle_width // 2, bar_y - int(40 * scale) - triangle_height + offset_y)
+            triangle = QPolygon([tip, left, right])
+
+            triangle_color = QColor(199, 153, 0)
+            triangle_border = QColor(60, 60, 60)
+
+            painter.setBrush(triangle_color)
+            painter.setPen(QPen(triangle_border, 1))
+            painter.drawPolygon(triangle)
+
+        layer_top = tip.y() - triangle_height - 2
+        layer_rect = QRect(rect_x - 2, layer_top, rect_w + 4, rect_y + rect_h + 2 - layer_top)
+        label_rect = QRect(center_x - int(30 * scale), tip.y() - int(65 * scale),
+                           int(60 * scale), int(30 * scale))
+        self._draw_layer(painter, "horizontal_scale", layer_rect, paint_static,
+                         region=layer_rect.united(label_rect))
+
+        # moving heading tape
         deg_per_px = 4 / scale
         visible_deg = int(scale_length_px / deg_per_px)
         start_deg = int((self.heading_deg - visible_deg // 2) // 10 * 10)
@@ -401,9 +640,6 @@ class HudOverlay(QWidget):
 
         pen_tick = QPen(tick_color)
         pen_tick.setWidth(1)
-        painter.setPen(pen_tick)
-        font = QFont("sans-serif", max(1, int(8 * scale)))
-        painter.setFont(font)
 
         painter.save()
         painter.setClipRect(QRect(rect_x, rect_y, rect_w, rect_h))
@@ -414,43 +650,20 @@ class HudOverlay(QWidget):
             x = int(center_x + px_offset)
 
             if rect_x <= x <= rect_x + rect_w:
+                painter.setPen(pen_tick)
                 if deg_tick % 10 == 0:
                     painter.drawLine(x, bar_y - tick_height_large, x, bar_y)
-                    label = str(deg_mod)
-                    text_rect = painter.boundingRect(x - int(15 * scale),
-                                                    bar_y + text_y_offset - int(10 * scale),
-                                                    int(30 * scale), int(20 * scale),
-                                                    Qt.AlignCenter, label)
-                    painter.drawText(text_rect, Qt.AlignCenter, label)
+                    text_rect = QRect(x - int(15 * scale), bar_y + text_y_offset - int(10 * scale),
+                                      int(30 * scale), int(20 * scale))
+                    self._draw_label(painter, "heading_ticks", scale, text_rect, Qt.AlignCenter, str(deg_mod))
                 else:
                     painter.drawLine(x, bar_y - tick_height_small, x, bar_y)
         painter.restore()
 
-        triangle_height = int(20 * 1.5 * scale)
-        triangle_width = int(24 * 1.5 * scale)
-        offset_y = int(10 * scale)
-
-        tip = QPoint(center_x, bar_y - int(40 * scale) + offset_y)
-        left = QPoint(center_x - triangle_width // 2, bar_y - int(40 * scale) - triangle_height + offset_y)
-        right = QPoint(center_x + triangle_width // 2, bar_y - int(40 * scale) - triangle_height + offset_y)
-        triangle = QPolygon([tip, left, right])
-
-        triangle_color = QColor(199, 153, 0)
-        triangle_border = QColor(60, 60, 60)
-
-        painter.setBrush(triangle_color)
-        painter.setPen(QPen(triangle_border, 1))
-        painter.drawPolygon(triangle)
-
-        painter.setPen(QColor(255, 255, 255))
-        font2 = QFont("sans-serif", max(1, int(9 * scale)), QFont.Bold)
-        painter.setFont(font2)
-        label = str(int(self.heading_deg))
-        text_rect = painter.boundingRect(center_x - int(20 * scale),
-                                        tip.y() - int(60 * scale),
-                                        int(40 * scale), int(20 * scale),
-                                        Qt.AlignCenter, label)
-        painter.drawText(text_rect, Qt.AlignCenter, label)
+        text_rect = QRect(center_x - int(20 * scale), tip.y() - int(60 * scale),
+                          int(40 * scale), int(20 * scale))
+        self._draw_label(painter, "heading_value", scale, text_rect, Qt.AlignCenter,
+                         str(int(self.heading_deg)))
 
     # scale axis Y
     def draw_vertical_scale(self, painter, w, h, scale):
@@ -465,35 +678,45 @@ class HudOverlay(QWidget):
         tick_length = int(15 * scale)
         axis_line_width = 2
 
-        pen_axis = QPen(QColor(200, 200, 200))
-        pen_axis.setWidth(axis_line_width)
-        painter.setPen(pen_axis)
-        painter.drawLine(bar_x, center_y - scale_length_px // 2,
-                        bar_x, center_y + scale_length_px // 2)
-
-        pen_tick = QPen(QColor(255, 255, 255))
-        pen_tick.setWidth(1)
-        painter.setPen(pen_tick)
-        font = QFont("sans-serif", max(1, int(8 * scale)))
-        painter.setFont(font)
-
-        for deg_tick in range(-90, 91, tick_interval):
-            px_offset = int((90 - deg_tick) / deg_per_px)
-            y = center_y - scale_length_px // 2 + px_offset
-
-            painter.drawLine(bar_x, y, bar_x + tick_length, y)
-
-            if deg_tick in [-90, 0, 90]:
-                label = str(deg_tick)
-                text_rect = painter.boundingRect(
-                    bar_x + tick_length + int(5 * scale),
-                    y - int(10 * scale),
-                    int(25 * scale),
-                    int(20 * scale),
-                    Qt.AlignLeft | Qt.AlignVCenter,
-                    label
-                )
-                painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, label)
+        def paint_static(painter):
+            pen_axis = QPen(QColor(200, 200, 200))
+            pen_axis.setWidth(axis_line_width)
+            painter.setPen(pen_axis)
+            painter.drawLine(bar_x, center_y - scale_length_px // 2,
+                            bar_x, center_y + scale_length_px // 2)
+
+            pen_tick = QPen(QColor(255, 255, 255))
+            pen_tick.setWidth(1)
+            painter.setPen(pen_tick)
+            font = QFont("sans-serif", max(1, int(8 * scale)))
+            painter.setFont(font)
+
+            for deg_tick in range(-90, 91, tick_interval):
+                px_offset = int((90 - deg_tick) / deg_per_px)
+                y = center_y - scale_length_px // 2 + px_offset
+
+                painter.drawLine(bar_x, y, bar_x + tick_length, y)
+
+                if deg_tick in [-90, 0, 90]:
+                    label = str(deg_tick)
+                    text_rect = painter.boundingRect(
+                        bar_x + tick_length + int(5 * scale),
+                        y - int(10 * scale),
+                        int(25 * scale),
+                        int(20 * scale),
+                        Qt.AlignLeft | Qt.AlignVCenter,
+                        label
+                    )
+                    painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, label)
+
+        label_extent = int(20 * scale) + 2
+        layer_rect = QRect(bar_x - 2, center_y - scale_length_px // 2 - label_extent,
+                           tick_length + int(50 * scale) + 4, scale_length_px + 2 * label_extent)
+        # the pointer and its value label sit left of the axis
+        pointer_x = bar_x - int(80 * scale) - 4
+        self._draw_layer(painter, "vertical_scale", layer_rect, paint_static,
+                         region=layer_rect.united(QRect(pointer_x, layer_rect.top(),
+                                                        bar_x - pointer_x, layer_rect.height())))
 
         triangle_height = int(20 * scale)
         triangle_width = int(24 * scale)
@@ -514,53 +737,54 @@ class HudOverlay(QWidget):
         painter.setPen(QPen(triangle_border, 1))
         painter.drawPolygon(triangle)
 
-        label = str(int(self.pitch_deg))
         text_x = tip.x() - int(60 * scale)
         text_y = tip.y() - int(10 * scale)
 
-        text_rect = painter.boundingRect(
-            text_x, text_y, int(30 * scale), int(20 * scale),
-            Qt.AlignRight | Qt.AlignVCenter, label
-        )
-        painter.setPen(QColor(255, 255, 255))
-        painter.drawText(text_rect, Qt.AlignRight | Qt.AlignVCenter, label)
+        text_rect = QRect(text_x, text_y, int(30 * scale), int(20 * scale))
+        self._draw_label(painter, "pitch_value", scale, text_rect, Qt.AlignRight | Qt.AlignVCenter,
+                         str(int(self.pitch_deg)))
     
     # scale compass X
     def draw_compass(self, painter, center_x, center_y, diameter, scale):
         radius = diameter // 2
         center = QPoint(center_x, center_y)
-
-        # Outer circle
-        painter.setBrush(QColor(50, 50, 50, 220))
-        painter.setPen(Qt.NoPen)
-        painter.drawEllipse(center, radius, radius)
-
-        # Inner circle
         inner_radius = int(radius * 0.75)  
-        pen_inner = QPen(QColor(255, 255, 255, 150))
-        pen_inner.setWidth(max(1, int(2 * scale)))
-        painter.setPen(pen_inner)
-        painter.setBrush(Qt.NoBrush)
-        painter.drawEllipse(center, inner_radius, inner_radius)
-
-        # Direction labels: N, E, W
-        directions = {
-            'N': 0,
-            'E': 90,
-            'W': 270,
-        }
-        font = QFont("sans-serif", max(1, int(8 * scale))) 
-        painter.setFont(font)
-        painter.setPen(QColor("white"))
 
-        label_radius = inner_radius + int(15 * scale) 
-        for label, angle_deg in directions.items():
-            angle_rad = math.radians(angle_deg)
-            x = center.x() + label_radius * math.sin(angle_rad)
-            y = center.y() - label_radius * math.cos(angle_rad)
-            text_size = int(24 * scale) 
-            text_rect = QRectF(x - text_size / 2, y - text_size / 2, text_size, text_size)
-            painter.drawText(text_rect, Qt.AlignCenter, label)
+        def paint_static(painter):
+            # Outer circle
+            painter.setBrush(QColor(50, 50, 50, 220))
+            painter.setPen(Qt.NoPen)
+            painter.drawEllipse(center, radius, radius)
+
+            # Inner circle
+            pen_inner = QPen(QColor(255, 255, 255, 150))
+            pen_inner.setWidth(max(1, int(2 * scale)))
+            painter.setPen(pen_inner)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawEllipse(center, inner_radius, inner_radius)
+
+            # Direction labels: N, E, W
+            directions = {
+                'N': 0,
+                'E': 90,
+                'W': 270,
+            }
+            font = QFont("sans-serif", max(1, int(8 * scale))) 
+            painter.setFont(font)
+            painter.setPen(QColor("white"))
+
+            label_radius = inner_radius + int(15 * scale) 
+            for label, angle_deg in directions.items():
+                angle_rad = math.radians(angle_deg)
+                x = center.x() + label_radius * math.sin(angle_rad)
+                y = center.y() - label_radius * math.cos(angle_rad)
+                text_size = int(24 * scale) 
+                text_rect = QRectF(x - text_size / 2, y - text_size / 2, text_size, text_size)
+                painter.drawText(text_rect, Qt.AlignCenter, label)
+
+        extent = radius + int(20 * scale) + 2
+        self._draw_layer(painter, "compass",
+                         QRect(center_x - extent, center_y - extent, 2 * extent, 2 * extent), paint_static)
 
         # Compass needle
         angle_rad = math.radians(self.heading_deg)
@@ -592,13 +816,9 @@ class HudOverlay(QWidget):
 
         # Degree number below compass
         degree_text = f"{int(self.heading_deg)}°"
-        font_num = QFont("sans-serif", max(1, int(8 * scale)))
-        painter.setFont(font_num)
-        painter.setPen(QColor("white"))
-
         text_height = int(24 * scale)
         text_rect = QRectF(center.x() - radius, center.y() + radius - text_height, radius * 2, text_height)
-        painter.drawText(text_rect, Qt.AlignCenter, degree_text)
+        self._draw_label(painter, "heading_degrees", scale, text_rect, Qt.AlignCenter, degree_text)
 
     # compass Y
     def draw_pitch_gauge(self, painter, center_x, center_y, diameter, scale):
@@ -606,38 +826,52 @@ class HudOverlay(QWidget):
         center = QPoint(center_x, center_y)
         offset = int(20 * scale)
         clip_rect = QRectF(center_x - offset, center_y - radius, radius + offset, diameter)
-
-        # CLIP right circle indented left
-        painter.save()
-        painter.setClipRect(clip_rect)
-
-        painter.setBrush(QColor(50, 50, 50, 220))
-        painter.setPen(Qt.NoPen)
-        circle_rect = QRectF(center_x - radius, center_y - radius, diameter, diameter)
-        painter.drawEllipse(circle_rect)
-
-        painter.restore()
-
-        # Inner Circle
         inner_radius = int(radius * 0.75)  
-        pen_inner = QPen(QColor(255, 255, 255, 100))
-        pen_inner.setWidth(max(1, int(2 * scale)))
-        painter.setPen(pen_inner)
-        painter.setBrush(Qt.NoBrush)
 
-        painter.save()
-        painter.setClipRect(clip_rect)
-        inner_rect = QRectF(center_x - inner_radius, center_y - inner_radius, inner_radius * 2, inner_radius * 2)
-        painter.drawArc(inner_rect, 0, 360 * 16)
-        painter.restore()
-        
-        # Horizontal line (0°)
-        pen_axis = QPen(QColor(255, 255, 255, 180))
-        pen_axis.setWidth(max(1, int(2 * scale)))
-        painter.setPen(pen_axis)
-        x_end = center_x + inner_radius
-        y_end = center_y
-        painter.drawLine(center, QPointF(x_end, y_end))
+        def paint_static(painter):
+            # CLIP right circle indented left
+            painter.save()
+            painter.setClipRect(clip_rect)
+
+            painter.setBrush(QColor(50, 50, 50, 220))
+            painter.setPen(Qt.NoPen)
+            circle_rect = QRectF(center_x - radius, center_y - radius, diameter, diameter)
+            painter.drawEllipse(circle_rect)
+
+            painter.restore()
+
+            # Inner Circle
+            pen_inner = QPen(QColor(255, 255, 255, 100))
+            pen_inner.setWidth(max(1, int(2 * scale)))
+            painter.setPen(pen_inner)
+            painter.setBrush(Qt.NoBrush)
+
+            painter.save()
+            painter.setClipRect(clip_rect)
+            inner_rect = QRectF(center_x - inner_radius, center_y - inner_radius, inner_radius * 2, inner_radius * 2)
+            painter.drawArc(inner_rect, 0, 360 * 16)
+            painter.restore()
+            
+            # Horizontal line (0°)
+            pen_axis = QPen(QColor(255, 255, 255, 180))
+            pen_axis.setWidth(max(1, int(2 * scale)))
+            painter.setPen(pen_axis)
+            x_end = center_x + inner_radius
+            y_end = center_y
+            painter.drawLine(center, QPointF(x_end, y_end))
+
+            # number 0°
+            font = QFont("sans-serif", max(1, int(8 * scale)))
+            painter.setFont(font)
+            painter.setPen(QColor("white"))
+            zero_label_x = center_x + inner_radius + int(15 * scale)
+            zero_label_y = center_y
+            zero_rect = QRectF(zero_label_x - 14, zero_label_y - 14, 28, 28)
+            painter.drawText(zero_rect, Qt.AlignCenter, "0°")
+
+        extent = radius + int(20 * scale) + 16
+        self._draw_layer(painter, "pitch_gauge",
+                         QRect(center_x - extent, center_y - extent, 2 * extent, 2 * extent), paint_static)
 
         # needle pitch
         clamped_pitch = max(-90, min(90, self.pitch_deg))
@@ -669,21 +903,8 @@ class HudOverlay(QWidget):
         painter.setPen(Qt.NoPen)
         painter.drawEllipse(center, max(3, int(4 * scale)), max(3, int(4 * scale)))
 
-        # number 0°
-        font = QFont("sans-serif", max(1, int(8 * scale)))
-        painter.setFont(font)
-        painter.setPen(QColor("white"))
-        zero_label_x = center_x + inner_radius + int(15 * scale)
-        zero_label_y = center_y
-        zero_rect = QRectF(zero_label_x - 14, zero_label_y - 14, 28, 28)
-        painter.drawText(zero_rect, Qt.AlignCenter, "0°")
-
         # Pitch degree compass Y
         pitch_text = f"{int(clamped_pitch)}°"
-        font_pitch = QFont("sans-serif", max(1, int(8 * scale)))
-        painter.setFont(font_pitch)
-        painter.setPen(QColor("white"))
-
         text_height = int(24 * scale)
         text_rect = QRectF(
             center.x() - radius,
@@ -691,7 +912,100 @@ class HudOverlay(QWidget):
             radius * 2,
             text_height
         )
-        painter.drawText(text_rect, Qt.AlignCenter, pitch_text)
+        self._draw_label(painter, "pitch_degrees", scale, text_rect, Qt.AlignCenter, pitch_text)
+
+# ID / type / confidence tags above each detection, all drawn in one QPainter
+# pass (instead of a styled QLabel per track id). Tag layout happens in
+# set_detections; only the old and new tag rectangles are repainted.
+class AnnotationOverlay(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tags = []  # (rect, text, font) in widget coordinates
+        self._fonts = {}  # pixel size -> (QFont, QFontMetrics)
+        self._tag_region = QRegion()
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+
+    def _font(self, pixel_size):
+        entry = self._fonts.get(pixel_size)
+        if entry is None:
+            font = QFont("sans-serif")
+            font.setPixelSize(pixel_size)
+            entry = (font, QFontMetrics(font))
+            self._fonts[pixel_size] = entry
+        return entry
+
+    # detections in frame coordinates, drawn on a frame shifted by offset and
+    # shown centered in this widget with the aspect ratio kept
+    def set_detections(self, detections, offset, frame_size):
+        frame_w, frame_h = frame_size
+        offset_x, offset_y = offset
+        tags = []
+        region = QRegion()
+
+        if frame_w > 0 and frame_h > 0 and len(detections) > 0:
+            shown = QSize(frame_w, frame_h).scaled(self.size(), Qt.KeepAspectRatio)
+            left = (self.width() - shown.width()) / 2
+            top = (self.height() - shown.height()) / 2
+            scale = shown.width() / frame_w
+
+            for drone_id, (x, y, w_box, h_box), kind, confidence in zip(
+                    detections['id'].tolist(), detections['bbox'].tolist(),
+                    detections['type'].tolist(), detections['confidence'].tolist()):
+                x_new = x + offset_x
+                y_new = y + offset_y
+                if not (0 <= x_new < frame_w and 0 <= y_new < frame_h):
+                    continue
+
+                # font size based on bounding box width
+                font, metrics = self._font(max(10, w_box // 30))
+                text = f"ID: {drone_id} {kind} {confidence:.1f}%"
+                text_width = metrics.horizontalAdvance(text)
+                text_height = metrics.height()
+
+                # just above the box, kept inside the widget
+                tag_x = max(0, min(int(left + x_new * scale), self.width() - text_width))
+                tag_y = max(0, int(top + y_new * scale - text_height))
+                rect = QRect(tag_x, tag_y, text_width, text_height)
+                tags.append((rect, text, font))
+                region += rect
+
+        self.tags = tags
+        self.update(self._tag_region.united(region))
+        self._tag_region = region
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        self.paint_annotations(painter)
+        painter.end()
+
+    def paint_annotations(self, painter):
+        if not self.tags:
+            return
+        start = time.perf_counter_ns()
+        background = QColor(60, 60, 60)
+        for rect, _, _ in self.tags:
+            painter.fillRect(rect, background)
+
+        painter.setPen(QColor(255, 255, 255))
+        current_font = None
+        for rect, text, font in self.tags:
+            if font is not current_font:
+                painter.setFont(font)
+                current_font = font
+            painter.drawText(rect, Qt.AlignLeft | Qt.AlignVCenter, text)
+        profiler.add("tags", start)
+
+
+# milliseconds -> [h:]mm:ss.mmm
+def format_position(msec):
+    seconds, ms = divmod(int(msec), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}.{ms:03d}"
+    return f"{minutes:02d}:{seconds:02d}.{ms:03d}"
+
 
 # All UI Widgets Manager displayed on the screen
 class UIWidgetManager:
@@ -705,6 +1019,9 @@ class UIWidgetManager:
         self.create_zoom_view()
         self.create_zoom_label_text() 
         self.create_motion_fps_labels()
+        self.create_stage_fps_label()
+        self.create_perf_panel()
+        self.create_seek_bar()
         self.create_play_pause_button()
         self.create_toggle_zoom_button()
     
@@ -745,7 +1062,30 @@ class UIWidgetManager:
         self.widgets['fps_label'] = QLabel(self.parent)
         
         return self.widgets['motion_label'], self.widgets['fps_label']
+
+    # create per-stage throughput label (capture / inference / render)
+    def create_stage_fps_label(self):
+        self.widgets['stage_fps_label'] = QLabel(self.parent)
+        self.widgets['stage_fps_label'].setTextFormat(Qt.RichText)
+        return self.widgets['stage_fps_label']
+
+    # create debug panel with per-stage p50/p95/p99 times (hidden until toggled)
+    def create_perf_panel(self):
+        self.widgets['perf_panel'] = QLabel(self.parent)
+        self.widgets['perf_panel'].setTextFormat(Qt.PlainText)
+        self.widgets['perf_panel'].hide()
+        return self.widgets['perf_panel']
     
+    # create seek bar and position label for recorded video (hidden until the frame index is ready)
+    def create_seek_bar(self):
+        self.widgets['seek_slider'] = QSlider(Qt.Horizontal, self.parent)
+        self.widgets['seek_slider'].setFocusPolicy(Qt.NoFocus)
+        self.widgets['seek_slider'].hide()
+        self.widgets['seek_label'] = QLabel(self.parent)
+        self.widgets['seek_label'].setAlignment(Qt.AlignCenter)
+        self.widgets['seek_label'].hide()
+        return self.widgets['seek_slider'], self.widgets['seek_label']
+
     # create play/pause button
     def create_play_pause_button(self):
         self.widgets['play_pause_button'] = QPushButton("⏸", self.parent)
@@ -842,6 +1182,46 @@ class UIWidgetManager:
             padding: 4px;
         """)
 
+        stage_label_width = motion_label_width + fps_label_width + 20
+        self.widgets['stage_fps_label'].setFixedWidth(stage_label_width)
+        self.widgets['stage_fps_label'].move(base_width - stage_label_width - 10,
+                                             nav_bar_height - 30 + self.widgets['fps_label'].height() + 6)
+        self.widgets['stage_fps_label'].setStyleSheet(f"""
+            font-size: {max(min_font, font_size - 2)}px;
+            font-family: sans-serif;
+            background-color: rgba(100, 100, 100, 150);
+            color: white;
+            border-radius: 10px;
+            padding: 4px;
+        """)
+
+        self.widgets['perf_panel'].move(base_width - stage_label_width - 10,
+                                        self.widgets['stage_fps_label'].y() + self.widgets['stage_fps_label'].height() + 6)
+        self.widgets['perf_panel'].setStyleSheet(f"""
+            font-size: {max(min_font, font_size - 2)}px;
+            font-family: monospace;
+            background-color: rgba(40, 40, 40, 190);
+            color: white;
+            border-radius: 6px;
+            padding: 4px;
+        """)
+
+        # seek bar along the bottom edge, position label at its right end
+        seek_label_width = fps_label_width * 2
+        seek_height = font_size * 2 + 8
+        seek_y = base_height - seek_height - 20
+        self.widgets['seek_slider'].setGeometry(20, seek_y, base_width - seek_label_width - 50, seek_height)
+        self.widgets['seek_label'].setGeometry(base_width - seek_label_width - 20, seek_y,
+                                               seek_label_width, seek_height)
+        self.widgets['seek_label'].setStyleSheet(f"""
+            font-size: {max(min_font, font_size - 2)}px;
+            font-family: monospace;
+            background-color: rgba(100, 100, 100, 150);
+            color: white;
+            border-radius: 10px;
+            padding: 2px;
+        """)
+
 
 
     # update text motion and FPS labels
@@ -855,6 +1235,54 @@ class UIWidgetManager:
             f'<span style="color: lime;">{current_fps}</span>'
         )
 
+    # update debug panel: {stage: (p50, p95, p99) ms}
+    def update_perf_panel(self, percentiles):
+        lines = [f"{'stage':9}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for name, (p50, p95, p99) in percentiles.items():
+            lines.append(f"{name:9}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        panel = self.widgets['perf_panel']
+        panel.setText("\n".join(lines))
+        panel.adjustSize()
+
+    def show_seek_bar(self, frame_count):
+        slider = self.widgets['seek_slider']
+        slider.setRange(0, frame_count - 1)
+        slider.setPageStep(max(1, frame_count // 20))
+        slider.show()
+        slider.raise_()
+        self.widgets['seek_label'].show()
+        self.widgets['seek_label'].raise_()
+
+    # position of the frame on screen; the slider is left alone while dragged
+    def update_seek_bar(self, frame, msec, duration_ms):
+        slider = self.widgets['seek_slider']
+        if not slider.isSliderDown():
+            slider.blockSignals(True)
+            slider.setValue(frame)
+            slider.blockSignals(False)
+        self.widgets['seek_label'].setText(f"{format_position(msec)} / {format_position(duration_ms)}  #{frame}")
+
+    def toggle_perf_panel(self):
+        panel = self.widgets['perf_panel']
+        panel.setVisible(not panel.isVisible())
+        panel.raise_()
+        return panel.isVisible()
+
+    # update per-stage throughput text
+    # pacing: FramePacer.jitter_stats() of a paced source, or None
+    def update_stage_fps_label(self, stage_stats, pacing=None):
+        parts = []
+        for stats in stage_stats:
+            text = f'{stats.name} <span style="color: lime;">{stats.fps:.0f}</span>'
+            if stats.dropped:
+                text += f' <span style="color: orange;">-{stats.dropped}</span>'
+            if stats.latency_ms is not None:
+                text += f' {stats.latency_ms:.0f}/{stats.latency_max_ms:.0f} ms'
+            parts.append(text)
+        if pacing is not None:
+            parts.append(f'pace {pacing["rate"]:g}x jitter {pacing["p50"]:.1f}/{pacing["p99"]:.1f} ms')
+        self.widgets['stage_fps_label'].setText(' | '.join(parts))
+
     
     
     #position toggle zoom
@@ -909,13 +1337,14 @@ class UIWidgetManager:
         text_x = cx - text_width // 2
         text_y = cy + text_height // 2
 
-        overlay = frame_bgr.copy()
-        cv2.rectangle(overlay,
-                    (text_x - 10, text_y - text_height - 10),
-                    (text_x + text_width + 10, text_y + 10),
-                    (100, 100, 100), -1)
+        # blend the box in place: roi * (1 - alpha) + gray * alpha
+        x1, y1 = max(0, text_x - 10), max(0, text_y - text_height - 10)
+        x2 = min(frame_bgr.shape[1], text_x + text_width + 11)
+        y2 = min(frame_bgr.shape[0], text_y + 11)
         alpha = 0.6
-        cv2.addWeighted(overlay, alpha, frame_bgr, 1 - alpha, 0, frame_bgr)
+        if x2 > x1 and y2 > y1:
+            roi = frame_bgr[y1:y2, x1:x2]
+            cv2.convertScaleAbs(roi, roi, 1 - alpha, 100 * alpha)
 
         cv2.putText(frame_bgr, message, (text_x, text_y),
                     font, font_scale, (255, 255, 255), thickness, cv2.LINE_AA)
@@ -0,0 +1,256 @@
+import ast
+import json
+import logging
+import os
+import sys
+import cv2
+import numpy as np
+
+from detections import nms_indices
+
+log = logging.getLogger("detector")
+
+
+# Detector backends: every backend takes a float32 NCHW RGB batch in [0, 1]
+# at input_size x input_size and returns raw YOLOv5 output (B, N, 5 + classes)
+# with cx, cy, w, h in input pixels. Pre/post-processing is shared below, so
+# all backends produce the same detection format.
+
+
+# resize keeping aspect ratio and pad to size x size -> image, (scale, pad_x, pad_y)
+def letterbox(frame, size, color=(114, 114, 114)):
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) / 2, (size - new_h) / 2
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return frame, (scale, left, top)
+
+
+# RGB frames -> NCHW float32 batch and the letterbox parameters of each frame
+def preprocess(frames, size):
+    batch = np.empty((len(frames), 3, size, size), dtype=np.float32)
+    metas = []
+    for i, frame in enumerate(frames):
+        image, (scale, pad_x, pad_y) = letterbox(frame, size)
+        batch[i] = image.transpose(2, 0, 1)
+        metas.append((scale, pad_x, pad_y, frame.shape[0], frame.shape[1]))
+    batch *= 1 / 255.0
+    return batch, metas
+
+
+# raw YOLOv5 output -> per frame rows [x1, y1, x2, y2, conf, class], normalized to the frame
+def postprocess(raw, metas, conf_threshold=0.3, iou_threshold=0.45, max_det=300):
+    outputs = []
+    for pred, (scale, pad_x, pad_y, h, w) in zip(raw, metas):
+        pred = pred[pred[:, 4] >= conf_threshold]
+        if len(pred) == 0:
+            outputs.append(np.zeros((0, 6), dtype=np.float32))
+            continue
+
+        scores = pred[:, 5:] * pred[:, 4:5]
+        class_ids = scores.argmax(axis=1)
+        conf = scores[np.arange(len(pred)), class_ids]
+        keep = conf >= conf_threshold
+        pred, class_ids, conf = pred[keep], class_ids[keep], conf[keep]
+
+        # letterboxed cx, cy, w, h -> frame x1, y1, x2, y2
+        x1 = (pred[:, 0] - pred[:, 2] / 2 - pad_x) / scale
+        y1 = (pred[:, 1] - pred[:, 3] / 2 - pad_y) / scale
+        x2 = (pred[:, 0] + pred[:, 2] / 2 - pad_x) / scale
+        y2 = (pred[:, 1] + pred[:, 3] / 2 - pad_y) / scale
+        xyxy = np.stack([np.clip(x1, 0, w), np.clip(y1, 0, h), np.clip(x2, 0, w), np.clip(y2, 0, h)], axis=1)
+
+        xywh = np.concatenate([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+        keep = nms_indices(xywh, conf, class_ids, iou_threshold)[:max_det]
+
+        rows = np.empty((len(keep), 6), dtype=np.float32)
+        rows[:, :4] = xyxy[keep] / np.array([w, h, w, h], dtype=np.float32)
+        rows[:, 4] = conf[keep]
+        rows[:, 5] = class_ids[keep]
+        outputs.append(rows)
+    return outputs
+
+
+# "{0: 'person', ...}" / json / list -> names
+def parse_names(value):
+    if value is None or isinstance(value, (list, dict)):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return ast.literal_eval(value)
+
+
+def load_names_file(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class DetectorBackend:
+    name = "base"
+
+    def __init__(self, input_size=640, names=None):
+        self.input_size = input_size
+        self.names = names
+        self.fixed_batch = None  # set when the model only accepts one batch size
+
+    def infer(self, batch):
+        raise NotImplementedError
+
+    # split (and zero-pad) into the batch size the model was exported with
+    def run(self, batch):
+        size = self.fixed_batch
+        if size is None or len(batch) == size:
+            return self.infer(batch)
+        outputs = []
+        for i in range(0, len(batch), size):
+            chunk = batch[i:i + size]
+            count = len(chunk)
+            if count < size:
+                chunk = np.concatenate([chunk, np.zeros((size - count,) + chunk.shape[1:], chunk.dtype)])
+            outputs.append(self.infer(chunk)[:count])
+        return np.concatenate(outputs)
+
+
+# Eager PyTorch on a local YOLOv5 checkpoint (needs the YOLOv5 sources importable,
+# either on the path or given as repo_dir, to unpickle the model)
+class TorchBackend(DetectorBackend):
+    name = "torch"
+
+    def __init__(self, model_path, input_size=640, names=None, repo_dir=None, threads=None):
+        import torch
+        if repo_dir and repo_dir not in sys.path:
+            sys.path.insert(0, repo_dir)
+        if threads:
+            torch.set_num_threads(threads)
+
+        ckpt = torch.load(model_path, map_location="cpu")
+        model = ckpt.get("ema") or ckpt["model"] if isinstance(ckpt, dict) else ckpt
+        model = model.float()
+        if hasattr(model, "fuse"):
+            model = model.fuse()
+        self.model = model.eval()
+        self.torch = torch
+        super().__init__(input_size, names or getattr(model, "names", None))
+
+    def infer(self, batch):
+        with self.torch.inference_mode():
+            out = self.model(self.torch.from_numpy(batch))
+        if isinstance(out, (list, tuple)):
+            out = out[0]
+        return out.numpy()
+
+
+# TorchScript export (yolov5 export.py --include torchscript)
+class TorchScriptBackend(DetectorBackend):
+    name = "torchscript"
+
+    def __init__(self, model_path, input_size=640, names=None, threads=None):
+        import torch
+        if threads:
+            torch.set_num_threads(threads)
+
+        extra_files = {"config.txt": ""}
+        self.model = torch.jit.load(model_path, map_location="cpu", _extra_files=extra_files)
+        self.model.eval()
+        self.torch = torch
+        if extra_files["config.txt"]:
+            config = json.loads(extra_files["config.txt"])
+            names = names or config.get("names")
+            input_size = config.get("shape", [0, 0, input_size])[-1]
+        super().__init__(input_size, parse_names(names))
+
+    def infer(self, batch):
+        with self.torch.inference_mode():
+            out = self.model(self.torch.from_numpy(batch))
+        if isinstance(out, (list, tuple)):
+            out = out[0]
+        return out.numpy()
+
+
+# ONNX Runtime on CPU (yolov5 export.py --include onnx)
+class OnnxRuntimeBackend(DetectorBackend):
+    name = "onnxruntime"
+
+    def __init__(self, model_path, input_size=640, names=None, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        super().__init__(input_size, parse_names(names or meta.get("names")))
+
+        shape = self.session.get_inputs()[0].shape
+        if isinstance(shape[-1], int):
+            self.input_size = shape[-1]
+        if isinstance(shape[0], int):
+            self.fixed_batch = shape[0]
+
+    def infer(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+# OpenCV DNN module on the same ONNX file, no extra runtime needed
+class OpenCVDnnBackend(DetectorBackend):
+    name = "opencv"
+
+    def __init__(self, model_path, input_size=640, names=None, threads=None):
+        if threads:
+            cv2.setNumThreads(threads)
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        super().__init__(input_size, names)
+        # yolov5 ONNX exports use a static batch of 1 unless exported with --dynamic
+        self.fixed_batch = 1
+
+    def infer(self, batch):
+        self.net.setInput(batch)
+        out = self.net.forward()
+        return out.reshape(len(batch), -1, out.shape[-1])
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "torchscript": TorchScriptBackend,
+    "onnxruntime": OnnxRuntimeBackend,
+    "opencv": OpenCVDnnBackend,
+}
+
+
+# pick a backend from the file name when kind is "auto"
+def guess_backend(model_path):
+    name = os.path.basename(model_path).lower()
+    if name.endswith(".onnx"):
+        try:
+            import onnxruntime  # noqa: F401
+            return "onnxruntime"
+        except ImportError:
+            return "opencv"
+    if "torchscript" in name or name.endswith(".ts"):
+        return "torchscript"
+    return "torch"
+
+
+# kind: a BACKENDS name, "auto", or a DetectorBackend subclass (picklable, so
+# it also reaches detection worker processes)
+def load_backend(kind, model_path, input_size=640, names_file=None, **kwargs):
+    if kind == "auto":
+        kind = guess_backend(model_path)
+    names = load_names_file(names_file) if names_file else None
+    if kind != "torch":
+        kwargs.pop("repo_dir", None)
+    backend_class = kind if isinstance(kind, type) else BACKENDS[kind]
+    backend = backend_class(model_path, input_size=input_size, names=names, **kwargs)
+    log.info("%s backend, input %d, model %s", backend.name, backend.input_size, model_path)
+    return backend
@@ -0,0 +1,374 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import resource
+import tracemalloc
+from contextlib import redirect_stdout
+
+# headless: no window, no display server needed
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+from Ui_components import AnnotationOverlay, HudOverlay, UIWidgetManager
+from decoders import DECODERS, open_decoder, pyav_available
+from detections import DETECTION_DTYPE, empty_detections, find_detection
+from frame_pool import FramePool
+from gst_pipeline import parse_size
+from render import FrameRenderer, hud_values
+from telemetry import configure_logging
+from tracker import MultiObjectTracker
+from video_surface import VIDEO_SURFACES, create_video_surface
+
+
+# Offline benchmark of the per-frame pipeline: runs every frame of a video file
+# through the stages the app uses, as fast as possible, on one thread, timing
+# each stage (see STAGES) and writing a JSON result. --decoders and
+# --hud-glyphs instead compare decoders or HUD label paint in isolation.
+
+STAGES = ["decode", "color", "detect", "track", "recenter", "annotate", "zoom", "qimage", "hud", "tags",
+          "present"]
+
+
+class StageTimes:
+    def __init__(self, names):
+        self.samples = {name: [] for name in names}
+
+    def add(self, name, start_ns):
+        self.samples[name].append((time.perf_counter_ns() - start_ns) / 1e6)
+
+    def summary(self):
+        result = {}
+        for name, values in self.samples.items():
+            if not values:
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result[name] = {
+                "count": len(values),
+                "mean_ms": round(float(np.mean(values)), 4),
+                "p50_ms": round(float(p50), 4),
+                "p95_ms": round(float(p95), 4),
+                "p99_ms": round(float(p99), 4),
+                "max_ms": round(float(np.max(values)), 4),
+            }
+        return result
+
+
+# N boxes drifting across the frame, to exercise drawing paths without a model
+class FakeDetector:
+    def __init__(self, count, seed=0):
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        self.positions = None
+        self.velocity = None
+
+    def __call__(self, frame_rgb):
+        h, w = frame_rgb.shape[:2]
+        if self.positions is None:
+            self.positions = self.rng.uniform([0, 0], [w - 60, h - 40], size=(self.count, 2))
+            self.velocity = self.rng.uniform(-3, 3, size=(self.count, 2))
+        self.positions = (self.positions + self.velocity) % [w - 60, h - 40]
+
+        detections = np.zeros(self.count, dtype=DETECTION_DTYPE)
+        detections['id'] = np.arange(1, self.count + 1)
+        detections['confidence'] = 80.0
+        detections['bbox'][:, :2] = self.positions.astype(np.int32)
+        detections['bbox'][:, 2:] = (60, 40)
+        detections['type'] = "drone"
+        return detections
+
+
+def make_detector(args):
+    if args.fake_detections:
+        return FakeDetector(args.fake_detections)
+    if args.model:
+        from detector import DetectionEngine
+        engine = DetectionEngine.from_file(
+            args.model, backend=args.backend, input_size=args.input_size,
+            quantize=args.quantize, backend_options={"threads": args.threads})
+        return lambda frame: engine.infer_frames([frame])[0]
+    return lambda frame: empty_detections()
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_benchmark(args):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    hud_w, hud_h = args.hud_size
+
+    parent = QWidget()
+    parent.resize(hud_w, hud_h)
+    ui_manager = UIWidgetManager(parent)
+    renderer = FrameRenderer(ui_manager)
+    renderer.zoom_size = (int(hud_w * 0.12), int(hud_w * 0.12 * 3 / 4))
+    hud = HudOverlay(parent)
+    hud.resize(hud_w, hud_h)
+    hud_image = QImage(hud_w, hud_h, QImage.Format_ARGB32_Premultiplied)
+
+    surface = create_video_surface(args.video_surface)
+    surface.resize(hud_w, hud_h)
+    surface.show()
+    tags = AnnotationOverlay(parent)
+    tags.resize(hud_w, hud_h)
+    if surface.composites_overlays:
+        # HUD and tag paint are then part of the present stage
+        surface.add_overlay(hud.paint_hud)
+        surface.add_overlay(tags.paint_annotations)
+
+    detect = make_detector(args)
+    tracker = MultiObjectTracker()
+    times = StageTimes(STAGES)
+
+    cap = open_decoder(args.video, args.decoder, threads=args.decode_threads, read_ahead=args.read_ahead)
+
+    # decode into a pool like the capture stage; the frame on screen keeps its render buffers
+    frame_pool = FramePool(2)
+    read_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+    shown_buffers = []
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    frames = 0
+    frame_shape = None
+    render_bytes = []
+    wall_start = time.perf_counter()
+    while args.frames <= 0 or frames < args.frames:
+        buffer = frame_pool.acquire(read_shape)
+        t = time.perf_counter_ns()
+        ret, frame_bgr = cap.read(image=buffer.array)
+        if not ret:
+            buffer.release()
+            break
+        times.add("decode", t)
+        read_shape = frame_bgr.shape
+        frame_shape = frame_bgr.shape
+
+        t = time.perf_counter_ns()
+        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+        times.add("color", t)
+
+        t = time.perf_counter_ns()
+        detections = detect(frame_rgb)
+        times.add("detect", t)
+
+        t = time.perf_counter_ns()
+        detections = tracker.update(detections)
+        times.add("track", t)
+
+        renderer.start_frame()
+        target = find_detection(detections, renderer.selected_target_id)
+        if target is None and len(detections) > 0:
+            target = detections[0]
+            renderer.selected_target_id = int(target['id'])
+
+        t = time.perf_counter_ns()
+        display, offset = renderer.recenter(frame_bgr, target)
+        times.add("recenter", t)
+
+        t = time.perf_counter_ns()
+        if len(detections) == 0:
+            ui_manager.draw_no_detection_message(display)
+        renderer.draw_boxes(display, detections, renderer.selected_target_id, offset)
+        times.add("annotate", t)
+
+        if target is not None:
+            t = time.perf_counter_ns()
+            renderer.zoom_view(frame_bgr, detections, target, renderer.selected_target_id)
+            times.add("zoom", t)
+
+        t = time.perf_counter_ns()
+        display_buffer, display_image = renderer.to_qimage(display)
+        times.add("qimage", t)
+        render_bytes.append(renderer.bytes_allocated)
+
+        t = time.perf_counter_ns()
+        if target is not None:
+            bbox = target['bbox'].tolist()
+            _, pitch, bearing = hud_values(bbox, frame_shape[1], frame_shape[0])
+            focus = hud.zoom_focus_from_bbox(bbox[2], bbox[3], frame_shape[1], frame_shape[0])
+            hud.update_state(heading=bearing, pitch=pitch, zoom=focus, focus=focus)
+        if not surface.composites_overlays:
+            hud_image.fill(Qt.transparent)
+            hud.render(hud_image)
+        times.add("hud", t)
+
+        t = time.perf_counter_ns()
+        tags.set_detections(detections, offset, (frame_shape[1], frame_shape[0]))
+        if not surface.composites_overlays:
+            tag_painter = QPainter(hud_image)
+            tags.paint_annotations(tag_painter)
+            tag_painter.end()
+        times.add("tags", t)
+
+        t = time.perf_counter_ns()
+        surface.set_frame(display_image, display_buffer)
+        surface.repaint()
+        times.add("present", t)
+        buffer.release()
+        for shown in shown_buffers:
+            shown.release()
+        shown_buffers = renderer.frame_buffers
+
+        frames += 1
+        app.processEvents()
+    wall = time.perf_counter() - wall_start
+    cap.release()
+
+    result = {
+        "video": args.video,
+        "decoder": cap.name,
+        "frames": frames,
+        "resolution": [frame_shape[1], frame_shape[0]] if frame_shape else None,
+        "hud_size": [hud_w, hud_h],
+        "video_surface": args.video_surface,
+        "detector": ("fake:%d" % args.fake_detections) if args.fake_detections else (args.model or "none"),
+        "wall_s": round(wall, 4),
+        "fps": round(frames / wall, 2) if wall > 0 else None,
+        "stages": times.summary(),
+        # new arrays taken by the render stage; after warm-up only the zoom crop
+        "render_bytes_per_frame": round(float(np.mean(render_bytes[1:])), 1) if len(render_bytes) > 1 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    if args.tracemalloc:
+        result["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        tracemalloc.stop()
+    return result
+
+
+# decode only, into a frame pool, for every available decoder with and without read-ahead
+def run_decode_benchmark(args):
+    kinds = [kind for kind in DECODERS if kind != "auto" and (kind != "pyav" or pyav_available())]
+    result = {"video": args.video, "frames": None, "decode_fps": {}, "stages": {}}
+    for kind in kinds:
+        for read_ahead in (0, args.read_ahead or 8):
+            cap = open_decoder(args.video, kind, threads=args.decode_threads, read_ahead=read_ahead)
+            # by requested kind: opencv-hw reports itself as opencv without a hardware decoder
+            name = f"{kind}+readahead{read_ahead}" if read_ahead else kind
+            pool = FramePool(2)
+            shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+            times = StageTimes([name])
+            frames = 0
+            start = time.perf_counter()
+            while args.frames <= 0 or frames < args.frames:
+                buffer = pool.acquire(shape)
+                t = time.perf_counter_ns()
+                ret, _ = cap.read(image=buffer.array)
+                buffer.release()
+                if not ret:
+                    break
+                times.add(name, t)
+                frames += 1
+            wall = time.perf_counter() - start
+            cap.release()
+            result["frames"] = frames
+            result["decode_fps"][name] = round(frames / wall, 2) if wall > 0 else None
+            result["stages"].update(times.summary())
+    return result
+
+
+# HUD paint time with per-frame labels laid out by QPainter vs blitted from the glyph atlas
+def run_glyph_benchmark(args, warmup=5):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    hud_w, hud_h = args.hud_size
+    hud_image = QImage(hud_w, hud_h, QImage.Format_ARGB32_Premultiplied)
+    frames = args.frames if args.frames > 0 else 300
+
+    result = {"hud_size": [hud_w, hud_h], "frames": frames, "stages": {}}
+    for mode, use_atlas in (("text", False), ("atlas", True)):
+        hud = HudOverlay()
+        hud.resize(hud_w, hud_h)
+        hud.use_glyph_atlas = use_atlas
+        times = StageTimes([mode])
+        for i in range(warmup + frames):
+            hud.update_state(heading=i * 3.7, pitch=90 * math.sin(i / 20))
+            hud_image.fill(Qt.transparent)
+            t = time.perf_counter_ns()
+            hud.render(hud_image)
+            if i >= warmup:
+                times.add(mode, t)
+        result["stages"].update(times.summary())
+
+    stages = result["stages"]
+    result["speedup_p50"] = round(stages["text"]["p50_ms"] / stages["atlas"]["p50_ms"], 3)
+    return result
+
+
+def print_summary(result, stream=sys.stderr):
+    if "decode_fps" in result:
+        fps = ", ".join(f"{name} {value}" for name, value in result["decode_fps"].items())
+        print(f"decode {result['frames']} frames, FPS: {fps}", file=stream)
+    elif "speedup_p50" in result:
+        print(f"HUD paint {result['hud_size']}, {result['frames']} frames: "
+              f"glyph atlas speedup (p50) {result['speedup_p50']}x", file=stream)
+    else:
+        print(f"{result['frames']} frames {result['resolution']} in {result['wall_s']} s "
+              f"-> {result['fps']} FPS, peak RSS {result['peak_rss_mb']} MB, "
+              f"render allocs {result['render_bytes_per_frame']} B/frame", file=stream)
+    width = max([10] + [len(name) + 2 for name in result["stages"]])
+    print(f"{'stage':{width}}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)", file=stream)
+    for name, stats in result["stages"].items():
+        print(f"{name:{width}}{stats['mean_ms']:9.3f}{stats['p50_ms']:9.3f}"
+              f"{stats['p95_ms']:9.3f}{stats['p99_ms']:9.3f}", file=stream)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless per-frame pipeline benchmark")
+    parser.add_argument("--video", default="video/drone-flying.mp4")
+    parser.add_argument("--frames", type=int, default=0, help="stop after N frames (0 = whole video)")
+    parser.add_argument("--decoder", choices=DECODERS, default="auto")
+    parser.add_argument("--decode-threads", type=int, default=0, help="FFmpeg decode threads (0 = one per core)")
+    parser.add_argument("--read-ahead", type=int, default=0, help="frames decoded ahead on a separate thread")
+    parser.add_argument("--decoders", action="store_true",
+                        help="only compare decode FPS of each decoder, with and without read-ahead")
+    parser.add_argument("--hud-size", type=parse_size, default=(1920, 1080), help="display size, e.g. 3840x2160")
+    parser.add_argument("--video-surface", choices=VIDEO_SURFACES, default="label",
+                        help="surface the frame is shown on (painter/opengl also draw the HUD)")
+    parser.add_argument("--model", default=None, help="detector model; without it detection is a no-op")
+    parser.add_argument("--backend", default="auto")
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--quantize", default="none")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--fake-detections", type=int, default=0, help="synthetic moving boxes instead of a model")
+    parser.add_argument("--hud-glyphs", action="store_true",
+                        help="only compare HUD paint time with and without the glyph atlas")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report Python heap peak (slower)")
+    parser.add_argument("--output", default=None, help="JSON result file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging()
+
+    # keep stdout clean for the JSON result
+    with redirect_stdout(sys.stderr):
+        if args.decoders:
+            result = run_decode_benchmark(args)
+        elif args.hud_glyphs:
+            result = run_glyph_benchmark(args)
+        else:
+            result = run_benchmark(args)
+    print_summary(result)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,379 @@
+import logging
+import queue
+import threading
+import cv2
+import numpy as np
+
+log = logging.getLogger("decode")
+
+
+# Decoders for file sources. Every decoder implements the part of the
+# cv2.VideoCapture interface the capture stage uses (grab/retrieve/read, get
+# and set of the size, rate and position properties, release), so the
+# pipeline takes any of them in place of a VideoCapture:
+#   opencv     cv2.VideoCapture with FFmpeg frame threads (the default path)
+#   opencv-hw  the same with CAP_PROP_HW_ACCELERATION, software if none is found
+#   pyav       FFmpeg through PyAV with frame and slice threading; scales and
+#              converts to BGR in one swscale pass
+# output_size scales displayed frames in the decoder; inference_size adds a
+# low-res copy of each frame, read in step through inference_capture() (also
+# used by gst_pipeline.GstCapture). ReadAheadDecoder decodes into a bounded queue
+# on its own thread.
+DECODERS = ("auto", "opencv", "opencv-hw", "pyav")
+
+
+class VideoDecoder:
+    name = "base"
+    retrieves_into = False  # retrieve(image) decodes into image rather than copying
+
+    def __init__(self, source_size, fps, frame_count, output_size=None, inference_size=None):
+        self.source_size = source_size
+        self.output_size = output_size or source_size
+        self.inference_size = inference_size
+        self.fps = fps
+        self.frame_count = frame_count
+
+    def isOpened(self):
+        return True
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    # position so that the next grab() returns frame, using a FrameIndex -> frames decoded
+    def seek_frame(self, index, frame):
+        return index.seek(self, frame)
+
+    def inference_capture(self):
+        return InferenceCapture(self) if self.inference_size is not None else None
+
+    # into image when given and of the output size, like VideoCapture.retrieve
+    def _output(self, frame, image):
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return image
+        return frame
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.output_size[0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.output_size[1])
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        return 0.0
+
+    def release(self):
+        pass
+
+
+# the inference copy of the frame the decoder last grabbed, as a second capture
+class InferenceCapture:
+    def __init__(self, decoder):
+        self.decoder = decoder
+
+    def isOpened(self):
+        return True
+
+    def grab(self):
+        return True
+
+    def retrieve(self, image=None):
+        frame = self.decoder.retrieve_inference()
+        return frame is not None, frame
+
+    def read(self, image=None):
+        return self.retrieve(image)
+
+    def release(self):
+        pass
+
+
+class OpenCVDecoder(VideoDecoder):
+    name = "opencv"
+    retrieves_into = True
+
+    def __init__(self, path, threads=0, hw_acceleration=False, output_size=None, inference_size=None):
+        params = []
+        if threads > 0:
+            params += [cv2.CAP_PROP_N_THREADS, threads]
+        if hw_acceleration:
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        self.cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG, params)
+        if not self.cap.isOpened():
+            raise IOError(f"cannot open video {path}")
+        if hw_acceleration:
+            accel = int(self.cap.get(cv2.CAP_PROP_HW_ACCELERATION))
+            if accel == cv2.VIDEO_ACCELERATION_NONE:
+                log.warning("No hardware decoder for %s, decoding in software", path)
+            else:
+                self.name = "opencv-hw"
+                log.info("Hardware decode (acceleration type %d) for %s", accel, path)
+        source_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        super().__init__(source_size, self.cap.get(cv2.CAP_PROP_FPS), int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                         output_size, inference_size)
+        self._scaled = self.output_size != self.source_size
+        self._full = None  # full-size frame of the last retrieve when scaling
+        self._frame = None  # last retrieved frame, source of the inference copy
+
+    def grab(self):
+        self._frame = None
+        return self.cap.grab()
+
+    def retrieve(self, image=None):
+        if not self._scaled:
+            ret, frame = self.cap.retrieve(image=image)
+            self._frame = frame if ret else None
+            return ret, frame
+        ret, self._full = self.cap.retrieve(image=self._full)
+        if not ret:
+            return False, None
+        if image is None or image.shape[:2] != self.output_size[::-1]:
+            image = None
+        frame = cv2.resize(self._full, self.output_size, dst=image, interpolation=cv2.INTER_AREA)
+        self._frame = self._full
+        return True, frame
+
+    def retrieve_inference(self):
+        if self._frame is None:
+            ret, frame = self.retrieve()
+            if not ret:
+                return None
+        return cv2.resize(self._frame, self.inference_size, interpolation=cv2.INTER_AREA)
+
+    def get(self, prop):
+        if prop in (cv2.CAP_PROP_POS_MSEC, cv2.CAP_PROP_POS_FRAMES, cv2.CAP_PROP_HW_ACCELERATION):
+            return self.cap.get(prop)
+        return super().get(prop)
+
+    def set(self, prop, value):
+        self._frame = None
+        return self.cap.set(prop, value)
+
+    def release(self):
+        self.cap.release()
+
+
+class PyAvDecoder(VideoDecoder):
+    name = "pyav"
+
+    def __init__(self, path, threads=0, output_size=None, inference_size=None):
+        import av
+        self._av = av
+        self.container = av.open(path)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"  # frame and slice threads
+        self.stream.thread_count = threads  # 0 = one per core
+        context = self.stream.codec_context
+        fps = float(self.stream.average_rate) if self.stream.average_rate else 0.0
+        super().__init__((context.width, context.height), fps, self.stream.frames, output_size, inference_size)
+        self._start = (self.stream.start_time or 0) * float(self.stream.time_base)  # seconds
+        self._frames = self.container.decode(self.stream)
+        self._frame = None
+        self._pending = None  # frame found by a seek, returned by the next grab
+        self._position = 0  # index of the next frame
+
+    def grab(self):
+        if self._pending is not None:
+            self._frame, self._pending = self._pending, None
+        else:
+            try:
+                self._frame = next(self._frames)
+            except (StopIteration, self._av.EOFError):
+                self._frame = None
+                return False
+        self._position += 1
+        return True
+
+    def retrieve(self, image=None):
+        if self._frame is None:
+            return False, None
+        w, h = self.output_size
+        frame = self._frame.to_ndarray(width=w, height=h, format="bgr24")
+        return True, self._output(frame, image)
+
+    # scaled from the decoded YUV frame, not from the BGR output
+    def retrieve_inference(self):
+        if self._frame is None:
+            return None
+        w, h = self.inference_size
+        return self._frame.to_ndarray(width=w, height=h, format="bgr24", interpolation="AREA")
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self._time(self._frame) * 1000 if self._frame is not None else 0.0
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._position)
+        return super().get(prop)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            seconds = value / self.fps if self.fps else 0.0
+        elif prop == cv2.CAP_PROP_POS_MSEC:
+            seconds = value / 1000
+        else:
+            return False
+        self.seek(seconds)
+        return True
+
+    # presentation time relative to the start of the stream, like VideoCapture's POS_MSEC
+    def _time(self, frame):
+        return frame.time - self._start if frame.time is not None else 0.0
+
+    # to the first frame at or after seconds: seek to the keyframe before, decode forward
+    def seek(self, seconds):
+        start = self.stream.start_time or 0
+        self.container.seek(start + int(seconds / self.stream.time_base), stream=self.stream, backward=True)
+        self._frames = self.container.decode(self.stream)
+        self._pending = None
+        half_frame = 0.5 / self.fps if self.fps else 0.0
+        while self.grab() and self._time(self._frame) < seconds - half_frame:
+            pass
+        self._pending, self._frame = self._frame, None
+        self._position = int(round(seconds * self.fps))
+
+    def release(self):
+        self.container.close()
+
+
+# Decodes `size` frames ahead of the consumer on a background thread. Frames
+# (and their inference copies) are decoded into a ring of arrays owned by the
+# reader and copied out on retrieve. Seeking flushes the queue; decoding stops
+# at the end of the file until the next seek.
+class ReadAheadDecoder(VideoDecoder):
+    def __init__(self, decoder, size=8):
+        super().__init__(decoder.source_size, decoder.fps, decoder.frame_count, decoder.output_size,
+                         decoder.inference_size)
+        self.decoder = decoder
+        self.name = f"{decoder.name}+readahead{size}"
+        self._queue = queue.Queue(maxsize=size)
+        # queued frames, the one the reader decodes and the one the consumer holds
+        self._ring = [None] * (size + 2)
+        self._ring_next = 0
+        self._lock = threading.Condition()  # guards the decoder and the generation
+        self._generation = 0
+        self._at_end = False
+        self._current = None  # (frame, inference frame) of the last grab
+        self._position = (0.0, 0.0)  # CAP_PROP_POS_MSEC, CAP_PROP_POS_FRAMES
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="decode-read-ahead", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._lock:
+                while self._at_end and not self._stop_event.is_set():
+                    self._lock.wait(0.1)
+                generation = self._generation
+                if not self.decoder.grab():
+                    self._at_end = True
+                    entry = None
+                else:
+                    slot = self._ring_next
+                    self._ring_next = (slot + 1) % len(self._ring)
+                    ret, frame = self.decoder.retrieve(self._ring[slot] if self.decoder.retrieves_into else None)
+                    self._ring[slot] = frame
+                    small = self.decoder.retrieve_inference() if self.inference_size is not None else None
+                    entry = (frame, small, self.decoder.get(cv2.CAP_PROP_POS_MSEC),
+                             self.decoder.get(cv2.CAP_PROP_POS_FRAMES)) if ret else None
+                    self._at_end = not ret
+            item = (generation, entry)
+            while not self._stop_event.is_set() and generation == self._generation:
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def grab(self):
+        while not self._stop_event.is_set():
+            try:
+                generation, entry = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if generation != self._generation:
+                continue
+            if entry is None:
+                self._current = None
+                return False
+            self._current = entry[:2]
+            self._position = entry[2:]
+            return True
+        return False
+
+    def retrieve(self, image=None):
+        if self._current is None:
+            return False, None
+        frame = self._current[0]
+        if image is None or image.shape != frame.shape:
+            # the ring slot is decoded into again once the reader wraps around
+            return True, frame.copy()
+        return True, self._output(frame, image)
+
+    def retrieve_inference(self):
+        if self._current is None or self._current[1] is None:
+            return None
+        return self._current[1].copy()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self._position[0]
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self._position[1]
+        return super().get(prop)
+
+    def set(self, prop, value):
+        return self._reposition(lambda: self.decoder.set(prop, value))
+
+    # the frames skipped on the way to the target are only decoded, not converted
+    def seek_frame(self, index, frame):
+        return self._reposition(lambda: index.seek(self.decoder, frame))
+
+    # run seek on the wrapped decoder and drop what was read ahead
+    def _reposition(self, seek):
+        with self._lock:
+            self._generation += 1
+            result = seek()
+            self._at_end = False
+            self._current = None
+            self._position = (self.decoder.get(cv2.CAP_PROP_POS_MSEC), self.decoder.get(cv2.CAP_PROP_POS_FRAMES))
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._lock.notify_all()
+        return result
+
+    def release(self):
+        self._stop_event.set()
+        self._thread.join()
+        self.decoder.release()
+
+
+def pyav_available():
+    try:
+        import av  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# kind "auto": PyAV when installed, else OpenCV. Full-size decode is as fast
+# with either, but PyAV scales in the decoder and its seeks land on the
+# keyframe, where OpenCV seeks 16 frames early and often decodes the previous
+# GOP as well. read_ahead = queued frames (0 = off)
+def open_decoder(path, kind="auto", threads=0, output_size=None, inference_size=None, read_ahead=0):
+    if kind == "auto":
+        kind = "pyav" if pyav_available() else "opencv"
+    if kind == "pyav":
+        decoder = PyAvDecoder(path, threads, output_size, inference_size)
+    else:
+        decoder = OpenCVDecoder(path, threads, kind == "opencv-hw", output_size, inference_size)
+    if read_ahead > 0:
+        decoder = ReadAheadDecoder(decoder, read_ahead)
+    log.info("%s decoder, %dx%d -> %dx%d, %s", decoder.name, *decoder.source_size, *decoder.output_size, path)
+    return decoder
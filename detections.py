@@ -0,0 +1,160 @@
+import numpy as np
+
+
+# One row per detection for a whole frame
+DETECTION_DTYPE = np.dtype([
+    ('id', np.int32),
+    ('confidence', np.float32),    # percent
+    ('bbox', np.int32, (4,)),      # x, y, w, h in frame pixels
+    ('class_id', np.int16),
+    ('type', 'U16'),
+])
+
+# class renames applied once to the model's name table
+CLASS_REMAP = {
+    "airplane": "drone",
+}
+
+
+def empty_detections():
+    return np.empty(0, dtype=DETECTION_DTYPE)
+
+
+# model names (list or {index: name}) -> lookup array indexed by class id
+def class_name_table(names):
+    if names is None:
+        return np.array(["object"])
+    if isinstance(names, dict):
+        count = max(names) + 1 if names else 0
+        names = [names.get(i, "object") for i in range(count)]
+    table = [CLASS_REMAP.get(str(name).lower(), str(name)) for name in names]
+    return np.array(table or ["object"])
+
+
+# normalized detector rows [x1, y1, x2, y2, conf, class] -> DETECTION_DTYPE array.
+# pred may be a torch tensor (thresholded on its device before the host copy) or an ndarray.
+def decode_detections(pred, frame_shape, type_names, conf_threshold=0.3):
+    if hasattr(pred, 'cpu'):
+        keep = pred[:, 4] >= conf_threshold
+        ids = keep.nonzero().flatten().cpu().numpy() + 1
+        rows = pred[keep].cpu().numpy()
+    else:
+        keep = pred[:, 4] >= conf_threshold
+        ids = np.flatnonzero(keep) + 1
+        rows = pred[keep]
+
+    h, w = frame_shape[:2]
+    out = np.empty(len(rows), dtype=DETECTION_DTYPE)
+    if len(rows) == 0:
+        return out
+
+    xyxy = (rows[:, :4] * np.array([w, h, w, h], dtype=rows.dtype)).astype(np.int32)
+    class_ids = np.clip(rows[:, 5].astype(np.int64), 0, len(type_names) - 1)
+
+    out['id'] = ids
+    out['confidence'] = rows[:, 4] * 100
+    out['bbox'][:, :2] = xyxy[:, :2]
+    out['bbox'][:, 2:] = xyxy[:, 2:] - xyxy[:, :2]
+    out['class_id'] = class_ids
+    out['type'] = type_names[class_ids]
+    return out
+
+
+# detections found in a crop -> frame coordinates
+def offset_detections(detections, dx, dy):
+    if len(detections) and (dx or dy):
+        detections['bbox'][:, 0] += dx
+        detections['bbox'][:, 1] += dy
+    return detections
+
+
+# detections made on a resized frame -> bboxes in the original frame's pixels
+def scale_detections(detections, sx, sy):
+    if len(detections) and (sx != 1 or sy != 1):
+        bbox = detections['bbox']
+        bbox[:] = np.round(bbox * (sx, sy, sx, sy))
+    return detections
+
+
+# crop window of pad x the bbox size centred on the bbox, clipped to the frame
+# (same window the zoom view uses) -> x1, y1, x2, y2
+def padded_crop(bbox, pad, frame_shape, min_size=0):
+    x, y, w, h = [int(v) for v in bbox]
+    cx, cy = x + w // 2, y + h // 2
+    zw, zh = max(int(w * pad), min_size), max(int(h * pad), min_size)
+    x1, y1 = max(cx - zw // 2, 0), max(cy - zh // 2, 0)
+    x2, y2 = min(x1 + zw, frame_shape[1]), min(y1 + zh, frame_shape[0])
+    return x1, y1, x2, y2
+
+
+# IoU between every box in a and every box in b (x, y, w, h rows) -> (len(a), len(b))
+def iou_matrix(a, b):
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+
+    inter_w = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    inter_h = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = inter_w * inter_h
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+# greedy per-class non-maximum suppression on x, y, w, h boxes.
+# Returns indices of kept boxes, highest score first.
+def nms_indices(boxes, scores, class_ids, iou_threshold=0.45):
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    if len(order) < 2:
+        return order
+    boxes = np.asarray(boxes)[order]
+    class_ids = np.asarray(class_ids)[order]
+
+    iou = iou_matrix(boxes, boxes)
+    overlaps = (iou > iou_threshold) & (class_ids[:, None] == class_ids[None, :])
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    for i in range(len(order)):
+        if not suppressed[i]:
+            suppressed[i + 1:] |= overlaps[i, i + 1:]
+    return order[~suppressed]
+
+
+# NMS over a whole detection array, e.g. to merge overlapping tiles
+def nms(detections, iou_threshold=0.45):
+    if len(detections) < 2:
+        return detections
+    keep = nms_indices(detections['bbox'], detections['confidence'], detections['class_id'], iou_threshold)
+    return detections[keep]
+
+
+# row with the given id, or None
+def find_detection(detections, detection_id):
+    if detection_id is None or len(detections) == 0:
+        return None
+    index = np.flatnonzero(detections['id'] == detection_id)
+    if len(index) == 0:
+        return None
+    return detections[index[0]]
+
+
+def has_detection(detections, detection_id):
+    return find_detection(detections, detection_id) is not None
+
+
+# first detection whose bbox contains the point, or None
+def detection_at(detections, x, y):
+    if len(detections) == 0:
+        return None
+    bbox = detections['bbox']
+    inside = ((bbox[:, 0] <= x) & (x <= bbox[:, 0] + bbox[:, 2]) &
+              (bbox[:, 1] <= y) & (y <= bbox[:, 1] + bbox[:, 3]))
+    index = np.flatnonzero(inside)
+    if len(index) == 0:
+        return None
+    return detections[index[0]]
@@ -0,0 +1,189 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from backends import load_backend, postprocess, preprocess
+from detections import class_name_table, decode_detections
+from quantization import quantize_model
+
+log = logging.getLogger("detector")
+
+
+# One frame (or a group of frames, e.g. tiles) waiting for a batch slot
+class DetectionRequest:
+    def __init__(self, frames, callback=None, single=True):
+        self.frames = frames
+        self.callback = callback
+        self.single = single
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+# Asynchronous YOLOv5 engine: frames are micro-batched up to max_batch_size
+# or until the oldest waiting frame has been queued for max_latency seconds.
+# The model itself is a detector backend (see backends.py).
+class DetectionEngine:
+    def __init__(self, backend, max_batch_size=4, max_latency=0.02,
+                 conf_threshold=0.3, iou_threshold=0.45, max_queue=None):
+        self.backend = backend
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_latency = max_latency
+        self.input_size = backend.input_size
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.names = backend.names
+        self.type_names = class_name_table(self.names)
+
+        # bounded so callers feel backpressure instead of piling up frames
+        self._requests = queue.Queue(maxsize=max_queue or self.max_batch_size * 2)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # batch statistics
+        self.batches = 0
+        self.frames = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+
+    # local model file, no hub download; backend "auto" picks from the file name.
+    # quantize != "none" runs a quantized copy of an ONNX model on ONNX Runtime.
+    @classmethod
+    def from_file(cls, model_path, backend="auto", input_size=640, names_file=None,
+                  backend_options=None, quantize="none", calibration_video=None, **kwargs):
+        if quantize != "none":
+            model_path = quantize_model(model_path, quantize, calibration_video, input_size=input_size)
+            backend = "onnxruntime"
+        backend = load_backend(backend, model_path, input_size, names_file, **(backend_options or {}))
+        return cls(backend, **kwargs)
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="detection-engine", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        # fail whatever is still waiting
+        self.discard_queued()
+
+    # cancel the requests not yet taken into a batch -> how many
+    def discard_queued(self):
+        discarded = 0
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                return discarded
+            request.future.cancel()
+            discarded += 1
+
+    # queue a frame (RGB), returns a Future resolving to its detections.
+    # callback(detections) runs on the engine thread once the batch is done.
+    def submit(self, frame, callback=None):
+        return self._enqueue(DetectionRequest([frame], callback))
+
+    # queue several frames that go through the model in the same forward pass.
+    # The Future resolves to a list with one detection array per frame.
+    def submit_many(self, frames, callback=None):
+        return self._enqueue(DetectionRequest(list(frames), callback, single=False))
+
+    def _enqueue(self, request):
+        while not self._stop_event.is_set():
+            try:
+                self._requests.put(request, timeout=0.1)
+                return request.future
+            except queue.Full:
+                continue
+        request.future.cancel()
+        return request.future
+
+    # blocking convenience wrapper
+    def detect(self, frame):
+        return self.submit(frame).result()
+
+    @property
+    def mean_batch_size(self):
+        return self.frames / self.batches if self.batches else 0.0
+
+    def _collect_batch(self, first):
+        batch = [first]
+        frames = len(first.frames)
+        deadline = first.submitted_at + self.max_latency
+        while frames < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            frames += len(request.frames)
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                first = self._requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._process(self._collect_batch(first))
+
+    def _process(self, batch):
+        batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        frames = [frame for request in batch for frame in request.frames]
+        start = time.perf_counter()
+        try:
+            decoded = self.infer_frames(frames)
+        except Exception as e:
+            log.exception("Detection batch of %d frames failed", len(frames))
+            self._fail_batch(batch, e)
+            return
+        self._finish_batch(batch, decoded, (time.perf_counter() - start) * 1000)
+
+    def _fail_batch(self, batch, error):
+        for request in batch:
+            request.future.set_exception(error)
+
+    # decoded: one detection array per frame of the batch, in request order
+    def _finish_batch(self, batch, decoded, batch_ms):
+        self.batches += 1
+        self.frames += len(decoded)
+        self.last_batch_size = len(decoded)
+        self.last_batch_ms = batch_ms
+
+        outputs = []
+        for request in batch:
+            count = len(request.frames)
+            outputs.append(decoded[0] if request.single else decoded[:count])
+            decoded = decoded[count:]
+
+        for request, detections in zip(batch, outputs):
+            request.future.set_result(detections)
+            if request.callback is not None:
+                try:
+                    request.callback(detections)
+                except Exception:
+                    log.exception("Detection callback failed")
+
+    # synchronous inference in the calling thread (used by the engine thread and offline tools)
+    def infer_frames(self, frames):
+        # every frame is letterboxed to the same fixed input size and run as one batch
+        batch, metas = preprocess(frames, self.input_size)
+        raw = self.backend.run(batch)
+        rows = postprocess(raw, metas, self.conf_threshold, self.iou_threshold)
+        return [self.decode(r, frame.shape) for r, frame in zip(rows, frames)]
+
+    # normalized xyxy + conf + class rows -> DETECTION_DTYPE array
+    def decode(self, pred, frame_shape):
+        return decode_detections(pred, frame_shape, self.type_names, self.conf_threshold)
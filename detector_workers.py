@@ -0,0 +1,303 @@
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+import traceback
+from collections import deque
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+from backends import DetectorBackend
+from detector import DetectionEngine
+from frame_pool import ALIGNMENT
+from quantization import quantize_model
+
+log = logging.getLogger("detector")
+
+# Detection in worker processes, so model glue code does not hold the GIL of
+# the GUI process. Each worker owns a shared memory ring: the parent copies a
+# batch of frames into it and sends only (offset, shape) records; the worker
+# runs pre-processing, the model and decoding, and sends back the (small)
+# detection arrays. A worker handles its batches in order, so ring space is
+# freed in the order it was taken. A worker that dies fails the batches it
+# held and gets no more work; the others carry on.
+
+
+def _aligned(nbytes):
+    return -(-nbytes // ALIGNMENT) * ALIGNMENT
+
+
+# parent side view of one worker's shared memory ring
+class _FrameRing:
+    def __init__(self, size):
+        self.shm = SharedMemory(create=True, size=size)
+        self.size = size
+        self.head = 0
+        self.inflight = deque()  # (start, end) of batches the worker still reads
+
+    # -> start offset of nbytes of contiguous free space, or None
+    def reserve(self, nbytes):
+        if not self.inflight:
+            start = 0 if nbytes <= self.size else None
+        else:
+            tail = self.inflight[0][0]
+            if self.head > tail:
+                if self.head + nbytes <= self.size:
+                    start = self.head
+                elif nbytes <= tail:
+                    start = 0
+                else:
+                    start = None
+            else:
+                start = self.head if self.head + nbytes <= tail else None
+        if start is not None:
+            self.inflight.append((start, start + nbytes))
+            self.head = start + nbytes
+        return start
+
+    def free_oldest(self):
+        self.inflight.popleft()
+
+    def reset(self):
+        self.inflight.clear()
+        self.head = 0
+
+    def write(self, offset, frame):
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+        np.copyto(view, frame)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _worker_main(index, ring_name, engine_args, tasks, results):
+    # Ctrl+C is handled by the GUI process, which stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        engine = DetectionEngine.from_file(**engine_args)
+    except Exception:
+        results.put(("error", index, traceback.format_exc()))
+        return
+
+    # spawned children share the parent's resource tracker, which unlinks the ring
+    ring = SharedMemory(name=ring_name)
+    results.put(("ready", index, engine.input_size, engine.names))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, layout = task
+        frames = [np.ndarray(shape, dtype=np.uint8, buffer=ring.buf, offset=offset) for offset, shape in layout]
+        start = time.perf_counter()
+        try:
+            decoded = engine.infer_frames(frames)
+            results.put(("done", index, job_id, decoded, (time.perf_counter() - start) * 1000))
+        except Exception:
+            results.put(("failed", index, job_id, traceback.format_exc(), 0.0))
+        del frames
+    ring.close()
+
+
+# DetectionEngine with the same submit()/detect() interface whose batches run
+# in `workers` processes. threads is the intra-op thread count of each worker's
+# backend (torch.set_num_threads for torch models); by default the cores are
+# split between the workers.
+class ProcessDetectionEngine(DetectionEngine):
+    def __init__(self, engine_args, workers=2, threads=None, ring_bytes=64 * 2 ** 20,
+                 start_timeout=120.0, **kwargs):
+        workers = max(1, int(workers))
+        if threads is None:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+        engine_args = dict(engine_args)
+        engine_args["backend_options"] = dict(engine_args.get("backend_options") or {}, threads=threads)
+
+        context = mp.get_context("spawn")  # no fork of a process running Qt threads
+        self._results = context.Queue()
+        self._rings = []
+        self._tasks = []
+        self._processes = []
+        for index in range(workers):
+            ring = _FrameRing(ring_bytes)
+            tasks = context.Queue()
+            process = context.Process(target=_worker_main, name=f"detection-worker-{index}", daemon=True,
+                                      args=(index, ring.shm.name, engine_args, tasks, self._results))
+            process.start()
+            self._rings.append(ring)
+            self._tasks.append(tasks)
+            self._processes.append(process)
+
+        try:
+            input_size, names = self._wait_ready(start_timeout)
+        except Exception:
+            self._shutdown_workers()
+            for ring in self._rings:
+                ring.close()
+            raise
+
+        # describes the model loaded by the workers; inference never runs here
+        super().__init__(DetectorBackend(input_size, names), **kwargs)
+        self.workers = workers
+        self.threads = threads
+        self._space = threading.Condition()
+        self._jobs = {}  # job_id -> (worker index, batch)
+        self._next_job = 0
+        self._dead = set()  # indexes of workers that exited
+        self._collector = None
+
+    @classmethod
+    def from_file(cls, model_path, backend="auto", input_size=640, names_file=None,
+                  backend_options=None, quantize="none", calibration_video=None, **kwargs):
+        # quantize once here instead of in every worker
+        if quantize != "none":
+            model_path = quantize_model(model_path, quantize, calibration_video, input_size=input_size)
+            backend = "onnxruntime"
+        engine_args = {"model_path": model_path, "backend": backend, "input_size": input_size,
+                       "names_file": names_file, "backend_options": backend_options}
+        return cls(engine_args, **kwargs)
+
+    def _wait_ready(self, timeout):
+        deadline = time.perf_counter() + timeout
+        info = None
+        waiting = len(self._processes)
+        while waiting:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                if any(not p.is_alive() for p in self._processes):
+                    raise RuntimeError("detection worker exited during start-up")
+                if time.perf_counter() > deadline:
+                    raise RuntimeError("detection workers did not start in time")
+                continue
+            if message[0] == "error":
+                raise RuntimeError(f"detection worker {message[1]} failed to load the model:\n{message[2]}")
+            info = message[2], message[3]
+            waiting -= 1
+        return info
+
+    def start(self):
+        if self._collector is None:
+            self._collector = threading.Thread(target=self._collect, name="detection-results", daemon=True)
+            self._collector.start()
+        super().start()
+
+    def stop(self):
+        super().stop()
+        self._shutdown_workers()
+        if self._collector is not None:
+            self._collector.join()
+            self._collector = None
+        for _, batch in self._jobs.values():
+            self._fail_batch(batch, RuntimeError("detection engine stopped"))
+        self._jobs.clear()
+        for ring in self._rings:
+            ring.close()
+        self._rings = []
+
+    def _shutdown_workers(self):
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    # engine thread: copy the batch into the ring of the least busy worker with room
+    def _process(self, batch):
+        batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        frames = [frame for request in batch for frame in request.frames]
+        sizes = [_aligned(frame.nbytes) for frame in frames]
+        nbytes = sum(sizes)
+        if nbytes > self._rings[0].size:
+            self._fail_batch(batch, ValueError(f"batch of {nbytes} bytes does not fit the {self._rings[0].size} "
+                                               f"byte frame ring"))
+            return
+
+        with self._space:
+            while True:
+                if self._stop_event.is_set():
+                    self._fail_batch(batch, RuntimeError("detection engine stopped"))
+                    return
+                order = sorted((i for i in range(len(self._rings)) if i not in self._dead),
+                               key=lambda i: len(self._rings[i].inflight))
+                if not order:
+                    self._fail_batch(batch, RuntimeError("all detection workers died"))
+                    return
+                for index in order:
+                    start = self._rings[index].reserve(nbytes)
+                    if start is not None:
+                        break
+                else:
+                    self._space.wait(timeout=0.1)
+                    continue
+                break
+            job_id = self._next_job
+            self._next_job += 1
+            self._jobs[job_id] = (index, batch)
+
+        ring = self._rings[index]
+        layout = []
+        offset = start
+        for frame, size in zip(frames, sizes):
+            ring.write(offset, frame)
+            layout.append((offset, frame.shape))
+            offset += size
+        self._tasks[index].put((job_id, layout))
+
+    # results thread: resolves the futures of finished batches and frees their
+    # ring space; fails the batches of workers that died
+    def _collect(self):
+        next_check = 0.0
+        while self._processes or self._jobs:
+            now = time.perf_counter()
+            if now >= next_check:
+                next_check = now + 0.1
+                if not self._check_workers():
+                    return
+            try:
+                message = self._results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            kind, index, job_id, payload, batch_ms = message
+            with self._space:
+                job = self._jobs.pop(job_id, None)
+                if job is not None:
+                    self._rings[index].free_oldest()
+                    self._space.notify_all()
+            if job is None:
+                # already failed when its worker was found dead
+                continue
+            batch = job[1]
+            if kind == "done":
+                self._finish_batch(batch, payload, batch_ms)
+            else:
+                log.error("detection worker %d failed:\n%s", index, payload)
+                self._fail_batch(batch, RuntimeError(f"detection worker {index} failed"))
+
+    # -> False once no worker is left
+    def _check_workers(self):
+        processes = self._processes
+        if self._stop_event.is_set():
+            # stopping: the workers exit on their own and stop() fails what is left
+            return any(p.is_alive() for p in processes)
+        for index, process in enumerate(processes):
+            if index in self._dead or process.is_alive():
+                continue
+            with self._space:
+                self._dead.add(index)
+                lost_jobs = [job_id for job_id, (worker, _) in self._jobs.items() if worker == index]
+                lost = [self._jobs.pop(job_id)[1] for job_id in lost_jobs]
+                self._rings[index].reset()
+                self._space.notify_all()
+            log.error("detection worker %d exited with code %s, %d batches lost", index, process.exitcode, len(lost))
+            for batch in lost:
+                self._fail_batch(batch, RuntimeError(f"detection worker {index} died"))
+        return len(self._dead) < len(processes)
@@ -0,0 +1,125 @@
+import logging
+import os
+import cv2
+import numpy as np
+
+log = logging.getLogger("index")
+
+
+# Keyframe/timestamp index of a video file: the presentation timestamp of every
+# frame and which frames are keyframes, read from the container's packets
+# without decoding. Built once and cached next to the video as
+# <video>.frameindex.npz (invalidated when the file size or mtime changes).
+# A seek to frame n jumps to the keyframe at or before n and decodes forward
+# the rest of that GOP only, so its cost does not grow with the position in
+# the file.
+INDEX_VERSION = 1
+
+
+def index_path(video_path):
+    return video_path + ".frameindex.npz"
+
+
+def _file_stamp(video_path):
+    st = os.stat(video_path)
+    return np.array([INDEX_VERSION, st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+# -> (pts_ms, keyframe) in packet (decode) order, via PyAV when installed
+def _read_packets(video_path):
+    try:
+        import av
+    except ImportError:
+        av = None
+    if av is not None:
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            start = stream.start_time or 0
+            scale = float(stream.time_base) * 1000
+            packets = [((p.pts - start) * scale, p.is_keyframe) for p in container.demux(stream) if p.pts is not None]
+    else:
+        # OpenCV raw mode: grab() reads packets without decoding them
+        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+        if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+            raise IOError(f"cannot read the packets of {video_path}")
+        packets = []
+        while cap.grab():
+            packets.append((cap.get(cv2.CAP_PROP_POS_MSEC), bool(cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME))))
+        cap.release()
+    if not packets:
+        raise IOError(f"no video packets in {video_path}")
+    return packets
+
+
+class FrameIndex:
+    def __init__(self, pts_ms, keyframes):
+        self.pts_ms = pts_ms  # float64, per frame in presentation order
+        self.keyframes = np.flatnonzero(keyframes)  # frame numbers of the keyframes
+        if not len(self.keyframes) or self.keyframes[0] != 0:
+            # open GOP start or missing flags: frame 0 is always reachable from the start
+            self.keyframes = np.concatenate(([0], self.keyframes))
+
+    @property
+    def frame_count(self):
+        return len(self.pts_ms)
+
+    @property
+    def duration_ms(self):
+        return float(self.pts_ms[-1])
+
+    def clip(self, frame):
+        return min(max(int(frame), 0), self.frame_count - 1)
+
+    # frame shown at msec (the last frame whose timestamp is not after it)
+    def frame_at(self, msec):
+        return self.clip(np.searchsorted(self.pts_ms, msec + 1e-3, side="right") - 1)
+
+    def pts_at(self, frame):
+        return float(self.pts_ms[self.clip(frame)])
+
+    def keyframe_before(self, frame):
+        return int(self.keyframes[np.searchsorted(self.keyframes, self.clip(frame), side="right") - 1])
+
+    # position cap so that its next grab() returns frame -> frames decoded to get there
+    def seek(self, cap, frame):
+        frame = self.clip(frame)
+        keyframe = self.keyframe_before(frame)
+        cap.set(cv2.CAP_PROP_POS_MSEC, self.pts_at(keyframe))
+        for _ in range(frame - keyframe):
+            if not cap.grab():
+                break
+        return frame - keyframe
+
+    @classmethod
+    def build(cls, video_path):
+        packets = _read_packets(video_path)
+        pts_ms = np.array([p[0] for p in packets], dtype=np.float64)
+        keyframes = np.array([p[1] for p in packets], dtype=bool)
+        order = np.argsort(pts_ms, kind="stable")
+        return cls(pts_ms[order], keyframes[order])
+
+    def save(self, path, stamp):
+        keyframes = np.zeros(self.frame_count, dtype=bool)
+        keyframes[self.keyframes] = True
+        with open(path, "wb") as f:
+            np.savez(f, pts_ms=self.pts_ms, keyframes=keyframes, stamp=stamp)
+
+    # -> FrameIndex from the cache next to the video, built (and cached) if missing or stale
+    @classmethod
+    def load_or_build(cls, video_path):
+        path = index_path(video_path)
+        stamp = _file_stamp(video_path)
+        try:
+            with np.load(path) as data:
+                if np.array_equal(data["stamp"], stamp):
+                    return cls(data["pts_ms"], data["keyframes"])
+        except (OSError, KeyError, ValueError):
+            pass
+
+        index = cls.build(video_path)
+        log.info("Indexed %s: %d frames, %d keyframes", video_path, index.frame_count, len(index.keyframes))
+        try:
+            index.save(path, stamp)
+        except OSError as e:
+            log.warning("Cannot cache the frame index at %s: %s", path, e)
+        return index
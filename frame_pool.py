@@ -0,0 +1,88 @@
+import threading
+import numpy as np
+
+
+# Byte alignment of pooled arrays (cache line / AVX-512 width)
+ALIGNMENT = 64
+
+
+def aligned_empty(shape, dtype=np.uint8, alignment=ALIGNMENT):
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    raw = np.empty(nbytes + alignment, dtype=np.uint8)
+    offset = -raw.ctypes.data % alignment
+    return raw[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
+# One pooled array with a reference count. Whoever holds a reference may read
+# the pixels; the array goes back to the pool once the last one is released.
+class FrameBuffer:
+    def __init__(self, pool, array):
+        self.pool = pool
+        self.array = array
+        self._refs = 0
+
+    def retain(self):
+        with self.pool._lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self.pool._lock:
+            self._refs -= 1
+            if self._refs == 0:
+                self.pool._recycle(self)
+
+
+# Fixed ring of reusable frame arrays. acquire() hands out a free buffer (owned
+# by the caller, refcount 1) and blocks while all of them are in use, so a
+# buffer still referenced downstream, e.g. by the QImage on screen, is never
+# written over. A new shape replaces the free buffers; buffers of the old
+# shape are dropped when they come back.
+class FramePool:
+    def __init__(self, count, shape=None, dtype=np.uint8):
+        self.count = count
+        self.dtype = np.dtype(dtype)
+        self.shape = None
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._free = []
+        self._allocated = 0  # buffers of the current shape, free or in use
+
+        # diagnostics
+        self.bytes_allocated = 0
+        self.waits = 0  # acquire() calls that found the pool empty
+        if shape is not None:
+            self._reshape(tuple(shape))
+
+    def _reshape(self, shape):
+        self.shape = shape
+        self._free = []
+        self._allocated = 0
+
+    def _recycle(self, buffer):
+        if buffer.array.shape == self.shape:
+            self._free.append(buffer)
+            self._available.notify()
+
+    # -> FrameBuffer, or None on timeout
+    def acquire(self, shape=None, timeout=None):
+        with self._lock:
+            if shape is not None and tuple(shape) != self.shape:
+                self._reshape(tuple(shape))
+            if not self._free and self._allocated < self.count:
+                array = aligned_empty(self.shape, self.dtype)
+                self._allocated += 1
+                self.bytes_allocated += array.nbytes
+                self._free.append(FrameBuffer(self, array))
+            if not self._free:
+                self.waits += 1
+                if not self._available.wait_for(lambda: self._free, timeout):
+                    return None
+            buffer = self._free.pop()
+            buffer._refs = 1
+            return buffer
+
+    def in_use(self):
+        with self._lock:
+            return self._allocated - len(self._free)
@@ -0,0 +1,178 @@
+import re
+import sys
+import time
+import argparse
+import cv2
+
+from decoders import InferenceCapture
+
+
+# GStreamer capture pipelines for cv2.VideoCapture(..., cv2.CAP_GSTREAMER).
+# The appsink keeps at most max_buffers frames and drops the oldest instead of
+# queueing without limit, and does not sync to the clock, so a slow consumer
+# gets the newest frame rather than a growing backlog. Scaling happens in the
+# converter (nvvidconv on Jetson, videoscale elsewhere) so frames arrive at the
+# size they are used at. With inference_size, GstCapture downscales each
+# retrieved frame in-process for the detector, so the low-res copy is always
+# of the same frame as the displayed one.
+GST_SOURCES = ("csi", "v4l2", "file", "rtsp", "test")
+
+
+def parse_size(value):
+    w, h = value.lower().split("x")
+    return int(w), int(h)
+
+
+class GstPipelineBuilder:
+    def __init__(self, source="csi", location=None, capture_size=(1280, 720), framerate=30,
+                 output_size=None, inference_size=None, max_buffers=1, drop=True, sync=False,
+                 flip_method=0, sensor_id=0):
+        if source not in GST_SOURCES:
+            raise ValueError(f"unknown GStreamer source {source}")
+        self.source = source
+        self.location = location  # device, file path or URL, depending on the source
+        self.capture_size = capture_size
+        self.framerate = framerate
+        self.output_size = output_size or capture_size
+        self.inference_size = inference_size
+        self.max_buffers = max_buffers
+        self.drop = drop
+        self.sync = sync
+        self.flip_method = flip_method
+        self.sensor_id = sensor_id
+
+    @property
+    def hardware(self):
+        # the CSI camera path runs on Jetson, where nvvidconv scales in hardware
+        return self.source == "csi"
+
+    def source_elements(self):
+        w, h = self.capture_size
+        if self.source == "csi":
+            return (f"nvarguscamerasrc sensor-id={self.sensor_id} ! "
+                    f"video/x-raw(memory:NVMM), width=(int){w}, height=(int){h}, "
+                    f"format=(string)NV12, framerate=(fraction){self.framerate}/1")
+        if self.source == "v4l2":
+            device = self.location or "/dev/video0"
+            return (f"v4l2src device={device} ! "
+                    f"video/x-raw, width=(int){w}, height=(int){h}, framerate=(fraction){self.framerate}/1")
+        if self.source == "file":
+            return f"filesrc location={self.location} ! decodebin"
+        if self.source == "rtsp":
+            return f"rtspsrc location={self.location} latency=0 ! decodebin"
+        return (f"videotestsrc is-live=true pattern=ball ! "
+                f"video/x-raw, width=(int){w}, height=(int){h}, framerate=(fraction){self.framerate}/1")
+
+    # scale to size and convert to BGR for OpenCV
+    def convert_elements(self, size):
+        w, h = size
+        if self.hardware:
+            # nvvidconv scales and converts to BGRx in hardware; videoconvert only drops the x
+            return (f"nvvidconv flip-method={self.flip_method} ! "
+                    f"video/x-raw, width=(int){w}, height=(int){h}, format=(string)BGRx ! "
+                    f"videoconvert ! video/x-raw, format=(string)BGR")
+        flip = f"videoflip method={self.flip_method} ! " if self.flip_method else ""
+        return (f"{flip}videoscale ! videoconvert ! "
+                f"video/x-raw, width=(int){w}, height=(int){h}, format=(string)BGR")
+
+    def appsink(self):
+        return (f"appsink drop={'true' if self.drop else 'false'} max-buffers={self.max_buffers} "
+                f"sync={'true' if self.sync else 'false'}")
+
+    def pipeline(self):
+        return f"{self.source_elements()} ! {self.convert_elements(self.output_size)} ! {self.appsink()}"
+
+    # -> (display capture, inference capture or None)
+    def open(self):
+        if not re.search(r"GStreamer:\s+YES", cv2.getBuildInformation()):
+            raise IOError("OpenCV is built without GStreamer support")
+        cap = cv2.VideoCapture(self.pipeline(), cv2.CAP_GSTREAMER)
+        if not cap.isOpened():
+            raise IOError(f"cannot open GStreamer pipeline: {self.pipeline()}")
+        cap = GstCapture(cap, self.inference_size)
+        return cap, cap.inference_capture()
+
+
+# The appsink capture, plus an INTER_AREA downscale of the frame last retrieved
+# for the detector (read through inference_capture(), like a VideoDecoder's)
+class GstCapture:
+    def __init__(self, cap, inference_size=None):
+        self.cap = cap
+        self.inference_size = inference_size
+        self._frame = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def grab(self):
+        self._frame = None
+        return self.cap.grab()
+
+    def retrieve(self, image=None):
+        ret, frame = self.cap.retrieve(image)
+        self._frame = frame if ret else None
+        return ret, frame
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def inference_capture(self):
+        return InferenceCapture(self) if self.inference_size is not None else None
+
+    def retrieve_inference(self):
+        if self._frame is None:
+            return None
+        return cv2.resize(self._frame, self.inference_size, interpolation=cv2.INTER_AREA)
+
+    def release(self):
+        self._frame = None
+        self.cap.release()
+
+
+# Smoke test, e.g. on CI: python gst_pipeline.py --source test --frames 60
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and optionally run a GStreamer capture pipeline")
+    parser.add_argument("--source", choices=GST_SOURCES, default="test")
+    parser.add_argument("--location", default=None, help="device, file path or URL")
+    parser.add_argument("--capture-size", type=parse_size, default=(1280, 720))
+    parser.add_argument("--output-size", type=parse_size, default=None)
+    parser.add_argument("--inference-size", type=parse_size, default=None)
+    parser.add_argument("--max-buffers", type=int, default=1)
+    parser.add_argument("--frames", type=int, default=0, help="read N frames and report the rate (0 = only print)")
+    args = parser.parse_args(argv)
+
+    builder = GstPipelineBuilder(args.source, args.location, args.capture_size, output_size=args.output_size,
+                                 inference_size=args.inference_size, max_buffers=args.max_buffers)
+    print(builder.pipeline())
+    if args.frames <= 0:
+        return 0
+
+    cap, infer_cap = builder.open()
+    start = time.perf_counter()
+    shape = infer_shape = None
+    for _ in range(args.frames):
+        ret, frame = cap.read()
+        if not ret:
+            print("source ended early", file=sys.stderr)
+            return 1
+        shape = frame.shape
+        if infer_cap is not None:
+            ret, small = infer_cap.retrieve()
+            infer_shape = small.shape if ret else None
+    elapsed = time.perf_counter() - start
+    print(f"{args.frames} frames {shape} (inference {infer_shape}) in {elapsed:.2f} s "
+          f"-> {args.frames / elapsed:.1f} FPS")
+    cap.release()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,41 @@
 import sys
+import os
+import argparse
+from concurrent.futures import Future
 import cv2
-import torch
 import numpy as np
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 import qtawesome as qta
 import time
-
-from Ui_components import NavBarWidget, HudOverlay, UIWidgetManager
+import logging
+import threading
+
+from Ui_components import NavBarWidget, HudOverlay, AnnotationOverlay, UIWidgetManager
+from pipeline import CAPTURE_MODES, FramePipeline
+from gst_pipeline import GST_SOURCES, GstPipelineBuilder, parse_size
+from decoders import DECODERS, open_decoder
+from frame_index import FrameIndex
+from render import FrameRenderer, hud_values
+from video_surface import VIDEO_SURFACES, create_video_surface
+from detector import DetectionEngine
+from detector_workers import ProcessDetectionEngine
+from detections import empty_detections, has_detection, detection_at
+from tracker import MultiObjectTracker
+from scheduler import DetectionScheduler, TargetPropagator
+from tiling import TiledDetector
+from quantization import QUANT_MODES
+from telemetry import LOG_LEVELS, TelemetryRing, TelemetryWriter, configure_logging
+from profiling import SamplingProfiler, profiler
+from pacing import RATE_MAX, RATE_MIN, FramePacer, source_fps
+
+log = logging.getLogger("ui")
 
 class TrackingSystem(QMainWindow):
-    def __init__(self):
+    def __init__(self, args):
         super().__init__()
+        self.args = args
         self.setWindowTitle("Detection and Tracking Drone UI")
         screen_rect = QApplication.primaryScreen().geometry()
         self.setGeometry(screen_rect)
@@ -20,25 +43,88 @@ class TrackingSystem(QMainWindow):
 
         self.selected_target_id = 1
 
-        # Load YOLOv5
-        # model_path = "model/yolov5s.pt"  
-        # self.yolo_model = torch.hub.load('ultralytics/yolov5', 'custom', path=model_path, force_reload=False)
-
-        # open video 
-        self.cap = cv2.VideoCapture("video/drone-flying.mp4")
+        # Load YOLOv5 behind the batched detection engine, in this process
+        # or in worker processes fed through shared memory
+        self.detection_engine = None
+        if os.path.exists(args.model):
+            engine_options = {}
+            engine_class = DetectionEngine
+            if args.detect_workers > 0:
+                engine_class = ProcessDetectionEngine
+                engine_options = {"workers": args.detect_workers, "threads": args.threads,
+                                  "ring_bytes": args.worker_ring_mb * 2 ** 20}
+            self.detection_engine = engine_class.from_file(
+                args.model,
+                backend=args.backend,
+                input_size=args.input_size,
+                names_file=args.names,
+                backend_options={"repo_dir": args.yolov5_dir, "threads": args.threads},
+                quantize=args.quantize,
+                calibration_video=args.calibration_video,
+                max_batch_size=args.batch_size,
+                max_latency=args.batch_latency_ms / 1000,
+                **engine_options
+            )
+            self.detection_engine.start()
+        else:
+            log.warning("No model file %s, detection disabled", args.model)
+
+        # Sliced inference for tiny distant drones
+        self.tiled_detector = None
+        if args.tiled and self.detection_engine is not None:
+            self.tiled_detector = TiledDetector(
+                self.detection_engine,
+                tile_size=args.tile_size,
+                overlap=args.tile_overlap,
+                batch_size=args.tile_batch
+            )
 
-        # Open CSI camera via GStreamer
-        # self.cap = cv2.VideoCapture(gstreamer_pipeline(), cv2.CAP_GSTREAMER)
-        # if not self.cap.isOpened():
-        #     print(" No Open Camera ")
-        #     sys.exit()
+        # Multi-object tracker: stable ids, fills frames between detector runs
+        self.tracker = MultiObjectTracker()
+        propagator = None
+        if args.propagator != "kalman":
+            propagator = TargetPropagator(args.propagator)
+        self.scheduler = DetectionScheduler(
+            self.tracker,
+            self.detect_drones_async,
+            stride=args.detect_every,
+            adaptive=args.adaptive_stride,
+            target_fps=args.target_fps,
+            propagator=propagator,
+            target_id_fn=lambda: self.selected_target_id,
+            roi_inference=args.roi,
+            roi_pad=args.roi_pad,
+            full_sweep_every=args.full_sweep_every
+        )
 
+        # open the video file through the selected decoder, or a camera / stream through GStreamer
+        self.infer_cap = None
+        if args.gst_source:
+            builder = GstPipelineBuilder(
+                args.gst_source,
+                location=args.gst_location,
+                capture_size=args.gst_capture_size,
+                output_size=args.gst_output_size,
+                inference_size=args.gst_inference_size,
+                max_buffers=args.gst_max_buffers
+            )
+            try:
+                self.cap, self.infer_cap = builder.open()
+            except IOError as e:
+                log.error("No Open Camera: %s", e)
+                sys.exit(1)
+        else:
+            try:
+                self.cap = open_decoder(args.video, args.decoder, threads=args.decode_threads,
+                                        output_size=args.decode_size, inference_size=args.decode_inference_size,
+                                        read_ahead=args.read_ahead)
+            except IOError as e:
+                log.error("No Open Video: %s", e)
+                sys.exit(1)
+            self.infer_cap = self.cap.inference_capture()
 
 
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)
 
         # Count FPS variables
         self.fps_counter = 0 
@@ -46,26 +132,89 @@ class TrackingSystem(QMainWindow):
         self.current_fps = 0
 
         # Tracking variables
-        self.detected_drone = []
+        self.detected_drone = empty_detections()
+        self.detection_offset = (0, 0)
         self.compass_bearing = 0
 
         # zoom object power
         self.zoom_level = 0.5  # center
 
-        self.init_ui()
         self.video_paused = False
+        self.shown_packet = None  # packet whose buffers the video surface shows
+        self.frame_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                           int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        self.init_ui()
+
+        # per-frame records for diagnostics, optionally flushed to a file off the GUI thread
+        self.telemetry = TelemetryRing(args.telemetry_size)
+        self.telemetry_writer = None
+        if args.telemetry:
+            self.telemetry_writer = TelemetryWriter(self.telemetry, args.telemetry)
+            self.telemetry_writer.start()
+
+        # F3: per-stage timing panel, F9: dump a profile of the last --profile-window seconds
+        self.sampling_profiler = None
+        if args.profile_window > 0:
+            self.sampling_profiler = SamplingProfiler(args.profile_window)
+            self.sampling_profiler.start()
+        QShortcut(QKeySequence(Qt.Key_F3), self, activated=self.toggle_perf_panel)
+        QShortcut(QKeySequence(Qt.Key_F9), self, activated=self.dump_profile)
+        if args.perf_panel:
+            self.toggle_perf_panel()
+
+        # Threaded frame pipeline: capture -> inference -> render -> present (GUI)
+        self.renderer = FrameRenderer(self.ui_manager)
+        self.sync_renderer_settings()
+        # frames are released at the source's timestamps; [ and ] halve/double the rate, \\ resets it
+        self.pacer = FramePacer(source_fps(self.cap.get(cv2.CAP_PROP_FPS)), rate=args.playback_rate,
+                                max_throughput=args.max_throughput)
+        QShortcut(QKeySequence(Qt.Key_BracketLeft), self, activated=lambda: self.set_playback_rate(self.pacer.rate / 2))
+        QShortcut(QKeySequence(Qt.Key_BracketRight), self, activated=lambda: self.set_playback_rate(self.pacer.rate * 2))
+        QShortcut(QKeySequence(Qt.Key_Backslash), self, activated=lambda: self.set_playback_rate(1.0))
+        self.pipeline = FramePipeline(self.cap, self.infer_frame, self.renderer.render, pacer=self.pacer,
+                                      capture_mode=self.args.capture_mode, infer_cap=self.infer_cap)
+        self.pipeline.frame_ready.connect(self.present_frame)
+        self.pipeline.start()
+
+        # Recorded video review: seek bar, Left/Right step one frame (pausing),
+        # Shift+Left/Right jump 5 s. Seeking needs the keyframe index of the file,
+        # loaded from its cache or built off the GUI thread.
+        self.frame_index = None
+        self.shown_frame = 0
+        seek_slider = self.ui_manager.get_widget('seek_slider')
+        seek_slider.valueChanged.connect(self.seek_slider_moved)
+        seek_slider.sliderReleased.connect(lambda: self.seek_frame(seek_slider.value()))
+        QShortcut(QKeySequence(Qt.Key_Left), self, activated=lambda: self.step_frame(-1))
+        QShortcut(QKeySequence(Qt.Key_Right), self, activated=lambda: self.step_frame(1))
+        QShortcut(QKeySequence(Qt.SHIFT + Qt.Key_Left), self, activated=lambda: self.seek_relative(-5000))
+        QShortcut(QKeySequence(Qt.SHIFT + Qt.Key_Right), self, activated=lambda: self.seek_relative(5000))
+        if not args.gst_source:
+            threading.Thread(target=self.load_frame_index, name="frame-index", daemon=True).start()
 
     def init_ui(self):
         # Full Screen video
-        self.video_label = QLabel(self)
+        self.video_label = create_video_surface(self.args.video_surface, self)
         self.video_label.setGeometry(0, 0, 1920, 1080)
-        self.video_label.setStyleSheet("background-color: black;")
-        self.video_label.setAlignment(Qt.AlignCenter)
 
-        # HUD overlay
+        # HUD overlay: its own translucent widget, or drawn by the video
+        # surface in the same pass as the frame
         self.hud_overlay = HudOverlay(self.video_label)
         self.hud_overlay.resize(self.video_label.size())
-        self.hud_overlay.show()
+        if self.video_label.composites_overlays:
+            self.video_label.add_overlay(self.hud_overlay.paint_hud)
+            self.hud_overlay.hide()
+        else:
+            self.hud_overlay.show()
+
+        # Detection tags, above the HUD
+        self.annotation_overlay = AnnotationOverlay(self.video_label)
+        self.annotation_overlay.resize(self.video_label.size())
+        if self.video_label.composites_overlays:
+            self.video_label.add_overlay(self.annotation_overlay.paint_annotations)
+            self.annotation_overlay.hide()
+        else:
+            self.annotation_overlay.show()
 
         # NavBarWidget 
         self.nav_bar_widget = NavBarWidget(self.video_label)
@@ -130,14 +279,37 @@ class TrackingSystem(QMainWindow):
         
         self.hud_overlay.resize(self.video_label.size())
         self.hud_overlay.update()
+        self.annotation_overlay.resize(self.video_label.size())
+
+        if hasattr(self, 'renderer'):
+            self.sync_renderer_settings()
+
+    def closeEvent(self, event):
+        self.pipeline.stop()
+        if self.detection_engine is not None:
+            self.detection_engine.stop()
+        self.cap.release()
+        if self.infer_cap is not None:
+            self.infer_cap.release()
+        if self.telemetry_writer is not None:
+            self.telemetry_writer.stop()
+        if self.sampling_profiler is not None:
+            self.sampling_profiler.stop()
+        super().closeEvent(event)
+
+    # copy view settings read by the render stage
+    def sync_renderer_settings(self):
+        zoom_view = self.ui_manager.get_widget('zoom_view')
+        self.renderer.selected_target_id = self.selected_target_id
+        self.renderer.zoom_visible = self.zoom_visible
+        self.renderer.zoom_size = (zoom_view.width(), zoom_view.height())
 
     def toggle_video_playback(self):
         if self.video_paused:
             self.video_paused = False
-            self.timer.start()                   
         else:
             self.video_paused = True
-            self.timer.stop()
+        self.pipeline.set_paused(self.video_paused)
         
         # Update buttons via UI manager
         self.ui_manager.update_play_pause_button(self.video_paused)
@@ -154,15 +326,85 @@ class TrackingSystem(QMainWindow):
             toggle_button.setIcon(self.icon_eye_closed)
             
         self.ui_manager.place_toggle_button(self.zoom_visible, self.nav_bar_widget.height())
+        self.sync_renderer_settings()
+
+    def toggle_perf_panel(self):
+        if self.ui_manager.toggle_perf_panel():
+            self.ui_manager.update_perf_panel(profiler.percentiles())
+
+    # index thread
+    def load_frame_index(self):
+        try:
+            index = FrameIndex.load_or_build(self.args.video)
+        except (IOError, OSError) as e:
+            log.warning("No frame index for %s, seeking disabled: %s", self.args.video, e)
+            return
+        self.pipeline.set_index(index)
+        if self.args.start > 0:
+            self.pipeline.seek(index.frame_at(self.args.start * 1000))
+        # the GUI shows the seek bar with the next frame
+        self.frame_index = index
+
+    def seek_frame(self, frame):
+        if self.frame_index is not None:
+            self.pipeline.seek(frame)
+
+    # while dragging only keyframes are shown, the exact frame once released
+    def seek_slider_moved(self, value):
+        if self.frame_index is None:
+            return
+        if self.ui_manager.get_widget('seek_slider').isSliderDown():
+            self.pipeline.seek(value, exact=False)
+        else:
+            self.pipeline.seek(value)
 
-    def update_frame(self):
-        if self.video_paused:
+    def seek_relative(self, msec):
+        if self.frame_index is not None:
+            index = self.frame_index
+            self.pipeline.seek(index.frame_at(index.pts_at(self.shown_frame) + msec))
+
+    def step_frame(self, step):
+        if self.frame_index is None:
             return
+        if not self.video_paused:
+            self.toggle_video_playback()
+        self.pipeline.seek(self.shown_frame + step)
 
-        ret, frame_bgr = self.cap.read()
-        if not ret:
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    def set_playback_rate(self, rate):
+        rate = self.pacer.set_rate(rate)
+        log.info("Playback rate %gx", rate)
+
+    def dump_profile(self):
+        if self.sampling_profiler is None:
+            log.warning("Profiling is off, start with --profile-window SECONDS")
             return
+        path = os.path.join(self.args.profile_dir, time.strftime("profile-%Y%m%d-%H%M%S.prof"))
+        self.sampling_profiler.dump(path)
+
+    # inference stage (worker thread): the scheduler decides whether this frame
+    # goes to the detector or is filled in by the tracker, without waiting.
+    def infer_frame(self, packet):
+        return self.scheduler.process(packet)
+
+    # present stage (GUI thread): receives packets rendered by the pipeline.
+    # The packet on screen keeps its buffers until the next one replaces it.
+    def present_frame(self, packet):
+        try:
+            if self.show_packet(packet):
+                packet, self.shown_packet = self.shown_packet, packet
+        finally:
+            if packet is not None:
+                packet.release()
+            self.pipeline.frame_presented()
+
+    # -> True if the packet is now on screen
+    def show_packet(self, packet):
+        if self.video_paused and not packet.still:
+            return False
+
+        detections = packet.detections
+        frame_w, frame_h = packet.frame_size
+        self.frame_size = (frame_w, frame_h)
 
         # FPS counter
         self.fps_counter += 1
@@ -171,21 +413,14 @@ class TrackingSystem(QMainWindow):
             self.current_fps = self.fps_counter
             self.fps_counter = 0
             self.fps_start_time = time.time()
-
-        frame_for_zoom = frame_bgr.copy()
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-
-        detections = self.detect_drones(frame_rgb)
-
-        # show text status
-        if not detections:
-            frame_bgr = self.ui_manager.draw_no_detection_message(frame_bgr)
+            if self.ui_manager.get_widget('perf_panel').isVisible():
+                self.ui_manager.update_perf_panel(profiler.percentiles())
 
         # Vision status logic
-        if not detections:
+        if len(detections) == 0:
             vision_status = "Standby"
         else:
-            if self.selected_target_id is not None and any(d['id'] == self.selected_target_id for d in detections):
+            if has_detection(detections, self.selected_target_id):
                 vision_status = "Tracking"
             else:
                 vision_status = "Detecting"
@@ -194,202 +429,78 @@ class TrackingSystem(QMainWindow):
         self.nav_bar_widget.setVisionStatus(vision_status)
 
         # Update status labels ผ่าน UI manager
-        motion_mode = "Autonomous" if detections else "Standby"
+        motion_mode = "Autonomous" if len(detections) > 0 else "Standby"
         self.ui_manager.update_motion_fps_labels(motion_mode, self.current_fps)
+        pacing = self.pacer.jitter_stats() if self.args.capture_mode == "paced" else None
+        self.ui_manager.update_stage_fps_label(self.pipeline.stage_stats(), pacing)
+
+        target = packet.target
+        if target is not None:
+            x, y, w_box, h_box = target['bbox'].tolist()
+            zoom, pitch, self.compass_bearing = hud_values((x, y, w_box, h_box), frame_w, frame_h)
 
-        # Center object in the frame
-        target = next((d for d in detections if d['id'] == self.selected_target_id), None)
-        offset_x = 0
-        offset_y = 0
-        if target:
-            x, y, w_box, h_box = target['bbox']
-
-            # Calculate zoom level from object size
-            box_area = w_box * h_box
-            max_area = 80000
-            zoom = min(1.0, max(0.0, box_area / max_area))
             self.zoom_level = zoom
-            self.hud_overlay.set_zoom_level(self.zoom_level)
 
-            # Adjust the zoom and autofocus values from the bounding box.
-            self.hud_overlay.auto_adjust_zoom_focus_from_bbox(
-                w_box, h_box,
-                frame_bgr.shape[1],
-                frame_bgr.shape[0]
-            )
+            # The HUD zoom and autofocus bars follow the bounding box size;
+            # all HUD values go in one update so only changed gauges repaint.
+            focus = self.hud_overlay.zoom_focus_from_bbox(w_box, h_box, frame_w, frame_h)
+            self.hud_overlay.update_state(heading=self.compass_bearing, pitch=pitch,
+                                          zoom=focus, focus=focus)
 
-            # Calculate pitch and update
-            obj_cx = x + w_box / 2
-            obj_cy = y + h_box / 2
-            pitch = 90 - (obj_cy / frame_bgr.shape[0]) * 180
-            self.hud_overlay.set_pitch(pitch)
-
-            # Calculate compass and update
-            self.compass_bearing = int((obj_cx / frame_bgr.shape[1]) * 360) % 360
-            self.hud_overlay.set_heading(self.compass_bearing)
-
-            # Calculate offset and shift image
-            screen_cx = frame_bgr.shape[1] // 2
-            screen_cy = frame_bgr.shape[0] // 2
-            offset_x = int(screen_cx - obj_cx)
-            offset_y = int(screen_cy - obj_cy)
-            M = np.float32([[1, 0, offset_x], [0, 1, offset_y]])
-            frame_bgr = cv2.warpAffine(frame_bgr, M, (frame_bgr.shape[1], frame_bgr.shape[0]))
-
-        # Draw bounding boxes 
-        if not hasattr(self, 'detection_labels'):
-            self.detection_labels = {}
-
-        for drone in detections:
-            x, y, w_box, h_box = drone['bbox']
-            x_new = int(x + offset_x)
-            y_new = int(y + offset_y)
-            
-            if 0 <= x_new < frame_bgr.shape[1] and 0 <= y_new < frame_bgr.shape[0]:
-                color = (0, 255, 0)
-                if self.selected_target_id == drone['id']:
-                    color = (0, 0, 255)
-                
-                # draw bounding box
-                cv2.rectangle(frame_bgr, (x_new, y_new), (x_new + w_box, y_new + h_box), color, 1)
-                
-                # === calculate font size based on bounding box width ===
-                zoom_width = w_box
-                font_size = max(10, zoom_width // 30) 
-                
-                # create QLabel if not exists
-                if drone['id'] not in self.detection_labels:
-                    label = QLabel(self.video_label)
-                    label.setAttribute(Qt.WA_TransparentForMouseEvents)
-                    self.detection_labels[drone['id']] = label
-                label = self.detection_labels[drone['id']]
-                
-                # update text and style 
-                text = f"ID: {drone['id']} {drone['type']} {drone['confidence']:.1f}%"
-                label.setText(text)
-                label.setStyleSheet(f"""
-                    background-color: rgb(60, 60, 60);
-                    color: white;
-                    border: 0px;
-                    border-radius: 0px;
-                    padding: 0px;
-                    margin: 0px;
-                    font-size: {font_size}px;
-                    font-family: sans-serif;
-                """)
-                
-                frame_h, frame_w = frame_bgr.shape[:2]
-                video_label_w = self.video_label.width()
-                video_label_h = self.video_label.height()
-                scale_x = video_label_w / frame_w
-                scale_y = video_label_h / frame_h
-                
-                
-                font = label.font()
-                font.setPixelSize(font_size)
-                label.setFont(font)
-                
-                fm = QFontMetrics(font)
-                text_width = fm.horizontalAdvance(text)
-                text_height = fm.height()
-                
-                label.setFixedSize(text_width, text_height)
-                
-                label_x = int(x_new * scale_x)
-                label_y = int(y_new * scale_y - text_height)  # วางเหนือ box พอดี
-                
-                label_x = max(0, min(label_x, video_label_w - text_width))
-                label_y = max(0, label_y)
-                
-                label.move(label_x, label_y)
-                label.show()
-                
-                # === draw zoom box if needed ===
-                if self.zoom_visible:
-                    cv2.rectangle(frame_for_zoom, (x, y), (x + w_box, y + h_box), color, 1)
-
-        # === hide unused labels ===
-        used_ids = set(d['id'] for d in detections)
-        for drone_id in list(self.detection_labels.keys()):
-            if drone_id not in used_ids:
-                self.detection_labels[drone_id].hide()
+        # Detection tags (ID, type, confidence) above each box
+        self.annotation_overlay.set_detections(detections, packet.offset, (frame_w, frame_h))
 
 
 
         # Show main image
-        h, w, _ = frame_bgr.shape
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-        qimg = QImage(frame_rgb.data, w, h, 3 * w, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(qimg).scaled(
-            self.video_label.width(), self.video_label.height(), Qt.KeepAspectRatio)
-        self.video_label.setPixmap(pixmap)
-
-        # Update HUD
-        self.hud_overlay.set_heading(self.compass_bearing)
-        self.hud_overlay.update()
+        self.video_label.set_frame(packet.display_image, packet)
+        self.pipeline.frame_shown(packet)
+        if packet.frame_number >= 0 and self.frame_index is not None:
+            index = self.frame_index
+            if not self.ui_manager.get_widget('seek_slider').isVisible():
+                self.ui_manager.show_seek_bar(index.frame_count)
+            self.shown_frame = packet.frame_number
+            self.ui_manager.update_seek_bar(packet.frame_number, index.pts_at(packet.frame_number), index.duration_ms)
+        hud = self.hud_overlay
+        self.telemetry.record(packet, time.perf_counter(), target,
+                              hud.zoom_level, hud.focus_level, hud.pitch_deg, hud.heading_deg)
 
         # Zoom View
         if self.zoom_visible:
-            target = next((d for d in detections if d['id'] == self.selected_target_id), None)
-            if not target and detections:
-                target = detections[0]
-
-            if target:
-                zoom_frame = frame_for_zoom.copy()
-                x, y, w_box, h_box = target['bbox']
-                cv2.rectangle(zoom_frame, (x, y), (x + w_box, y + h_box), (0, 0, 255), 1)
-
-                pad = 1.5
-                cx, cy = x + w_box // 2, y + h_box // 2
-                zw, zh = int(w_box * pad), int(h_box * pad)
-                x1, y1 = max(cx - zw // 2, 0), max(cy - zh // 2, 0)
-                x2, y2 = min(x1 + zw, zoom_frame.shape[1]), min(y1 + zh, zoom_frame.shape[0])
-
-                zoom_crop = zoom_frame[y1:y2, x1:x2]
-                if zoom_crop.size > 0:
-                    zoom_view = self.ui_manager.get_widget('zoom_view')
-                    zoom_width = zoom_view.width()
-                    zoom_height = zoom_view.height()
-
-                    zoom_resized = cv2.resize(zoom_crop, (zoom_width, zoom_height))
-
-                    # text QLabel under zoom view
-                    label_text = f"ID:{target['id']} {target['type']} {target['confidence']:.1f}%"
-                    zoom_label = self.ui_manager.get_widget('zoom_label_text')
-                    zoom_label.setText(label_text)
-                    zoom_view = self.ui_manager.get_widget('zoom_view')
-                    zoom_width = zoom_view.width()
-
-                    font_size = max(6, zoom_width // 25)
-
-                    font = QFont("Sans Serif", font_size)
-                    zoom_label.setFont(font)
-
-                    zoom_label.setStyleSheet("""
-                        background-color: rgb(60, 60, 60);
-                        color: white;
-                        border-radius: 0px;
-                        padding: 2px 4px;
-                    """)
-
-                    zoom_label.show()
-
-                    zoom_rgb = cv2.cvtColor(zoom_resized, cv2.COLOR_BGR2RGB)
-                    zoom_qimage = QImage(
-                        zoom_rgb.data,
-                        zoom_rgb.shape[1],
-                        zoom_rgb.shape[0],
-                        zoom_rgb.strides[0],
-                        QImage.Format_RGB888
-                    )
-                    self.ui_manager.set_zoom_view_content(QPixmap.fromImage(zoom_qimage))
+            if packet.zoom_image is not None:
+                zoom_target = packet.zoom_target
+
+                # text QLabel under zoom view
+                label_text = f"ID:{zoom_target['id']} {zoom_target['type']} {zoom_target['confidence']:.1f}%"
+                zoom_label = self.ui_manager.get_widget('zoom_label_text')
+                zoom_label.setText(label_text)
+                zoom_view = self.ui_manager.get_widget('zoom_view')
+                zoom_width = zoom_view.width()
+
+                font_size = max(6, zoom_width // 25)
+
+                font = QFont("Sans Serif", font_size)
+                zoom_label.setFont(font)
+
+                zoom_label.setStyleSheet("""
+                    background-color: rgb(60, 60, 60);
+                    color: white;
+                    border-radius: 0px;
+                    padding: 2px 4px;
+                """)
+
+                zoom_label.show()
+
+                self.ui_manager.set_zoom_view_content(QPixmap.fromImage(packet.zoom_image))
         else:
             # hidden zoom label 
             zoom_label = self.ui_manager.get_widget('zoom_label_text')
             zoom_label.hide()
 
-        # Save detections
+        # Save detections for click-to-select, with the shift of the recentered display
         self.detected_drone = detections
+        self.detection_offset = packet.offset
+        return True
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -398,85 +509,138 @@ class TrackingSystem(QMainWindow):
             label_w = self.video_label.width()
             label_h = self.video_label.height()
 
-            frame_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            frame_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            frame_w, frame_h = self.frame_size
 
             scale_x = frame_w / label_w
             scale_y = frame_h / label_h
 
-            clicked_x = int(click_pos.x() * scale_x)
-            clicked_y = int(click_pos.y() * scale_y)
+            # the display is shifted to keep the target centered; detections are in frame pixels
+            offset_x, offset_y = self.detection_offset
+            clicked_x = int(click_pos.x() * scale_x) - offset_x
+            clicked_y = int(click_pos.y() * scale_y) - offset_y
 
-            for drone in getattr(self, 'detected_drone', []):
-                x, y, w, h = drone['bbox']
-                if x <= clicked_x <= x + w and y <= clicked_y <= y + h:
-                    self.selected_target_id = drone['id']
-                    print(f"Selected drone ID: {self.selected_target_id}")
-                    return
+            drone = detection_at(self.detected_drone, clicked_x, clicked_y)
+            if drone is not None:
+                self.selected_target_id = int(drone['id'])
+                self.renderer.selected_target_id = self.selected_target_id
+                log.info("Selected drone ID: %d", self.selected_target_id)
+                return
 
         elif event.button() == Qt.RightButton:
             # Clear focus
             self.selected_target_id = None
-            print("Cleared selected target")
+            self.renderer.selected_target_id = None
+            log.info("Cleared selected target")
 
     def detect_drones(self, frame):
-        # # RGB to BGR
-        # img_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        # results = self.yolo_model(img_bgr)
-
-        # detections = []
-        # labels, cords = results.xyxyn[0][:, -1], results.xyxyn[0][:, :-1]
-        # h, w, _ = frame.shape
-
-        # for i, label in enumerate(labels):
-        #     conf = cords[i][4].item()
-        #     if conf < 0.3:
-        #         continue
-        #     x1 = int(cords[i][0].item() * w)
-        #     y1 = int(cords[i][1].item() * h)
-        #     x2 = int(cords[i][2].item() * w)
-        #     y2 = int(cords[i][3].item() * h)
-        #     bbox = [x1, y1, x2 - x1, y2 - y1]
-        #     class_id = int(label.item())
-        #     class_name = self.yolo_model.names[class_id] if hasattr(self.yolo_model, 'names') else "object"
-
-        #     # Rename class
-        #     if class_name.lower() == "airplane":
-        #         class_name = "drone"
-
-        #     detections.append({
-        #         "id": i + 1,
-        #         "confidence": conf * 100,
-        #         "bbox": bbox,
-        #         "type": class_name
-        #     })
-        # return detections
-
-        return []
+        if self.detection_engine is None:
+            return empty_detections()
+        if self.tiled_detector is not None:
+            return self.tiled_detector.detect(frame)
+        return self.detection_engine.detect(frame)
+
+    # non-blocking variant, returns a Future of detections
+    def detect_drones_async(self, frame):
+        if self.detection_engine is None:
+            future = Future()
+            future.set_result(self.detect_drones(frame))
+            return future
+        if self.args.capture_mode == "latest":
+            # frames still queued are older than this one; the scheduler tracks them without detections
+            self.detection_engine.discard_queued()
+        if self.tiled_detector is not None:
+            return self.tiled_detector.detect_async(frame)
+        return self.detection_engine.submit(frame)
     
-# Open CSI camera with GStreamer
-def gstreamer_pipeline(
-    sensor_id=0,
-    capture_width=1280,
-    capture_height=720,
-    display_width=1280,
-    display_height=720,
-    framerate=30,
-    flip_method=0
-):
-    return (
-        f"nvarguscamerasrc sensor-id={sensor_id} ! "
-        f"video/x-raw(memory:NVMM), width=(int){capture_width}, height=(int){capture_height}, "
-        f"format=(string)NV12, framerate=(fraction){framerate}/1 ! "
-        f"nvvidconv flip-method={flip_method} ! "
-        f"video/x-raw, width=(int){display_width}, height=(int){display_height}, format=(string)BGRx ! "
-        f"videoconvert ! video/x-raw, format=(string)BGR ! appsink"
-    )
-
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detection and Tracking Drone UI")
+    parser.add_argument("--model", default="model/yolov5s.pt", help="YOLOv5 weights file")
+    parser.add_argument("--backend", choices=["auto", "torch", "torchscript", "onnxruntime", "opencv"],
+                        default="auto", help="detector backend (auto = from the model file name)")
+    parser.add_argument("--names", default=None, help="class names file, one per line")
+    parser.add_argument("--yolov5-dir", default=None,
+                        help="local YOLOv5 source tree, needed to unpickle .pt checkpoints")
+    parser.add_argument("--quantize", choices=QUANT_MODES, default="none",
+                        help="run a quantized copy of the ONNX model (see quantize_report.py)")
+    parser.add_argument("--calibration-video", default="video/drone-flying.mp4",
+                        help="frames used to calibrate int8-static quantization")
+    parser.add_argument("--batch-size", type=int, default=4, help="max frames per inference batch")
+    parser.add_argument("--batch-latency-ms", type=float, default=20.0,
+                        help="max time a frame waits for its batch to fill")
+    parser.add_argument("--input-size", type=int, default=640, help="fixed detector input size")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="intra-op threads of the detector (torch.set_num_threads), per worker with "
+                             "--detect-workers (default: cores split between workers)")
+    parser.add_argument("--detect-workers", type=int, default=0,
+                        help="run detection in N worker processes (0 = in the GUI process)")
+    parser.add_argument("--worker-ring-mb", type=int, default=128,
+                        help="shared memory frame ring per detection worker, must hold one batch")
+    parser.add_argument("--detect-every", type=int, default=1,
+                        help="run the detector every N frames, track in between")
+    parser.add_argument("--adaptive-stride", action="store_true",
+                        help="raise/lower the detection stride to hold --target-fps")
+    parser.add_argument("--target-fps", type=float, default=30.0, help="frame rate held by --adaptive-stride")
+    parser.add_argument("--propagator", choices=["kalman", "flow", "kcf", "csrt"], default="flow",
+                        help="how the locked target is carried over frames without detection")
+    parser.add_argument("--roi", action="store_true",
+                        help="detect on a padded crop around the locked target")
+    parser.add_argument("--roi-pad", type=float, default=3.0, help="ROI size as a multiple of the target bbox")
+    parser.add_argument("--full-sweep-every", type=int, default=10,
+                        help="with --roi, run a full-frame detection every N detections")
+    parser.add_argument("--tiled", action="store_true", help="sliced inference over overlapping tiles")
+    parser.add_argument("--tile-size", type=int, default=640, help="tile edge in frame pixels")
+    parser.add_argument("--tile-overlap", type=float, default=0.2, help="overlap between tiles (0-1)")
+    parser.add_argument("--tile-batch", type=int, default=8, help="tiles per forward pass")
+    parser.add_argument("--video", default="video/drone-flying.mp4", help="video file shown without --gst-source")
+    parser.add_argument("--start", type=float, default=0.0, help="start the video file at this time (seconds)")
+    parser.add_argument("--decoder", choices=DECODERS, default="auto",
+                        help="video file decoder (auto = PyAV when installed, else OpenCV)")
+    parser.add_argument("--decode-threads", type=int, default=0, help="FFmpeg decode threads (0 = one per core)")
+    parser.add_argument("--decode-size", type=parse_size, default=None,
+                        help="scale displayed frames in the decoder, e.g. 1280x720 (default: video size)")
+    parser.add_argument("--decode-inference-size", type=parse_size, default=None,
+                        help="also decode a low-res copy at this size that full-frame detection runs on")
+    parser.add_argument("--read-ahead", type=int, default=0,
+                        help="decode up to N frames ahead on a separate thread (0 = off)")
+    parser.add_argument("--gst-source", choices=GST_SOURCES, default=None,
+                        help="capture through GStreamer instead of the video file (test = videotestsrc)")
+    parser.add_argument("--gst-location", default=None, help="v4l2 device, file path or RTSP URL")
+    parser.add_argument("--gst-capture-size", type=parse_size, default=(1280, 720), help="camera mode, e.g. 1920x1080")
+    parser.add_argument("--gst-output-size", type=parse_size, default=None,
+                        help="size the converter scales displayed frames to (default: capture size)")
+    parser.add_argument("--gst-inference-size", type=parse_size, default=None,
+                        help="downscale each frame to this size for full-frame detection")
+    parser.add_argument("--gst-max-buffers", type=int, default=1, help="frames the appsink keeps before dropping")
+    parser.add_argument("--capture-mode", choices=CAPTURE_MODES, default="paced",
+                        help="paced: one frame per tick (files); latest: always process the newest frame "
+                             "of a live source, one detection in flight, older frames dropped")
+    parser.add_argument("--playback-rate", type=float, default=1.0,
+                        help=f"paced playback speed, {RATE_MIN:g}-{RATE_MAX:g}x the source frame rate")
+    parser.add_argument("--max-throughput", action="store_true",
+                        help="paced mode without waiting: every frame is processed as fast as possible "
+                             "(offline analysis)")
+    parser.add_argument("--video-surface", choices=VIDEO_SURFACES, default="label",
+                        help="frame display: QLabel pixmap, QPainter widget or QOpenGLWidget "
+                             "(the latter two draw the HUD in the same pass)")
+    parser.add_argument("--perf-panel", action="store_true", help="show the per-stage timing panel (F3 toggles)")
+    parser.add_argument("--profile-window", type=float, default=0.0,
+                        help="keep stack samples of the last N seconds; F9 writes them as a pstats file")
+    parser.add_argument("--profile-dir", default=".", help="where F9 profiles are written")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="info")
+    parser.add_argument("--telemetry", default=None,
+                        help="append per-frame telemetry to this file (.jsonl, otherwise raw records)")
+    parser.add_argument("--telemetry-size", type=int, default=4096, help="frames kept in the telemetry ring")
+    args, qt_args = parser.parse_known_args(argv)
+    if args.quantize != "none" and not args.model.lower().endswith(".onnx"):
+        parser.error(f"--quantize {args.quantize} needs an ONNX export of the model, got {args.model} "
+                     f"(yolov5 export.py --include onnx)")
+    return args, qt_args
 
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    window = TrackingSystem()
+    args, qt_args = parse_args()
+    configure_logging(args.log_level)
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = TrackingSystem(args)
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,129 @@
+import math
+import threading
+import time
+import numpy as np
+
+
+# Frame pacing against source presentation timestamps. Each frame is due at
+#     anchor_wall + (pts - anchor_pts) / rate
+# so time spent reading and decoding is absorbed instead of added on top of a
+# fixed interval. The pacer re-anchors on seeks, loops, pauses, rate changes
+# and when it falls more than max_lag behind, instead of bursting to catch up.
+# Frames more than skip_lag late are skipped, so a source faster than the
+# pipeline (or a high rate) still plays at the right speed, showing fewer frames.
+RATE_MIN = 0.25
+RATE_MAX = 8.0
+DEFAULT_FPS = 30.0
+
+
+def clamp_rate(rate):
+    return min(RATE_MAX, max(RATE_MIN, float(rate)))
+
+
+# cap.get(CAP_PROP_FPS) is 0 or nonsense for many live sources
+def source_fps(cap_fps):
+    if not math.isfinite(cap_fps) or not 1.0 <= cap_fps <= 240.0:
+        return DEFAULT_FPS
+    return cap_fps
+
+
+class FramePacer:
+    def __init__(self, fps=DEFAULT_FPS, rate=1.0, max_throughput=False, skip_lag=0.05, max_lag=0.25,
+                 spin=0.0005, samples=600):
+        self.frame_interval = 1.0 / fps
+        self.rate = clamp_rate(rate)
+        self.max_throughput = max_throughput  # never wait: offline analysis as fast as the pipeline runs
+        self.skip_lag = skip_lag
+        self.max_lag = max_lag
+        self.spin = spin  # the last part of a wait is spun for sub-millisecond precision
+        self.resyncs = 0
+        self._anchor = None  # (wall time, pts)
+        self._last_pts = None
+        self._lock = threading.Lock()
+
+        # lateness (release - due) of the last frames, ns; single writer (the capture thread)
+        self.samples = samples
+        self._lateness = np.zeros(samples, dtype=np.int64)
+        self._count = 0
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = clamp_rate(rate)
+            self._anchor = None
+        return self.rate
+
+    def set_max_throughput(self, enabled):
+        with self._lock:
+            self.max_throughput = enabled
+            self._anchor = None
+
+    # drop the anchor: the next frame is shown at once and timed from there
+    def reset(self):
+        with self._lock:
+            self._anchor = None
+            self._last_pts = None
+
+    # source timestamp in seconds; falls back to the previous one plus one
+    # frame when the source reports none or it does not increase
+    def frame_pts(self, pos_msec):
+        pts = pos_msec / 1000.0
+        last = self._last_pts
+        if last is not None and (not math.isfinite(pts) or pts <= last or pts > last + 1.0):
+            pts = last + self.frame_interval
+        elif last is None and not math.isfinite(pts):
+            pts = 0.0
+        self._last_pts = pts
+        return pts
+
+    # seconds until the frame at pts is due (negative: late), None when unpaced
+    def time_until(self, pts):
+        with self._lock:
+            if self.max_throughput or self._anchor is None:
+                return None
+            wall, anchor_pts = self._anchor
+            rate = self.rate
+        return wall + (pts - anchor_pts) / rate - time.perf_counter()
+
+    # a frame late by more than skip_lag can be skipped undecoded
+    def behind(self, pts):
+        delay = self.time_until(pts)
+        return delay is not None and -self.max_lag < delay < -self.skip_lag
+
+    # block until the frame at pts is due -> False if stop_event was set meanwhile
+    def wait(self, pts, stop_event=None):
+        with self._lock:
+            if self.max_throughput:
+                return True
+            if self._anchor is None:
+                self._anchor = (time.perf_counter(), pts)
+            wall, anchor_pts = self._anchor
+            due = wall + (pts - anchor_pts) / self.rate
+
+        delay = due - time.perf_counter()
+        if delay > self.spin:
+            if stop_event is not None:
+                if stop_event.wait(delay - self.spin):
+                    return False
+            else:
+                time.sleep(delay - self.spin)
+        while time.perf_counter() < due:
+            time.sleep(0)
+
+        lateness = time.perf_counter() - due
+        if lateness > self.max_lag:
+            # too far behind (slow decode, debugger, suspended source): restart the clock here
+            with self._lock:
+                self._anchor = (time.perf_counter(), pts)
+            self.resyncs += 1
+        self._lateness[self._count % self.samples] = int(lateness * 1e9)
+        self._count += 1
+        return True
+
+    # -> {rate, p50, p95, p99, max (ms of lateness), resyncs} over the last frames, or None
+    def jitter_stats(self):
+        values = self._lateness[:min(self._count, self.samples)]
+        if not len(values):
+            return None
+        p50, p95, p99 = (np.percentile(values, [50, 95, 99]) / 1e6).tolist()
+        return {"rate": self.rate, "p50": p50, "p95": p95, "p99": p99, "max": float(values.max()) / 1e6,
+                "resyncs": self.resyncs}
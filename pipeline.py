@@ -0,0 +1,451 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import cv2
+from PyQt5.QtCore import *
+
+from detections import empty_detections
+from frame_pool import FramePool
+from pacing import FramePacer, source_fps
+from profiling import profiler
+
+log = logging.getLogger("pipeline")
+
+
+# paced: release frames at their presentation timestamps (video files), see pacing.py.
+# latest: drain the source as fast as it delivers and only decode the first
+# frame grabbed once inference is ready for it; inference runs one detection
+# at a time, so a live source never builds a backlog and results are at most
+# one detection behind.
+CAPTURE_MODES = ("paced", "latest")
+
+# One frame travelling through capture -> inference -> render.
+# The packet owns the pooled buffers behind its arrays: whoever drops a packet
+# calls release(), the render stage releases the capture frame once done.
+class FramePacket:
+    def __init__(self, index, frame_bgr, frame_buffer=None, captured_at=None):
+        self.index = index
+        self.frame_bgr = frame_bgr
+        self.frame_buffer = frame_buffer  # FrameBuffer behind frame_bgr, if pooled
+        self.frame_size = (frame_bgr.shape[1], frame_bgr.shape[0])
+        self.captured_at = time.perf_counter() if captured_at is None else captured_at
+        self.pts = float("nan")  # source presentation timestamp, seconds
+        self.frame_number = -1  # position in the file when it has a frame index
+        self.generation = 0  # seeks done by capture before this frame
+        self.still = False  # first frame after a seek, shown even while paused
+        self.infer_bgr = None  # low-res copy from the capture pipeline's inference branch
+        self.inferred_at = float("nan")  # perf_counter when leaving each stage
+        self.rendered_at = float("nan")
+        self.buffers = []  # pooled render buffers (display, zoom)
+
+        # filled by the inference stage
+        self.detections = empty_detections()
+
+        # filled by the render stage
+        self.display_buffer = None  # pixels behind display_image, a reused render buffer
+        self.display_image = None
+        self.zoom_buffer = None
+        self.zoom_image = None
+        self.target = None
+        self.zoom_target = None
+        self.offset = (0, 0)
+
+    # the capture frame is not read after rendering; hand it back for the next read
+    def release_frame(self):
+        if self.frame_buffer is not None:
+            self.frame_buffer.release()
+            self.frame_buffer = None
+        self.frame_bgr = None
+        self.infer_bgr = None
+
+    def release(self):
+        self.release_frame()
+        for buffer in self.buffers:
+            buffer.release()
+        self.buffers = []
+
+
+# Throughput of a single stage, measured over a rolling one second window.
+# Stages that know when their frame was captured also record its latency.
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.fps = 0.0
+        self.busy_ms = 0.0
+        self.dropped = 0
+        self.latency_ms = None  # mean capture -> this stage over the last window
+        self.latency_max_ms = None
+        self._count = 0
+        self._busy = 0.0
+        self._latencies = []
+        self._window_start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, busy_seconds, latency_seconds=None):
+        with self._lock:
+            self._count += 1
+            self._busy += busy_seconds
+            if latency_seconds is not None:
+                self._latencies.append(latency_seconds)
+            now = time.perf_counter()
+            elapsed = now - self._window_start
+            if elapsed >= 1.0:
+                self.fps = self._count / elapsed
+                self.busy_ms = self._busy / self._count * 1000
+                if self._latencies:
+                    self.latency_ms = sum(self._latencies) / len(self._latencies) * 1000
+                    self.latency_max_ms = max(self._latencies) * 1000
+                self._count = 0
+                self._busy = 0.0
+                self._latencies = []
+                self._window_start = now
+
+    def record_drop(self, count=1):
+        with self._lock:
+            self.dropped += count
+
+
+# put into a bounded queue, discarding the oldest entries when it is full -> discarded entries
+def put_latest(q, item):
+    dropped = []
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                dropped.append(q.get_nowait())
+            except queue.Empty:
+                pass
+
+
+def drain_queue(q):
+    items = []
+    while True:
+        try:
+            items.append(q.get_nowait())
+        except queue.Empty:
+            return items
+
+
+# Capture stage: reads the source at its own rate, never waits for inference.
+# Frames are decoded into buffers of the pool; when all of them are still held
+# downstream it waits for one to come back. In "paced" mode the pacer holds
+# each frame until its timestamp is due and frames that are already a frame
+# late are skipped undecoded; with the pacer in max-throughput mode nothing is
+# skipped and a full queue blocks capture instead. In "latest" mode frames are
+# skipped undecoded until the demand event is set (the inference stage has a
+# free slot); the next frame grabbed is decoded and clears it. Skipped frames
+# are counted as dropped. infer_cap, if given, is read in step with cap
+# (see gst_pipeline.py). Given the FrameIndex of a file source, seek requests
+# are served between frames; the first frame after a seek goes out even while
+# paused, frames read before it are dropped before display.
+class CaptureStage(QThread):
+    def __init__(self, cap, out_queue, pool, pacer, mode="paced", infer_cap=None, demand=None, parent=None):
+        super().__init__(parent)
+        self.cap = cap
+        self.infer_cap = infer_cap
+        self.out_queue = out_queue
+        self.pool = pool
+        self.frame_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        self.pacer = pacer
+        self.mode = mode
+        self.demand = demand  # latest mode: threading.Event, set while inference can take a frame
+        # cameras and streams report no frame count; a file is not drained while paused
+        self.live = not cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+        self.index = None  # FrameIndex, set once built; cap is then a decoders.VideoDecoder
+        self.generation = 0  # seeks done
+        self._seek_request = None  # (frame, exact), the latest request wins
+        self._seek_lock = threading.Lock()
+        self._next_frame = 0  # frame number the next grab returns
+        self._show_next = False
+        self.stats = StageStats("capture")
+        self._stop_event = threading.Event()
+        self._paused = threading.Event()
+
+    def set_paused(self, paused):
+        if paused:
+            self._paused.set()
+        else:
+            self._paused.clear()
+
+    def stop(self):
+        self._stop_event.set()
+
+    # exact=False goes to the keyframe at or before frame (fast, for scrubbing)
+    def request_seek(self, frame, exact=True):
+        with self._seek_lock:
+            self._seek_request = (frame, exact)
+
+    def _seek(self):
+        with self._seek_lock:
+            request, self._seek_request = self._seek_request, None
+        if request is None or self.index is None:
+            return
+        frame, exact = request
+        frame = self.index.clip(frame) if exact else self.index.keyframe_before(frame)
+        if frame != self._next_frame:
+            self.cap.seek_frame(self.index, frame)
+            self._next_frame = frame
+        self.generation += 1
+        self.pacer.reset()
+        for packet in drain_queue(self.out_queue):
+            packet.release()
+        self._show_next = True
+
+    def run(self):
+        index = 0
+        latest = self.mode == "latest"
+        while not self._stop_event.is_set():
+            if self._seek_request is not None:
+                self._seek()
+            if self._paused.is_set() and not self._show_next:
+                # keep a live source drained so playback resumes live
+                if latest and self.live and self.cap.grab():
+                    self._next_frame = -1
+                    continue
+                time.sleep(0.01)
+                self.pacer.reset()
+                continue
+
+            if not self.cap.grab():
+                self._end_of_stream()
+                continue
+            grabbed_at = time.perf_counter()
+            if self.infer_cap is not None:
+                self.infer_cap.grab()
+            pos_msec = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+            pts = self.pacer.frame_pts(pos_msec)
+            frame_number = -1
+            if self.index is not None:
+                frame_number = self.index.frame_at(pos_msec)
+                self._next_frame = frame_number + 1
+            if latest:
+                skip = self.demand is not None and not self.demand.is_set()
+            else:
+                skip = self.pacer.behind(pts)
+            if skip and not self._show_next:
+                self.stats.record_drop()
+                continue
+
+            buffer = self.pool.acquire(self.frame_shape, timeout=0.1)
+            while buffer is None and not latest and not self._stop_event.is_set():
+                buffer = self.pool.acquire(self.frame_shape, timeout=0.1)
+            if buffer is None:
+                self.stats.record_drop()
+                continue
+
+            start = time.perf_counter()
+            start_ns = time.perf_counter_ns()
+            ret, frame_bgr = self.cap.retrieve(image=buffer.array)
+            if not ret:
+                buffer.release()
+                self._end_of_stream()
+                continue
+            profiler.add("capture", start_ns)
+            if frame_bgr is not buffer.array:
+                # the source size differs from what it reported; resize the pool
+                buffer.release()
+                buffer = None
+                self.frame_shape = frame_bgr.shape
+
+            index += 1
+            packet = FramePacket(index, frame_bgr, buffer, grabbed_at)
+            packet.pts = pts
+            packet.frame_number = frame_number
+            packet.generation = self.generation
+            packet.still, self._show_next = self._show_next, False
+            if self.infer_cap is not None:
+                ret, infer_bgr = self.infer_cap.retrieve()
+                if ret:
+                    packet.infer_bgr = infer_bgr
+            busy = time.perf_counter() - start
+
+            if not latest:
+                if not self.pacer.wait(pts, self._stop_event):
+                    packet.release()
+                    break
+                if self.pacer.max_throughput:
+                    self._put_blocking(packet)
+                    self.stats.record(busy)
+                    continue
+            elif self.demand is not None:
+                self.demand.clear()
+            dropped = put_latest(self.out_queue, packet)
+            for packet in dropped:
+                packet.release()
+            if dropped:
+                self.stats.record_drop(len(dropped))
+            self.stats.record(busy)
+
+    # offline analysis: every frame goes through, capture waits for inference
+    def _put_blocking(self, packet):
+        while not self._stop_event.is_set():
+            try:
+                self.out_queue.put(packet, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        packet.release()
+
+    def _end_of_stream(self):
+        # loop the video file
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._next_frame = 0
+        self.pacer.reset()
+
+
+# Generic worker stage: pulls a packet, runs work(packet), hands the result to sink.
+# work may also return a Future resolving to the packet (asynchronous engines).
+# max_in_flight bounds the unresolved Futures: the stage stops pulling until one
+# resolves, so frames wait in the source instead of the engine. ready is set
+# whenever a slot frees, for a producer that only decodes frames on demand.
+class WorkerStage(QThread):
+    def __init__(self, name, work, in_queue, sink, max_in_flight=None, parent=None):
+        super().__init__(parent)
+        self.work = work
+        self.in_queue = in_queue
+        self.sink = sink
+        self.stats = StageStats(name)
+        self._in_flight = threading.Semaphore(max_in_flight) if max_in_flight else None
+        self.ready = threading.Event()
+        self.ready.set()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self._in_flight is not None and not self._in_flight.acquire(timeout=0.1):
+                continue
+            try:
+                packet = self.in_queue.get(timeout=0.1)
+            except queue.Empty:
+                self._done()
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = self.work(packet)
+            except Exception:
+                log.exception("%s stage failed on frame %s", self.stats.name, packet.index)
+                self._done()
+                packet.release()
+                continue
+
+            if isinstance(result, Future):
+                result.add_done_callback(
+                    lambda future, start=start, packet=packet: self._deliver_future(future, start, packet))
+                continue
+
+            self._done()
+            self.stats.record(time.perf_counter() - start)
+            if result is not None:
+                self.sink(result, self.stats, self._stop_event)
+            else:
+                packet.release()
+
+    def _done(self):
+        if self._in_flight is not None:
+            self._in_flight.release()
+            self.ready.set()
+
+    def _deliver_future(self, future, start, packet):
+        self._done()
+        if future.cancelled() or future.exception() is not None:
+            self.stats.record_drop()
+            packet.release()
+            return
+        self.stats.record(time.perf_counter() - start)
+        self.sink(future.result(), self.stats, self._stop_event)
+
+
+# Staged frame pipeline: capture thread -> inference worker -> render stage -> GUI signal
+class FramePipeline(QObject):
+    frame_ready = pyqtSignal(object)
+
+    def __init__(self, cap, infer_fn, render_fn, pacer=None, capture_mode="paced", infer_cap=None,
+                 queue_size=2, max_pending=2, frame_buffers=6, parent=None):
+        super().__init__(parent)
+        self.pacer = pacer if pacer is not None else FramePacer(source_fps(cap.get(cv2.CAP_PROP_FPS)))
+        # latest mode: a single slot, so inference never starts on a frame older than the last grab
+        self.capture_queue = queue.Queue(maxsize=1 if capture_mode == "latest" else queue_size)
+        self.render_queue = queue.Queue(maxsize=queue_size)
+
+        # frames handed to the GUI but not yet presented
+        self._pending = threading.Semaphore(max_pending)
+
+        # decoded frames: capture queue, inference, render queue and render stage
+        self.frame_pool = FramePool(frame_buffers)
+
+        # latest mode: one detection in flight, capture decodes the next frame once it resolves
+        latest = capture_mode == "latest"
+        self.inference_stage = WorkerStage("inference", infer_fn, self.capture_queue, self._to_render,
+                                           max_in_flight=1 if latest else None)
+        self.capture_stage = CaptureStage(cap, self.capture_queue, self.frame_pool, self.pacer, capture_mode,
+                                          infer_cap, demand=self.inference_stage.ready if latest else None)
+        self.render_stage = WorkerStage("render", render_fn, self.render_queue, self._to_gui)
+        self.stages = [self.capture_stage, self.inference_stage, self.render_stage]
+
+        # frames put on screen, with capture -> display latency
+        self.display_stats = StageStats("display")
+
+    # inference -> render: block so rendered frames keep detection order
+    def _to_render(self, packet, stats, stop_event):
+        packet.inferred_at = time.perf_counter()
+        while not stop_event.is_set():
+            try:
+                self.render_queue.put(packet, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    # render -> GUI: drop when the GUI thread is still busy with earlier frames
+    def _to_gui(self, packet, stats, stop_event):
+        packet.rendered_at = time.perf_counter()
+        if packet.generation != self.capture_stage.generation:
+            # read before a seek
+            packet.release()
+            return
+        if self._pending.acquire(blocking=False):
+            self.frame_ready.emit(packet)
+        else:
+            stats.record_drop()
+            packet.release()
+
+    # called by the GUI once a packet emitted by frame_ready has been handled;
+    # releasing the packet's buffers is up to the GUI
+    def frame_presented(self):
+        self._pending.release()
+
+    # called by the GUI right after a packet's frame went to the video surface
+    def frame_shown(self, packet):
+        self.display_stats.record(0.0, time.perf_counter() - packet.captured_at)
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+        for stage in self.stages:
+            stage.wait()
+        for packet in drain_queue(self.capture_queue) + drain_queue(self.render_queue):
+            packet.release()
+
+    def set_paused(self, paused):
+        self.capture_stage.set_paused(paused)
+
+    # enables seek() on a file source
+    def set_index(self, index):
+        self.capture_stage.index = index
+
+    def seek(self, frame, exact=True):
+        self.capture_stage.request_seek(frame, exact)
+
+    def stage_stats(self):
+        return [stage.stats for stage in self.stages] + [self.display_stats]
@@ -0,0 +1,137 @@
+import sys
+import time
+import marshal
+import threading
+import logging
+from collections import deque
+import numpy as np
+
+log = logging.getLogger("profiling")
+
+
+# Stages timed by the app, in pipeline order (panel and dump order)
+PROFILE_STAGES = ("capture", "color", "detect", "track", "recenter", "annotate", "zoom", "qimage",
+                  "present", "hud", "tags")
+
+
+# Rolling per-stage durations. Each stage is timed by one thread, so a stage
+# ring has a single writer; readers take a copy. Usage:
+#     t = time.perf_counter_ns(); ...; profiler.add("recenter", t)
+class StageProfiler:
+    def __init__(self, samples=600):
+        self.samples = samples
+        self._rings = {}  # name -> [int64 durations (ns), count]
+
+    def add(self, name, start_ns):
+        self.add_ns(name, time.perf_counter_ns() - start_ns)
+
+    def add_ns(self, name, duration_ns):
+        ring = self._rings.get(name)
+        if ring is None:
+            ring = self._rings.setdefault(name, [np.zeros(self.samples, dtype=np.int64), 0])
+        ring[0][ring[1] % self.samples] = duration_ns
+        ring[1] += 1
+
+    # -> {name: (p50, p95, p99) in ms} for stages with samples, pipeline order first
+    def percentiles(self):
+        names = [n for n in PROFILE_STAGES if n in self._rings]
+        names += sorted(n for n in self._rings if n not in PROFILE_STAGES)
+        result = {}
+        for name in names:
+            values, count = self._rings[name]
+            values = values[:min(count, self.samples)]
+            if len(values):
+                result[name] = tuple(np.percentile(values, [50, 95, 99]) / 1e6)
+        return result
+
+
+# Shared instance the pipeline stages, renderer and widgets report to
+profiler = StageProfiler()
+
+
+# Low-overhead sampling profiler over all threads: every `interval` seconds
+# the Python stacks are recorded; the last `window` seconds are kept so a
+# profile can be dumped after something slow happened.
+class SamplingProfiler:
+    def __init__(self, window=10.0, interval=0.005):
+        self.window = window
+        self.interval = interval
+        self._samples = deque()  # (time, stack as tuple of code keys, root first)
+        self._keys = {}  # code object -> (filename, first line, name)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _key(self, code):
+        key = self._keys.get(code)
+        if key is None:
+            key = self._keys[code] = (code.co_filename, code.co_firstlineno, code.co_name)
+        return key
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._key(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                stacks.append(tuple(stack))
+            with self._lock:
+                for stack in stacks:
+                    self._samples.append((now, stack))
+                while self._samples and self._samples[0][0] < now - self.window:
+                    self._samples.popleft()
+
+    # Write the kept samples as a pstats file (python -m pstats, snakeviz,
+    # gprof2dot). Times are sample counts x interval; call counts are the
+    # number of samples a function was on the stack.
+    def dump(self, path):
+        with self._lock:
+            samples = list(self._samples)
+        stats = {}  # func -> [cc, nc, tt, ct, callers{func: [cc, nc, tt, ct]}]
+        for _, stack in samples:
+            seen = set()
+            for depth, func in enumerate(stack):
+                entry = stats.get(func)
+                if entry is None:
+                    entry = stats[func] = [0, 0, 0.0, 0.0, {}]
+                leaf = depth == len(stack) - 1
+                if leaf:
+                    entry[2] += self.interval
+                if func not in seen:
+                    # count recursive frames once per sample
+                    seen.add(func)
+                    entry[0] += 1
+                    entry[1] += 1
+                    entry[3] += self.interval
+                if depth:
+                    caller = entry[4].setdefault(stack[depth - 1], [0, 0, 0.0, 0.0])
+                    caller[0] += 1
+                    caller[1] += 1
+                    caller[2] += self.interval if leaf else 0.0
+                    caller[3] += self.interval
+        data = {func: (cc, nc, tt, ct, {caller: tuple(v) for caller, v in callers.items()})
+                for func, (cc, nc, tt, ct, callers) in stats.items()}
+        with open(path, "wb") as f:
+            marshal.dump(data, f)
+        span = samples[-1][0] - samples[0][0] if samples else 0.0
+        log.info("wrote %d stack samples (%.1f s) to %s", len(samples), span, path)
+        return len(samples)
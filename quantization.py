@@ -0,0 +1,111 @@
+import os
+import logging
+import cv2
+
+from backends import preprocess
+
+log = logging.getLogger("quantize")
+
+
+# Quantized detector modes for CPU deployments. The model is quantized from its
+# ONNX export with ONNX Runtime tooling and cached next to the float model.
+QUANT_MODES = ("none", "int8-dynamic", "int8-static", "fp16")
+
+
+def quantized_model_path(model_path, mode):
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.{mode}{ext}"
+
+
+# evenly spaced RGB frames from a recorded video, for static calibration and reports
+def read_video_frames(video_path, count=32, step=None):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"cannot open video {video_path}")
+    if step is None:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        step = max(1, total // count) if total > 0 else 1
+
+    frames = []
+    index = 0
+    while len(frames) < count:
+        if index % step == 0:
+            ret, frame_bgr = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB))
+        elif not cap.grab():
+            break
+        index += 1
+    cap.release()
+    return frames
+
+
+def _calibration_reader(input_name, frames, input_size):
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class VideoCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self._batches = iter([preprocess([frame], input_size)[0] for frame in frames])
+
+        def get_next(self):
+            batch = next(self._batches, None)
+            return None if batch is None else {input_name: batch}
+
+    return VideoCalibrationReader()
+
+
+# class names etc. live in ONNX metadata; keep them on the quantized copy
+def _copy_metadata(src_path, dst_path):
+    import onnx
+    src = onnx.load(src_path, load_external_data=False)
+    dst = onnx.load(dst_path)
+    existing = {prop.key for prop in dst.metadata_props}
+    for prop in src.metadata_props:
+        if prop.key not in existing:
+            dst.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(dst, dst_path)
+
+
+# float ONNX model -> path of the quantized model (built once, then reused)
+def quantize_model(model_path, mode, calibration_video=None, calibration_frames=32,
+                   input_size=640, force=False):
+    if mode == "none":
+        return model_path
+    if mode not in QUANT_MODES:
+        raise ValueError(f"unknown quantization mode {mode}")
+    if not model_path.lower().endswith(".onnx"):
+        raise ValueError("quantized modes need an ONNX export of the model "
+                         "(yolov5 export.py --include onnx)")
+
+    out_path = quantized_model_path(model_path, mode)
+    if (not force and os.path.exists(out_path)
+            and os.path.getmtime(out_path) >= os.path.getmtime(model_path)):
+        return out_path
+
+    log.info("building %s model %s", mode, out_path)
+    if mode == "int8-dynamic":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(model_path, out_path, weight_type=QuantType.QUInt8)
+
+    elif mode == "int8-static":
+        import onnxruntime as ort
+        from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+        if calibration_video is None:
+            raise ValueError("int8-static needs a calibration video")
+        session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+        frames = read_video_frames(calibration_video, calibration_frames)
+        reader = _calibration_reader(input_name, frames, input_size)
+        quantize_static(model_path, out_path, reader, quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                        per_channel=True)
+
+    elif mode == "fp16":
+        import onnx
+        from onnxconverter_common import float16
+        model = onnx.load(model_path)
+        onnx.save(float16.convert_float_to_float16(model, keep_io_types=True), out_path)
+
+    _copy_metadata(model_path, out_path)
+    return out_path
@@ -0,0 +1,166 @@
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+from detector import DetectionEngine
+from detections import iou_matrix
+from quantization import QUANT_MODES, quantize_model, read_video_frames
+from telemetry import configure_logging
+from tracker import linear_assignment
+
+
+# Runs the float and the quantized model over the same recorded frames and
+# reports latency next to detection agreement, to judge if a speedup is safe.
+
+
+def timed_detect(engine, frame):
+    start = time.perf_counter()
+    detections = engine.infer_frames([frame])[0]
+    return detections, (time.perf_counter() - start) * 1000
+
+
+# one-to-one IoU matching between float (reference) and quantized detections
+def match_frame(reference, candidate, iou_threshold):
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0, [], []
+    iou = iou_matrix(reference['bbox'], candidate['bbox'])
+    same_class = reference['class_id'][:, None] == candidate['class_id'][None, :]
+    iou = np.where(same_class, iou, 0.0)
+    pairs = linear_assignment(-iou)
+    pairs = pairs[iou[pairs[:, 0], pairs[:, 1]] >= iou_threshold]
+    ious = iou[pairs[:, 0], pairs[:, 1]].tolist()
+    drift = (candidate['confidence'][pairs[:, 1]] - reference['confidence'][pairs[:, 0]]).tolist()
+    return len(pairs), ious, drift
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"mean": float(np.mean(values)), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+def build_report(float_engine, quant_engine, frames, iou_threshold=0.5, warmup=3):
+    for frame in frames[:warmup]:
+        float_engine.infer_frames([frame])
+        quant_engine.infer_frames([frame])
+
+    float_ms, quant_ms = [], []
+    reference_total = candidate_total = matched_total = 0
+    all_ious, all_drift = [], []
+    per_frame = []
+
+    for index, frame in enumerate(frames):
+        reference, f_ms = timed_detect(float_engine, frame)
+        candidate, q_ms = timed_detect(quant_engine, frame)
+        matched, ious, drift = match_frame(reference, candidate, iou_threshold)
+
+        float_ms.append(f_ms)
+        quant_ms.append(q_ms)
+        reference_total += len(reference)
+        candidate_total += len(candidate)
+        matched_total += matched
+        all_ious += ious
+        all_drift += drift
+        per_frame.append({
+            "frame": index,
+            "float_ms": round(f_ms, 3),
+            "quant_ms": round(q_ms, 3),
+            "float_dets": len(reference),
+            "quant_dets": len(candidate),
+            "matched": matched,
+        })
+
+    float_latency = percentiles(float_ms)
+    quant_latency = percentiles(quant_ms)
+    return {
+        "frames": len(frames),
+        "iou_threshold": iou_threshold,
+        "latency_ms": {"float": float_latency, "quantized": quant_latency},
+        "speedup_p50": float_latency["p50"] / quant_latency["p50"] if quant_latency else None,
+        "agreement": {
+            "float_detections": reference_total,
+            "quantized_detections": candidate_total,
+            "matched": matched_total,
+            # share of float detections the quantized model reproduces
+            "match_rate": matched_total / reference_total if reference_total else 1.0,
+            # matched pairs over all detections of both models
+            "f1": 2 * matched_total / (reference_total + candidate_total)
+            if reference_total + candidate_total else 1.0,
+            "mean_iou": float(np.mean(all_ious)) if all_ious else None,
+            "confidence_drift_mean": float(np.mean(all_drift)) if all_drift else None,
+            "confidence_drift_abs_mean": float(np.mean(np.abs(all_drift))) if all_drift else None,
+        },
+        "per_frame": per_frame,
+    }
+
+
+# value formatted with spec, "n/a" when there is none (no frames, no matches)
+def format_value(value, spec):
+    return "n/a" if value is None else format(value, spec)
+
+
+def print_summary(report, mode):
+    latency = report["latency_ms"]
+    agreement = report["agreement"]
+    print(f"frames: {report['frames']}  mode: {mode}")
+    print(f"{'':10}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+    for name in ("float", "quantized"):
+        stats = latency[name]
+        values = [format_value(stats.get(key), ".2f") for key in ("mean", "p50", "p95", "p99")]
+        print(f"{name:10}" + "".join(f"{value:>9}" for value in values))
+    speedup = report["speedup_p50"]
+    print(f"speedup (p50): {'n/a' if speedup is None else f'{speedup:.2f}x'}")
+    print(f"match rate @IoU{report['iou_threshold']}: {agreement['match_rate'] * 100:.1f}% "
+          f"({agreement['matched']}/{agreement['float_detections']}), F1 {agreement['f1']:.3f}")
+    if agreement["mean_iou"] is not None:
+        print(f"mean IoU: {agreement['mean_iou']:.3f}  "
+              f"confidence drift: {agreement['confidence_drift_mean']:+.2f} "
+              f"(|{agreement['confidence_drift_abs_mean']:.2f}|) pts")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Float vs quantized detector report")
+    parser.add_argument("--model", required=True, help="float ONNX model")
+    parser.add_argument("--mode", choices=QUANT_MODES[1:], default="int8-dynamic")
+    parser.add_argument("--video", default="video/drone-flying.mp4")
+    parser.add_argument("--frames", type=int, default=100, help="frames sampled from the video")
+    parser.add_argument("--input-size", type=int, default=640)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU for a detection to count as matched")
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads for both models")
+    parser.add_argument("--output", default=None, help="write the full report as JSON")
+    args = parser.parse_args(argv)
+    if args.frames < 1:
+        parser.error("--frames must be at least 1")
+    configure_logging()
+
+    try:
+        frames = read_video_frames(args.video, args.frames)
+    except IOError as e:
+        frames = []
+        print(e, file=sys.stderr)
+    if not frames:
+        print(f"no frames sampled from {args.video}", file=sys.stderr)
+        return 1
+
+    options = {"threads": args.threads}
+    quant_path = quantize_model(args.model, args.mode, args.video, input_size=args.input_size)
+    float_engine = DetectionEngine.from_file(args.model, "onnxruntime", args.input_size, backend_options=options)
+    quant_engine = DetectionEngine.from_file(quant_path, "onnxruntime", args.input_size, backend_options=options)
+
+    report = build_report(float_engine, quant_engine, frames, args.iou)
+    report["model"] = args.model
+    report["quantized_model"] = quant_path
+    report["mode"] = args.mode
+
+    print_summary(report, args.mode)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
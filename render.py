@@ -0,0 +1,198 @@
+import time
+import cv2
+import numpy as np
+from PyQt5.QtGui import *
+
+from detections import find_detection, padded_crop
+from frame_pool import FramePool
+from profiling import profiler
+
+
+# HUD readings for a target bbox -> (zoom level, pitch, compass bearing)
+def hud_values(bbox, frame_w, frame_h):
+    x, y, w_box, h_box = bbox
+
+    # Calculate zoom level from object size
+    box_area = w_box * h_box
+    max_area = 80000
+    zoom = min(1.0, max(0.0, box_area / max_area))
+
+    # Calculate pitch
+    obj_cx = x + w_box / 2
+    obj_cy = y + h_box / 2
+    pitch = 90 - (obj_cy / frame_h) * 180
+
+    # Calculate compass
+    bearing = int((obj_cx / frame_w) * 360) % 360
+    return zoom, pitch, bearing
+
+
+# BGR frames can be wrapped by QImage as is since Qt 5.14
+_BGR888 = getattr(QImage, "Format_BGR888", None)
+
+
+# Copy src into dst moved by (dx, dy), black where nothing lands. Same result
+# as warpAffine with an integer translation, but only the overlapping part is
+# copied and only the uncovered borders are cleared.
+def shift_into(src, dst, dx, dy):
+    h, w = src.shape[:2]
+    x0, x1 = max(0, dx), min(w, w + dx)
+    y0, y1 = max(0, dy), min(h, h + dy)
+    if x0 >= x1 or y0 >= y1:
+        dst[:] = 0
+        return dst
+    dst[y0:y1, x0:x1] = src[y0 - dy:y1 - dy, x0 - dx:x1 - dx]
+    dst[:y0] = 0
+    dst[y1:] = 0
+    dst[y0:y1, :x0] = 0
+    dst[y0:y1, x1:] = 0
+    return dst
+
+
+# Render stage: recentering, bbox drawing, zoom crop and QImage conversion.
+# Runs off the GUI thread, so it only touches numpy/cv2 data and QImage.
+# Output images are written into pooled buffers owned by the packet until the
+# GUI releases it; display_buffers covers the frame being rendered, the ones
+# queued for the GUI and the one on screen.
+class FrameRenderer:
+    def __init__(self, ui_manager, display_buffers=4, buffer_timeout=0.5):
+        self.ui_manager = ui_manager
+        self.display_buffers = display_buffers
+        self.buffer_timeout = buffer_timeout
+
+        # view settings, written by the GUI thread
+        self.selected_target_id = 1
+        self.zoom_visible = True
+        self.zoom_size = (320, 240)
+
+        self._pools = {}  # buffer name -> FramePool
+        self.frame_buffers = []  # pooled buffers taken for the current frame
+
+        # new memory taken by the render stage
+        self.bytes_allocated = 0  # during the last frame
+        self.bytes_allocated_total = 0
+
+    # buffers taken until the next call are appended to `buffers`; their owner releases them
+    def start_frame(self, buffers=None):
+        self.bytes_allocated = 0
+        self.frame_buffers = [] if buffers is None else buffers
+
+    def _allocated(self, nbytes):
+        self.bytes_allocated += nbytes
+        self.bytes_allocated_total += nbytes
+
+    # array from the named pool; a one-off array if everything is still held downstream
+    def _buffer(self, name, shape):
+        pool = self._pools.get(name)
+        if pool is None:
+            pool = self._pools[name] = FramePool(self.display_buffers)
+        allocated = pool.bytes_allocated
+        buffer = pool.acquire(shape, timeout=self.buffer_timeout)
+        if buffer is None:
+            array = np.empty(shape, dtype=np.uint8)
+            self._allocated(array.nbytes)
+            return array
+        self._allocated(pool.bytes_allocated - allocated)
+        self.frame_buffers.append(buffer)
+        return buffer.array
+
+    def render(self, packet):
+        self.start_frame(packet.buffers)
+        detections = packet.detections
+        selected_target_id = self.selected_target_id
+        frame_bgr = packet.frame_bgr
+
+        target = find_detection(detections, selected_target_id)
+        start = time.perf_counter_ns()
+        display, offset = self.recenter(frame_bgr, target)
+        profiler.add("recenter", start)
+
+        # show text status
+        start = time.perf_counter_ns()
+        if len(detections) == 0:
+            self.ui_manager.draw_no_detection_message(display)
+
+        self.draw_boxes(display, detections, selected_target_id, offset)
+        profiler.add("annotate", start)
+
+        start = time.perf_counter_ns()
+        packet.display_buffer, packet.display_image = self.to_qimage(display)
+        profiler.add("qimage", start)
+        packet.target = target
+        packet.offset = offset
+
+        if self.zoom_visible:
+            zoom_target = target
+            if zoom_target is None and len(detections) > 0:
+                zoom_target = detections[0]
+            if zoom_target is not None:
+                start = time.perf_counter_ns()
+                packet.zoom_buffer, packet.zoom_image = self.zoom_view(
+                    frame_bgr, detections, zoom_target, selected_target_id)
+                profiler.add("zoom", start)
+                if packet.zoom_image is not None:
+                    packet.zoom_target = zoom_target
+
+        packet.release_frame()
+        return packet
+
+    # Center object in the frame -> (shifted copy in a display buffer, (offset_x, offset_y))
+    def recenter(self, frame_bgr, target):
+        offset_x = offset_y = 0
+        if target is not None:
+            x, y, w_box, h_box = target['bbox'].tolist()
+            obj_cx = x + w_box / 2
+            obj_cy = y + h_box / 2
+
+            # Calculate offset
+            screen_cx = frame_bgr.shape[1] // 2
+            screen_cy = frame_bgr.shape[0] // 2
+            offset_x = int(screen_cx - obj_cx)
+            offset_y = int(screen_cy - obj_cy)
+
+        display = self._buffer("display", frame_bgr.shape)
+        shift_into(frame_bgr, display, offset_x, offset_y)
+        return display, (offset_x, offset_y)
+
+    # Draw bounding boxes on the shifted frame
+    def draw_boxes(self, frame_bgr, detections, selected_target_id, offset):
+        offset_x, offset_y = offset
+        for drone_id, (x, y, w_box, h_box) in zip(detections['id'].tolist(), detections['bbox'].tolist()):
+            x_new = int(x + offset_x)
+            y_new = int(y + offset_y)
+
+            if 0 <= x_new < frame_bgr.shape[1] and 0 <= y_new < frame_bgr.shape[0]:
+                color = (0, 255, 0)
+                if selected_target_id == drone_id:
+                    color = (0, 0, 255)
+
+                cv2.rectangle(frame_bgr, (x_new, y_new), (x_new + w_box, y_new + h_box), color, 1)
+
+    # Frame -> (pixel buffer, QImage wrapping it); BGR is wrapped without conversion
+    def to_qimage(self, frame_bgr):
+        h, w = frame_bgr.shape[:2]
+        if _BGR888 is not None:
+            return frame_bgr, QImage(frame_bgr.data, w, h, frame_bgr.strides[0], _BGR888)
+        frame_rgb = self._buffer(f"rgb{w}x{h}", frame_bgr.shape)
+        cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=frame_rgb)
+        return frame_rgb, QImage(frame_rgb.data, w, h, frame_rgb.strides[0], QImage.Format_RGB888)
+
+    # Zoom View crop around the target -> (pixel buffer, QImage) or (None, None).
+    # Only the crop is copied; boxes are drawn on it in crop coordinates.
+    def zoom_view(self, frame_bgr, detections, zoom_target, selected_target_id=None):
+        x, y, w_box, h_box = zoom_target['bbox'].tolist()
+        x1, y1, x2, y2 = padded_crop((x, y, w_box, h_box), 1.5, frame_bgr.shape)
+        if x2 <= x1 or y2 <= y1:
+            return None, None
+
+        zoom_crop = frame_bgr[y1:y2, x1:x2].copy()
+        self._allocated(zoom_crop.nbytes)
+        for drone_id, (bx, by, bw, bh) in zip(detections['id'].tolist(), detections['bbox'].tolist()):
+            color = (0, 0, 255) if selected_target_id == drone_id else (0, 255, 0)
+            cv2.rectangle(zoom_crop, (bx - x1, by - y1), (bx - x1 + bw, by - y1 + bh), color, 1)
+        cv2.rectangle(zoom_crop, (x - x1, y - y1), (x - x1 + w_box, y - y1 + h_box), (0, 0, 255), 1)
+
+        zoom_w, zoom_h = self.zoom_size
+        zoom_resized = self._buffer("zoom", (zoom_h, zoom_w, 3))
+        cv2.resize(zoom_crop, (zoom_w, zoom_h), dst=zoom_resized)
+        return self.to_qimage(zoom_resized)
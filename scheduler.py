@@ -0,0 +1,282 @@
+import math
+import logging
+import time
+from concurrent.futures import Future
+import cv2
+import numpy as np
+
+from detections import find_detection, offset_detections, padded_crop, scale_detections
+from profiling import profiler
+
+log = logging.getLogger("scheduler")
+
+
+# Cheap per-target tracker used on frames the detector skips.
+# "flow" runs pyramidal Lucas-Kanade on a padded crop around the bbox,
+# "kcf" / "csrt" use the OpenCV trackers when the build provides them.
+class TargetPropagator:
+    def __init__(self, method="flow", pad=1.5, max_points=40):
+        self.method = method
+        self.pad = pad
+        self.max_points = max_points
+        self.reset()
+
+        if method in ("kcf", "csrt") and self._tracker_factory() is None:
+            log.warning("OpenCV %s tracker not available, using optical flow", method.upper())
+            self.method = "flow"
+
+    def reset(self):
+        self.track_id = None
+        self.bbox = None
+        self._tracker = None
+        self._prev_gray = None
+        self._crop_origin = None
+        self._points = None
+
+    @property
+    def active(self):
+        return self.bbox is not None
+
+    def _tracker_factory(self):
+        name = "TrackerKCF_create" if self.method == "kcf" else "TrackerCSRT_create"
+        factory = getattr(cv2, name, None)
+        if factory is None and hasattr(cv2, "legacy"):
+            factory = getattr(cv2.legacy, name, None)
+        return factory
+
+    def _crop_region(self, bbox, frame_shape):
+        return padded_crop(bbox, self.pad, frame_shape, min_size=16)
+
+    def init(self, frame_bgr, bbox, track_id):
+        self.reset()
+        bbox = [int(v) for v in bbox]
+        if bbox[2] <= 0 or bbox[3] <= 0:
+            return
+
+        if self.method == "flow":
+            x1, y1, x2, y2 = self._crop_region(bbox, frame_bgr.shape)
+            gray = cv2.cvtColor(frame_bgr[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+            points = self._find_points(gray, bbox, (x1, y1))
+            if points is None:
+                return
+            self._prev_gray = gray
+            self._crop_origin = (x1, y1)
+            self._points = points
+        else:
+            self._tracker = self._tracker_factory()()
+            self._tracker.init(frame_bgr, tuple(bbox))
+
+        self.bbox = bbox
+        self.track_id = track_id
+
+    def _find_points(self, gray, bbox, origin):
+        mask = np.zeros_like(gray)
+        x, y, w, h = bbox
+        bx, by = x - origin[0], y - origin[1]
+        mask[max(by, 0):max(by + h, 0), max(bx, 0):max(bx + w, 0)] = 255
+        return cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 3, mask=mask)
+
+    # new bbox for the current frame, or None when the target was lost
+    def propagate(self, frame_bgr):
+        if not self.active:
+            return None
+
+        if self._tracker is not None:
+            ok, bbox = self._tracker.update(frame_bgr)
+            if not ok:
+                self.reset()
+                return None
+            self.bbox = [int(v) for v in bbox]
+            return self.bbox
+
+        # same crop window as the previous frame so point coordinates line up
+        x1, y1 = self._crop_origin
+        h, w = self._prev_gray.shape
+        gray = cv2.cvtColor(frame_bgr[y1:y1 + h, x1:x1 + w], cv2.COLOR_BGR2GRAY)
+        if gray.shape != self._prev_gray.shape:
+            self.reset()
+            return None
+
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(
+            self._prev_gray, gray, self._points, None, winSize=(15, 15), maxLevel=2)
+        good = status.reshape(-1) == 1
+        if good.sum() < 3:
+            self.reset()
+            return None
+        old = self._points.reshape(-1, 2)[good]
+        new = new_points.reshape(-1, 2)[good]
+
+        # translation = median displacement, scale = ratio of spread around the centroid
+        dx, dy = np.median(new - old, axis=0)
+        old_spread = np.median(np.linalg.norm(old - old.mean(axis=0), axis=1))
+        new_spread = np.median(np.linalg.norm(new - new.mean(axis=0), axis=1))
+        scale = float(np.clip(new_spread / old_spread, 0.8, 1.25)) if old_spread > 1 else 1.0
+
+        x, y, bw, bh = self.bbox
+        cx, cy = x + bw / 2 + dx, y + bh / 2 + dy
+        bw, bh = bw * scale, bh * scale
+        self.bbox = [int(cx - bw / 2), int(cy - bh / 2), max(1, int(bw)), max(1, int(bh))]
+
+        # re-anchor the crop on the moved bbox for the next frame
+        nx1, ny1, nx2, ny2 = self._crop_region(self.bbox, frame_bgr.shape)
+        self._prev_gray = cv2.cvtColor(frame_bgr[ny1:ny2, nx1:nx2], cv2.COLOR_BGR2GRAY)
+        points = (new + (x1 - nx1, y1 - ny1)).astype(np.float32).reshape(-1, 1, 2)
+        if len(points) < self.max_points // 2:
+            found = self._find_points(self._prev_gray, self.bbox, (nx1, ny1))
+            if found is not None:
+                points = found
+        self._crop_origin = (nx1, ny1)
+        self._points = points
+        return self.bbox
+
+
+# Decides which frames go through the detector. Fixed stride, or adaptive:
+# the stride follows detector latency so that detection cost amortized over
+# the stride fits the frame budget of target_fps.
+# With roi_inference, detection on a locked target runs on a padded crop
+# around it, with a full-frame sweep every full_sweep_every detections.
+class DetectionScheduler:
+    def __init__(self, tracker, detect_async, stride=1, adaptive=False, target_fps=30.0,
+                 min_stride=1, max_stride=8, propagator=None, target_id_fn=None,
+                 roi_inference=False, roi_pad=3.0, roi_min_size=320, full_sweep_every=10):
+        self.tracker = tracker
+        self.detect_async = detect_async
+        self.stride = max(1, int(stride))
+        self.adaptive = adaptive
+        self.target_fps = target_fps
+        self.min_stride = max(1, int(min_stride))
+        self.max_stride = max(self.min_stride, int(max_stride))
+        self.propagator = propagator
+        self.target_id_fn = target_id_fn
+        self.roi_inference = roi_inference
+        self.roi_pad = roi_pad
+        self.roi_min_size = roi_min_size
+        self.full_sweep_every = max(1, int(full_sweep_every))
+
+        self.detect_ms = 0.0     # EMA of detector latency
+        self.track_ms = 0.0      # EMA of tracking work per frame
+        self.detected_frames = 0
+        self.propagated_frames = 0
+        self.roi_frames = 0
+
+        self._since_detection = None
+        self._since_sweep = 0
+        self._target_bbox = None
+        self._last = Future()
+        self._last.set_result(None)
+
+    def should_detect(self):
+        if self._since_detection is None or self._since_detection + 1 >= self.stride:
+            self._since_detection = 0
+            return True
+        self._since_detection += 1
+        return False
+
+    # inference stage entry: returns a Future resolving to the packet with tracked detections.
+    # Results are chained frame to frame so tracking always sees frames in order.
+    def process(self, packet):
+        run_detector = self.should_detect()
+        done = Future()
+        previous = self._last
+        self._last = done
+
+        def finish(detections, region=None):
+            try:
+                start = time.perf_counter()
+                packet.detections = self._track(packet, detections, region)
+                elapsed = time.perf_counter() - start
+                self.track_ms = _ema(self.track_ms, elapsed * 1000)
+                profiler.add_ns("track", int(elapsed * 1e9))
+                self._adapt()
+                done.set_result(packet)
+            except Exception as e:
+                done.set_exception(e)
+
+        if run_detector:
+            started = time.perf_counter()
+            frame, region = self._detection_region(packet.frame_bgr)
+            scale = None
+            if region is None and packet.infer_bgr is not None:
+                # full-frame pass on the capture pipeline's low-res inference branch
+                frame = packet.infer_bgr
+                scale = (packet.frame_size[0] / frame.shape[1], packet.frame_size[1] / frame.shape[0])
+            # the only color conversion, on just the pixels the detector sees
+            color_start = time.perf_counter_ns()
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            profiler.add("color", color_start)
+
+            def on_detected(future):
+                detections = None
+                if not future.cancelled() and future.exception() is None:
+                    detections = future.result()
+                    elapsed = time.perf_counter() - started
+                    self.detect_ms = _ema(self.detect_ms, elapsed * 1000)
+                    profiler.add_ns("detect", int(elapsed * 1e9))
+                    if region is not None:
+                        detections = offset_detections(detections, region[0], region[1])
+                    if scale is not None:
+                        detections = scale_detections(detections, *scale)
+                previous.add_done_callback(lambda _: finish(detections, region))
+
+            self.detect_async(frame).add_done_callback(on_detected)
+        else:
+            previous.add_done_callback(lambda _: finish(None))
+        return done
+
+    # full frame, or a padded crop view around the last known target -> (frame, region)
+    def _detection_region(self, frame):
+        target_bbox = self._target_bbox
+        if not self.roi_inference or target_bbox is None:
+            self._since_sweep = 0
+            return frame, None
+
+        self._since_sweep += 1
+        if self._since_sweep >= self.full_sweep_every:
+            self._since_sweep = 0
+            return frame, None
+
+        x1, y1, x2, y2 = padded_crop(target_bbox, self.roi_pad, frame.shape, self.roi_min_size)
+        if x2 - x1 <= 0 or y2 - y1 <= 0:
+            return frame, None
+        self.roi_frames += 1
+        return frame[y1:y2, x1:x2], (x1, y1, x2, y2)
+
+    def _track(self, packet, detections, region=None):
+        target_id = self.target_id_fn() if self.target_id_fn is not None else None
+
+        if detections is not None:
+            self.detected_frames += 1
+            tracked = self.tracker.update(detections, region)
+            target = find_detection(tracked, target_id)
+            self._target_bbox = target['bbox'].tolist() if target is not None else None
+            if self.propagator is not None:
+                if target is not None and (self.stride > 1 or self.adaptive):
+                    self.propagator.init(packet.frame_bgr, target['bbox'].tolist(), target_id)
+                else:
+                    self.propagator.reset()
+            return tracked
+
+        self.propagated_frames += 1
+        tracked = self.tracker.predict()
+        propagator = self.propagator
+        if propagator is not None and propagator.active and propagator.track_id == target_id:
+            bbox = propagator.propagate(packet.frame_bgr)
+            if bbox is not None and self.tracker.correct(target_id, bbox):
+                tracked['bbox'][tracked['id'] == target_id] = bbox
+        target = find_detection(tracked, target_id)
+        self._target_bbox = target['bbox'].tolist() if target is not None else None
+        return tracked
+
+    def _adapt(self):
+        if not self.adaptive or self.detect_ms <= 0:
+            return
+        budget_ms = 1000.0 / self.target_fps
+        spare_ms = max(budget_ms - self.track_ms, budget_ms * 0.1)
+        stride = math.ceil(self.detect_ms / spare_ms)
+        self.stride = int(min(self.max_stride, max(self.min_stride, stride)))
+
+
+def _ema(current, sample, alpha=0.1):
+    if current <= 0:
+        return sample
+    return current + alpha * (sample - current)
@@ -0,0 +1,120 @@
+import json
+import logging
+import math
+import threading
+import numpy as np
+
+
+# Per-frame telemetry: one fixed-size record per shown frame in a preallocated
+# ring, written by the GUI thread without locks or string formatting. A
+# background TelemetryWriter copies new records to a file. Free-form messages
+# go through the logging module with lazy %-formatting, so disabled levels
+# cost one level check.
+
+log = logging.getLogger(__name__)
+
+LOG_LEVELS = ("debug", "info", "warning", "error")
+
+# Times are perf_counter seconds. NaN = not known for this frame.
+FRAME_RECORD_DTYPE = np.dtype([
+    ('frame', np.int64),
+    ('captured_at', np.float64),
+    ('inferred_at', np.float64),
+    ('rendered_at', np.float64),
+    ('shown_at', np.float64),
+    ('detections', np.int32),
+    ('target_id', np.int32),        # -1 = no target
+    ('bbox', np.int32, (4,)),       # x, y, w, h of the target
+    ('zoom', np.float32),
+    ('focus', np.float32),
+    ('pitch', np.float32),
+    ('heading', np.float32),
+])
+
+
+def configure_logging(level="info"):
+    logging.basicConfig(level=getattr(logging, level.upper()), format="[%(name)s] %(message)s")
+
+
+# Single-writer ring: the writer fills slot count % capacity, then bumps
+# count. Readers only look at slots below count; if they fall more than
+# capacity behind, the overwritten records are reported as lost.
+class TelemetryRing:
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.records = np.zeros(capacity, dtype=FRAME_RECORD_DTYPE)
+        self.count = 0  # records ever written
+
+    def record(self, packet, shown_at, target=None, zoom=np.nan, focus=np.nan, pitch=np.nan, heading=np.nan):
+        if target is not None:
+            target_id, bbox = target['id'], target['bbox']
+        else:
+            target_id, bbox = -1, (0, 0, 0, 0)
+        self.records[self.count % self.capacity] = (
+            packet.index, packet.captured_at, packet.inferred_at, packet.rendered_at, shown_at,
+            len(packet.detections), target_id, bbox, zoom, focus, pitch, heading)
+        self.count += 1
+
+    # records written since `start` (a count) -> (copy of the records, new start, lost)
+    def read_since(self, start):
+        end = self.count
+        lost = max(0, end - start - self.capacity)
+        start += lost
+        index = np.arange(start, end) % self.capacity
+        return self.records[index], end, lost
+
+    def latest(self, n):
+        return self.read_since(max(0, self.count - n))[0]
+
+
+# Background flusher: appends new ring records to path every `interval`
+# seconds. ".jsonl" writes one JSON object per record; anything else writes
+# raw FRAME_RECORD_DTYPE records (np.fromfile(path, FRAME_RECORD_DTYPE)).
+class TelemetryWriter:
+    def __init__(self, ring, path, interval=1.0):
+        self.ring = ring
+        self.path = path
+        self.interval = interval
+        self.jsonl = path.endswith(".jsonl")
+        self.written = 0
+        self.lost = 0
+        self._next = ring.count
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        with open(self.path, "a" if self.jsonl else "ab") as f:
+            while not self._stop_event.wait(self.interval):
+                self.flush(f)
+            self.flush(f)
+
+    def flush(self, f):
+        records, self._next, lost = self.ring.read_since(self._next)
+        if lost:
+            self.lost += lost
+            log.warning("telemetry writer fell behind, %d records lost", lost)
+        if not len(records):
+            return
+        if self.jsonl:
+            names = records.dtype.names
+            for values in records.tolist():
+                row = {name: None if isinstance(value, float) and math.isnan(value) else value
+                       for name, value in zip(names, values)}
+                row['bbox'] = row['bbox'].tolist()
+                f.write(json.dumps(row) + "\n")
+        else:
+            records.tofile(f)
+        f.flush()
+        self.written += len(records)
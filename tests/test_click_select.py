@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from PyQt5.QtCore import QEvent, QPointF, Qt
+from PyQt5.QtGui import QMouseEvent
+
+import main
+from detections import DETECTION_DTYPE
+from pipeline import FramePacket
+
+
+@pytest.fixture
+def window(qapp):
+    args, _ = main.parse_args([])
+    window = main.TrackingSystem(args)
+    # frames are fed by the test, not by the video
+    window.pipeline.stop()
+    yield window
+    window.close()
+
+
+def make_packet(boxes, frame_size=(1280, 720)):
+    w, h = frame_size
+    packet = FramePacket(1, np.zeros((h, w, 3), dtype=np.uint8))
+    detections = np.zeros(len(boxes), dtype=DETECTION_DTYPE)
+    for row, (track_id, bbox) in zip(detections, boxes.items()):
+        row['id'] = track_id
+        row['bbox'] = bbox
+        row['confidence'] = 90.0
+        row['type'] = "drone"
+    packet.detections = detections
+    return packet
+
+
+def click(window, frame_x, frame_y, frame_size=(1280, 720)):
+    # frame pixels on the shown (recentered) display -> widget coordinates
+    x = frame_x * window.video_label.width() / frame_size[0]
+    y = frame_y * window.video_label.height() / frame_size[1]
+    window.mousePressEvent(QMouseEvent(QEvent.MouseButtonPress, QPointF(x, y), Qt.LeftButton,
+                                       Qt.LeftButton, Qt.NoModifier))
+
+
+def show(window, packet):
+    window.renderer.render(packet)
+    assert window.show_packet(packet)
+
+
+def test_click_on_box_selects_it(window):
+    show(window, make_packet({3: (100, 100, 50, 40), 7: (300, 200, 60, 40)}))
+    click(window, 330, 220)
+    assert window.selected_target_id == 7
+
+
+def test_click_on_box_of_recentered_display(window):
+    # with a locked target the display is shifted to center it
+    window.selected_target_id = window.renderer.selected_target_id = 3
+    packet = make_packet({3: (100, 100, 50, 40), 7: (300, 200, 60, 40)})
+    show(window, packet)
+    dx, dy = packet.offset
+    assert (dx, dy) != (0, 0)
+
+    click(window, 330 + dx, 220 + dy)
+    assert window.selected_target_id == 7
+
+
+def test_click_outside_boxes_keeps_selection(window):
+    window.selected_target_id = window.renderer.selected_target_id = 3
+    show(window, make_packet({3: (100, 100, 50, 40), 7: (300, 200, 60, 40)}))
+    click(window, 5, 700)
+    assert window.selected_target_id == 3
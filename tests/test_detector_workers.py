@@ -0,0 +1,81 @@
+import os
+import signal
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+import numpy as np
+import pytest
+
+from backends import DetectorBackend
+from detector_workers import ProcessDetectionEngine
+
+
+# Slow one-box model; a module-level class so worker processes can import it
+class SlowBackend(DetectorBackend):
+    name = "slow"
+
+    def __init__(self, model_path, input_size=640, names=None, threads=None):
+        super().__init__(input_size, ["drone"])
+
+    def infer(self, batch):
+        time.sleep(0.3)
+        out = np.zeros((len(batch), 1, 6), dtype=np.float32)
+        out[:, 0] = [320, 320, 40, 30, 0.9, 1.0]
+        return out
+
+
+@pytest.fixture
+def engine():
+    engine = ProcessDetectionEngine.from_file("none", backend=SlowBackend, workers=2, input_size=640,
+                                              max_batch_size=1, ring_bytes=8 * 2 ** 20)
+    engine.start()
+    yield engine
+    engine.stop()
+
+
+def frame():
+    return np.zeros((360, 640, 3), dtype=np.uint8)
+
+
+def wait_done(futures, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    for future in futures:
+        try:
+            future.exception(timeout=max(0.0, deadline - time.perf_counter()))
+        except FutureTimeout:
+            pytest.fail("detection future never resolved")
+
+
+def test_results_from_workers(engine):
+    futures = [engine.submit(frame()) for _ in range(4)]
+    wait_done(futures)
+    assert all(len(f.result()) == 1 for f in futures)
+
+
+def test_killed_worker_fails_its_batches(engine):
+    futures = [engine.submit(frame()) for _ in range(6)]
+    time.sleep(0.1)
+    os.kill(engine._processes[0].pid, signal.SIGKILL)
+
+    wait_done(futures)
+    failed = [f for f in futures if f.exception() is not None]
+    assert failed
+    assert all(isinstance(f.exception(), RuntimeError) for f in failed)
+
+    # the surviving worker takes the new work
+    later = [engine.submit(frame()) for _ in range(3)]
+    wait_done(later)
+    assert all(f.exception() is None and len(f.result()) == 1 for f in later)
+
+
+def test_all_workers_killed_fails_pending_and_new_requests(engine):
+    futures = [engine.submit(frame()) for _ in range(4)]
+    time.sleep(0.1)
+    for process in engine._processes:
+        os.kill(process.pid, signal.SIGKILL)
+
+    wait_done(futures)
+    assert all(isinstance(f.exception(), RuntimeError) for f in futures)
+
+    later = engine.submit(frame())
+    wait_done([later])
+    assert isinstance(later.exception(), RuntimeError)
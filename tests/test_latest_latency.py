@@ -0,0 +1,125 @@
+import time
+import cv2
+import numpy as np
+import pytest
+from PyQt5.QtCore import Qt
+
+from backends import DetectorBackend
+from detector import DetectionEngine
+from pipeline import FramePipeline
+from scheduler import DetectionScheduler
+from tracker import MultiObjectTracker
+
+FPS = 30.0
+DETECT_SECONDS = 0.08
+
+
+# Live camera: grab() blocks until the next frame is due, every frame is delivered
+class LiveSource:
+    def __init__(self, size=(640, 360)):
+        self.size = size
+        self.started = time.perf_counter()
+        self.grabbed = 0
+        self.retrieved = 0
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.size[0], cv2.CAP_PROP_FRAME_HEIGHT: self.size[1],
+                cv2.CAP_PROP_FPS: FPS, cv2.CAP_PROP_POS_MSEC: self.grabbed * 1000 / FPS}.get(prop, 0.0)
+
+    def set(self, prop, value):
+        return False
+
+    def grab(self):
+        delay = self.started + self.grabbed / FPS - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.grabbed += 1
+        return True
+
+    def retrieve(self, image=None):
+        self.retrieved += 1
+        if image is None:
+            image = np.zeros((self.size[1], self.size[0], 3), np.uint8)
+        return True, image
+
+
+# grab() returns at once: an ended stream (False) or a file decoding as fast as it can
+class InstantSource(LiveSource):
+    def __init__(self, frame_count, grab_result):
+        super().__init__()
+        self.frame_count = frame_count
+        self.grab_result = grab_result
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        return super().get(prop)
+
+    def grab(self):
+        self.grabbed += 1
+        return self.grab_result
+
+
+class FixedTimeBackend(DetectorBackend):
+    name = "fixed"
+
+    def __init__(self):
+        super().__init__(320, ["drone"])
+
+    def infer(self, batch):
+        time.sleep(DETECT_SECONDS)
+        return np.zeros((len(batch), 0, 6), dtype=np.float32)
+
+
+def render(packet):
+    packet.release_frame()
+    return packet
+
+
+@pytest.mark.parametrize("batch_size", [1, 4])
+def test_latest_mode_keeps_latency_near_one_detection(qapp, batch_size):
+    engine = DetectionEngine(FixedTimeBackend(), max_batch_size=batch_size, max_latency=0.02)
+    engine.start()
+    scheduler = DetectionScheduler(MultiObjectTracker(), engine.submit)
+    source = LiveSource()
+    pipeline = FramePipeline(source, scheduler.process, render, capture_mode="latest")
+
+    latencies = []
+
+    def shown(packet):
+        latencies.append(time.perf_counter() - packet.captured_at)
+        packet.release()
+        pipeline.frame_presented()
+
+    pipeline.frame_ready.connect(shown, Qt.DirectConnection)
+    pipeline.start()
+    time.sleep(3.0)
+    pipeline.stop()
+    engine.stop()
+
+    assert len(latencies) > 10
+    # a frame waits at most for the detection already running, then runs its own
+    assert np.median(latencies) < 2 * DETECT_SECONDS + 1 / FPS
+    # only the frames detection runs on are decoded, about one per detection
+    assert source.retrieved < source.grabbed / 2
+
+
+def test_discard_queued_cancels_waiting_requests():
+    engine = DetectionEngine(FixedTimeBackend(), max_batch_size=1)
+    frame = np.zeros((360, 640, 3), np.uint8)
+    futures = [engine.submit(frame) for _ in range(2)]
+    assert engine.discard_queued() == 2
+    assert all(future.cancelled() for future in futures)
+
+
+# live stream that ended, video file: neither is grabbed in a busy loop while paused
+@pytest.mark.parametrize("frame_count, grab_result", [(0, False), (300, True)])
+def test_paused_latest_capture_does_not_spin(qapp, frame_count, grab_result):
+    source = InstantSource(frame_count, grab_result)
+    pipeline = FramePipeline(source, lambda packet: packet, render, capture_mode="latest")
+    pipeline.set_paused(True)
+    pipeline.capture_stage.start()
+    time.sleep(0.5)
+    pipeline.stop()
+
+    assert source.grabbed < 100
@@ -0,0 +1,20 @@
+import numpy as np
+
+from decoders import open_decoder
+
+VIDEO = "video/drone-flying.mp4"
+
+
+def test_retrieve_without_a_matching_image_hands_out_a_copy():
+    decoder = open_decoder(VIDEO, "opencv", read_ahead=2)
+    try:
+        assert decoder.grab()
+        ret, first = decoder.retrieve(np.zeros((2, 2, 3), np.uint8))
+        assert ret
+        kept = first.copy()
+        # enough frames to wrap around the reader's ring
+        for _ in range(8):
+            assert decoder.read()[0]
+        assert np.array_equal(first, kept)
+    finally:
+        decoder.release()
@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+from detections import empty_detections, nms, offset_detections
+
+
+# overlapping tile windows covering the frame -> list of (x1, y1, x2, y2)
+def tile_grid(frame_shape, tile_size, overlap=0.2):
+    h, w = frame_shape[:2]
+    step = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)  # last tile flush with the edge
+        return positions
+
+    return [(x, y, min(x + tile_size, w), min(y + tile_size, h))
+            for y in starts(h) for x in starts(w)]
+
+
+# Sliced inference: tiles the frame with overlap so small distant drones keep
+# their pixels, sends all tiles through the engine together and merges the
+# per-tile detections with cross-tile NMS.
+class TiledDetector:
+    def __init__(self, engine, tile_size=640, overlap=0.2, batch_size=8,
+                 iou_threshold=0.45, include_full_frame=True):
+        self.engine = engine
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.batch_size = max(1, int(batch_size))
+        self.iou_threshold = iou_threshold
+        self.include_full_frame = include_full_frame
+
+    def detect(self, frame):
+        return self.detect_async(frame).result()
+
+    # Future resolving to the merged detections of the whole frame
+    def detect_async(self, frame):
+        windows = tile_grid(frame.shape, self.tile_size, self.overlap)
+        if len(windows) == 1:
+            return self.engine.submit(frame)
+
+        tiles = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+        origins = [(x1, y1) for x1, y1, _, _ in windows]
+        if self.include_full_frame:
+            # catches objects larger than a tile
+            tiles.append(frame)
+            origins.append((0, 0))
+
+        chunks = [(tiles[i:i + self.batch_size], origins[i:i + self.batch_size])
+                  for i in range(0, len(tiles), self.batch_size)]
+
+        merged = Future()
+        results = [None] * len(chunks)
+        remaining = [len(chunks)]
+        lock = threading.Lock()
+
+        def on_chunk(index, future):
+            if future.cancelled() or future.exception() is not None:
+                with lock:
+                    if not merged.done():
+                        if future.cancelled():
+                            merged.cancel()
+                        else:
+                            merged.set_exception(future.exception())
+                return
+
+            _, chunk_origins = chunks[index]
+            results[index] = [offset_detections(detections, x, y)
+                              for detections, (x, y) in zip(future.result(), chunk_origins)]
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] or merged.done():
+                    return
+            merged.set_result(self.merge([d for chunk in results for d in chunk]))
+
+        for index, (chunk_tiles, _) in enumerate(chunks):
+            future = self.engine.submit_many(chunk_tiles)
+            future.add_done_callback(lambda f, index=index: on_chunk(index, f))
+        return merged
+
+    def merge(self, tile_detections):
+        tile_detections = [d for d in tile_detections if len(d)]
+        if not tile_detections:
+            return empty_detections()
+        merged = nms(np.concatenate(tile_detections), self.iou_threshold)
+        merged['id'] = np.arange(1, len(merged) + 1)
+        return merged
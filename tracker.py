@@ -0,0 +1,246 @@
+import numpy as np
+
+from detections import DETECTION_DTYPE, iou_matrix
+
+
+# Hungarian algorithm (minimum cost), rows vectorized over columns.
+# Returns (k, 2) array of (row, col) pairs.
+def linear_assignment(cost):
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)     # row assigned to column j (1-based, 0 = free)
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            used_cols = np.flatnonzero(used)
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    cols = np.flatnonzero(p[1:])
+    pairs = np.stack([p[1:][cols] - 1, cols], axis=1)
+    if transposed:
+        pairs = pairs[:, ::-1]
+    return pairs[np.argsort(pairs[:, 0])]
+
+
+# x, y, w, h -> Kalman measurement cx, cy, area, aspect
+def bbox_to_z(bbox):
+    bbox = np.asarray(bbox, dtype=np.float64).reshape(-1, 4)
+    w = bbox[:, 2]
+    h = np.maximum(bbox[:, 3], 1e-6)
+    return np.stack([bbox[:, 0] + w / 2, bbox[:, 1] + h / 2, w * h, w / h], axis=1)
+
+
+# Kalman state rows -> x, y, w, h
+def state_to_bbox(state):
+    area = np.maximum(state[:, 2], 0)
+    aspect = np.maximum(state[:, 3], 1e-6)
+    w = np.sqrt(area * aspect)
+    h = np.where(w > 0, area / np.maximum(w, 1e-6), 0)
+    return np.stack([state[:, 0] - w / 2, state[:, 1] - h / 2, w, h], axis=1)
+
+
+# Constant velocity Kalman filter for every track at once.
+# State: cx, cy, area, aspect, vx, vy, varea (SORT layout).
+class KalmanBoxFilter:
+    dim_x = 7
+    dim_z = 4
+
+    def __init__(self):
+        self.F = np.eye(self.dim_x)
+        self.F[0, 4] = self.F[1, 5] = self.F[2, 6] = 1
+        self.H = np.eye(self.dim_z, self.dim_x)
+
+        self.R = np.diag([1.0, 1.0, 10.0, 10.0])
+        self.Q = np.eye(self.dim_x)
+        self.Q[-1, -1] *= 0.01
+        self.Q[4:, 4:] *= 0.01
+
+        self.P0 = np.eye(self.dim_x) * 10.0
+        self.P0[4:, 4:] *= 1000.0
+
+        self.x = np.empty((0, self.dim_x))
+        self.P = np.empty((0, self.dim_x, self.dim_x))
+
+    def __len__(self):
+        return len(self.x)
+
+    def add(self, z):
+        x = np.zeros((len(z), self.dim_x))
+        x[:, :4] = z
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, np.broadcast_to(self.P0, (len(z),) + self.P0.shape)])
+
+    def keep(self, mask):
+        self.x = self.x[mask]
+        self.P = self.P[mask]
+
+    def predict(self):
+        if len(self.x) == 0:
+            return
+        # area must not go negative
+        shrinking = self.x[:, 2] + self.x[:, 6] <= 0
+        self.x[shrinking, 6] = 0
+        self.x = self.x @ self.F.T
+        self.P = self.F @ self.P @ self.F.T + self.Q
+
+    def update(self, index, z):
+        if len(index) == 0:
+            return
+        x = self.x[index]
+        P = self.P[index]
+
+        y = z - x @ self.H.T
+        PHt = P @ self.H.T
+        S = self.H @ PHt + self.R
+        K = PHt @ np.linalg.inv(S)
+
+        self.x[index] = x + np.einsum('nij,nj->ni', K, y)
+        self.P[index] = (np.eye(self.dim_x) - K @ self.H) @ P
+
+
+# SORT-style multi-object tracker: Kalman prediction + IoU/Hungarian association.
+# Issues stable track ids and can fill frames without detections from predictions.
+class MultiObjectTracker:
+    def __init__(self, iou_threshold=0.3, max_age=5, min_hits=2):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age      # detection rounds a track may go unmatched
+        self.min_hits = min_hits
+        self.kf = KalmanBoxFilter()
+        self.next_id = 1
+        self.rounds = 0
+
+        # per-track metadata, aligned with self.kf rows
+        self.ids = np.empty(0, dtype=np.int32)
+        self.hits = np.empty(0, dtype=np.int32)
+        self.misses = np.empty(0, dtype=np.int32)
+        self.last = np.empty(0, dtype=DETECTION_DTYPE)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def reset(self):
+        self.__init__(self.iou_threshold, self.max_age, self.min_hits)
+
+    # frame with detections: predict, associate, correct, return tracked detections.
+    # region (x1, y1, x2, y2) limits the update to tracks the detector could see.
+    def update(self, detections, region=None):
+        self.rounds += 1
+        self.kf.predict()
+
+        boxes = detections['bbox']
+        matches, unmatched_tracks, unmatched_dets = self.associate(boxes)
+        if region is not None and len(unmatched_tracks):
+            unmatched_tracks = unmatched_tracks[self._centers_inside(unmatched_tracks, region)]
+
+        if len(matches):
+            track_idx, det_idx = matches[:, 0], matches[:, 1]
+            self.kf.update(track_idx, bbox_to_z(boxes[det_idx]))
+            self.hits[track_idx] += 1
+            self.misses[track_idx] = 0
+            self.last[track_idx] = detections[det_idx]
+        self.misses[unmatched_tracks] += 1
+
+        # new tracks for unmatched detections
+        if len(unmatched_dets):
+            new = detections[unmatched_dets]
+            count = len(new)
+            self.kf.add(bbox_to_z(new['bbox']))
+            self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + count, dtype=np.int32)])
+            self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int32)])
+            self.misses = np.concatenate([self.misses, np.zeros(count, dtype=np.int32)])
+            self.last = np.concatenate([self.last, new])
+            self.next_id += count
+
+        self._drop_stale()
+        return self._output(self.misses == 0)
+
+    # frame without detections: advance every track and report predicted boxes
+    def predict(self):
+        self.kf.predict()
+        return self._output(self.misses == 0)
+
+    # pseudo-measurement for one track (e.g. from optical flow); does not count as a hit
+    def correct(self, track_id, bbox):
+        index = np.flatnonzero(self.ids == track_id)
+        if len(index) == 0:
+            return False
+        self.kf.update(index[:1], bbox_to_z(bbox))
+        return True
+
+    def associate(self, boxes):
+        n_tracks = len(self.ids)
+        n_dets = len(boxes)
+        if n_tracks == 0 or n_dets == 0:
+            return (np.empty((0, 2), dtype=np.int64),
+                    np.arange(n_tracks), np.arange(n_dets))
+
+        iou = iou_matrix(state_to_bbox(self.kf.x), boxes)
+        pairs = linear_assignment(-iou)
+        pairs = pairs[iou[pairs[:, 0], pairs[:, 1]] >= self.iou_threshold]
+
+        unmatched_tracks = np.setdiff1d(np.arange(n_tracks), pairs[:, 0])
+        unmatched_dets = np.setdiff1d(np.arange(n_dets), pairs[:, 1])
+        return pairs, unmatched_tracks, unmatched_dets
+
+    def _centers_inside(self, index, region):
+        x1, y1, x2, y2 = region
+        cx, cy = self.kf.x[index, 0], self.kf.x[index, 1]
+        return (cx >= x1) & (cx < x2) & (cy >= y1) & (cy < y2)
+
+    def _drop_stale(self):
+        alive = self.misses <= self.max_age
+        if alive.all():
+            return
+        self.kf.keep(alive)
+        self.ids = self.ids[alive]
+        self.hits = self.hits[alive]
+        self.misses = self.misses[alive]
+        self.last = self.last[alive]
+
+    def _output(self, mask):
+        # new tracks show up immediately while the tracker is warming up
+        confirmed = (self.hits >= self.min_hits) | (self.rounds <= self.min_hits)
+        mask = mask & confirmed
+
+        out = self.last[mask].copy()
+        out['id'] = self.ids[mask]
+        out['bbox'] = np.rint(state_to_bbox(self.kf.x[mask])).astype(np.int32)
+        return out
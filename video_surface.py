@@ -0,0 +1,108 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+import time
+
+from profiling import profiler
+
+
+# Video surfaces: the widget that shows the rendered frame, scaled to fit with
+# the aspect ratio kept. All take set_frame(image, owner). The painter and
+# OpenGL surfaces scale while drawing and paint registered overlays (the HUD)
+# in the same pass; the label surface is the original QPixmap/QLabel path.
+VIDEO_SURFACES = ("label", "painter", "opengl")
+
+
+# QPixmap conversion plus a software rescale per frame, shown by a QLabel
+class LabelVideoSurface(QLabel):
+    composites_overlays = False
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("background-color: black;")
+        self.setAlignment(Qt.AlignCenter)
+
+    def set_frame(self, image, owner=None):
+        start = time.perf_counter_ns()
+        pixmap = QPixmap.fromImage(image).scaled(self.width(), self.height(), Qt.KeepAspectRatio)
+        self.setPixmap(pixmap)
+        profiler.add("present", start)
+
+
+# Shared drawing of the frame and overlays for painter based surfaces
+class _FramePainterMixin:
+    composites_overlays = True
+
+    def _init_surface(self):
+        self.image = None
+        self.image_owner = None
+        self.overlays = []
+        self.smooth = False  # bilinear filtering; the QLabel path scales nearest-neighbour
+
+    # owner keeps the pixel buffer behind image alive while it is shown
+    def set_frame(self, image, owner=None):
+        self.image = image
+        self.image_owner = owner
+        self.update()
+
+    # paint_fn(painter) is called after the frame, in widget coordinates
+    def add_overlay(self, paint_fn):
+        self.overlays.append(paint_fn)
+
+    # where the frame lands in the widget: centered, aspect ratio kept
+    def frame_rect(self):
+        if self.image is None or self.image.isNull():
+            return QRect()
+        size = self.image.size().scaled(self.size(), Qt.KeepAspectRatio)
+        return QRect(QPoint((self.width() - size.width()) // 2, (self.height() - size.height()) // 2), size)
+
+    def paint_surface(self, painter):
+        start = time.perf_counter_ns()
+        target = self.frame_rect()
+        # black bars only where the frame does not cover the widget
+        for rect in QRegion(self.rect()).subtracted(QRegion(target)).rects():
+            painter.fillRect(rect, Qt.black)
+        if self.image is not None:
+            painter.setRenderHint(QPainter.SmoothPixmapTransform, self.smooth)
+            painter.drawImage(target, self.image)
+        profiler.add("present", start)
+        for paint_fn in self.overlays:
+            painter.save()
+            paint_fn(painter)
+            painter.restore()
+
+
+# Raster QPainter: the frame is scaled straight into the backing store
+class PainterVideoSurface(_FramePainterMixin, QWidget):
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent)
+        self._init_surface()
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        self.paint_surface(painter)
+        painter.end()
+
+
+# OpenGL paint engine: the frame is uploaded once as a texture and scaled by GL.
+# Runs on Mesa llvmpipe too (LIBGL_ALWAYS_SOFTWARE=1 on a headless box).
+class OpenGLVideoSurface(_FramePainterMixin, QOpenGLWidget):
+    def __init__(self, parent=None):
+        QOpenGLWidget.__init__(self, parent)
+        self._init_surface()
+
+    def paintGL(self):
+        painter = QPainter(self)
+        self.paint_surface(painter)
+        painter.end()
+
+
+def create_video_surface(kind, parent=None):
+    if kind == "label":
+        return LabelVideoSurface(parent)
+    if kind == "painter":
+        return PainterVideoSurface(parent)
+    if kind == "opengl":
+        return OpenGLVideoSurface(parent)
+    raise ValueError(f"unknown video surface {kind}")